@@ -0,0 +1,63 @@
+"""
+Compare entropy in log space against taking the log of the exact number of
+possible passwords, for passwords of increasing length.
+
+run with:
+    python benchmarks/bench_entropy.py
+"""
+import math
+import timeit
+
+from password_validation.calculate import calculate_entropy
+from password_validation.calculate import log2_power
+from password_validation.character_pool import CharacterPool
+
+LENGTHS = (8, 16, 32, 64, 128)
+POOL_SIZES = (10, 62, 95)
+NUMBER = 100000
+
+
+def big_integer_entropy(password, pool):
+    # the previous implementation, log base 2 of the exact integer
+    pool_of_characters = pool.mask_sizes[pool.analyse(password).mask]
+    return math.log(pool_of_characters ** len(password), 2)
+
+
+def main():
+    pool = CharacterPool()
+
+    print("pool ^ length -> entropy")
+    print(f"{'pool':>5} {'length':>6} {'big int (ns)':>13} {'log space (ns)':>15} {'speedup':>8}")
+    for pool_size in POOL_SIZES:
+        for length in LENGTHS:
+            big_integer = timeit.timeit(
+                lambda: math.log(pool_size ** length, 2), number=NUMBER
+            )
+            log_space = timeit.timeit(
+                lambda: log2_power(pool_size, length), number=NUMBER
+            )
+            print(
+                f"{pool_size:>5} {length:>6} {big_integer / NUMBER * 1e9:>13.1f} "
+                f"{log_space / NUMBER * 1e9:>15.1f} {big_integer / log_space:>7.2f}x"
+            )
+
+    print()
+    print("calculate_entropy, end to end")
+    print(f"{'length':>6} {'big int (us)':>13} {'log space (us)':>15} {'speedup':>8}")
+    for length in LENGTHS:
+        password = ("Tr0ub4dor&3 " * length)[:length]
+        big_integer = timeit.timeit(
+            lambda: big_integer_entropy(password, pool), number=NUMBER // 10
+        )
+        log_space = timeit.timeit(
+            lambda: calculate_entropy(password, character_pool=pool),
+            number=NUMBER // 10,
+        )
+        print(
+            f"{length:>6} {big_integer / NUMBER * 1e7:>13.3f} "
+            f"{log_space / NUMBER * 1e7:>15.3f} {big_integer / log_space:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""
+A deterministic synthetic corpus for the benchmarks.
+
+The same seed always gives the same passwords and words, on any machine and
+any version of python, as they are drawn from a seeded random.Random rather
+than the global random state.
+"""
+import random
+
+from password_validation.character_pool import CharacterPool
+
+# a pool of each size the benchmarks vary over, by its number of characters
+POOLS = {
+    16: CharacterPool(
+        lowercase="abcdef",
+        uppercase="ABCDEF",
+        numbers="0123",
+        symbols="",
+        whitespace="",
+    ),
+    62: CharacterPool(symbols="", whitespace=""),
+    95: CharacterPool(whitespace=" "),
+}
+
+
+def generate_passwords(
+    number: int, length: int, pool: CharacterPool, seed: int = 0
+) -> list:
+    """
+    Passwords of a length, drawn uniformly from every character of a pool
+
+    :param number: the number of passwords
+    :type: int
+
+    :param length: the length of each password
+    :type: int
+
+    :param pool: the pool to draw characters from
+    :type: CharacterPool
+
+    :param seed: the seed
+    :type: int
+
+    :return: the passwords
+    :type: list(str)
+    """
+    rng = random.Random(f"passwords-{seed}-{length}")
+    characters = sorted(pool.all)
+    return ["".join(rng.choices(characters, k=length)) for _ in range(number)]
+
+
+def generate_words(number: int, seed: int = 0) -> list:
+    """
+    Distinct lowercase words of 4 to 12 letters, e.g. to forbid
+
+    :param number: the number of words
+    :type: int
+
+    :param seed: the seed
+    :type: int
+
+    :return: the words
+    :type: list(str)
+    """
+    rng = random.Random(f"words-{seed}")
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    rv = []
+    while len(rv) < number:
+        word = "".join(rng.choices(letters, k=rng.randint(4, 12)))
+        if word not in words:
+            words.add(word)
+            rv.append(word)
+    return rv
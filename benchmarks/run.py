@@ -0,0 +1,250 @@
+"""
+Benchmark the hot paths: Password construction, calculate_entropy (every
+method), Classifier.classify, PasswordPolicy.__init__, test_password and
+validate, over password lengths, pool sizes and numbers of forbidden words.
+
+The passwords and words come from a deterministic corpus (see corpus.py), so
+runs on the same machine are comparable. Each result is the best of a few
+repeats, in nanoseconds per call.
+
+run with (from the root of the repo, with the package installed):
+    python benchmarks/run.py --output baseline.json
+and, after a change, compare against it:
+    python benchmarks/run.py --compare baseline.json --threshold 0.1
+which flags every benchmark more than 10% slower than the baseline and exits
+with 1 if there are any.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+from corpus import POOLS
+from corpus import generate_passwords
+from corpus import generate_words
+
+from password_validation.calculate import Classifier
+from password_validation.calculate import calculate_entropy
+from password_validation.password import Password
+from password_validation.policy import PasswordPolicy
+
+LENGTHS = (8, 16, 32, 64, 128)
+METHODS = ("strict", "normal", "lenient", "pattern", "markov")
+FORBIDDEN_WORDS_SIZES = (0, 1000, 100000)
+NUMBER_OF_PASSWORDS = 200
+
+
+def benchmarks(number_of_passwords: int):
+    """
+    Every benchmark, as its name, parameters and a function that runs it over
+    a batch of inputs, with the number of inputs
+
+    :return: name, parameters, function and number of calls per run
+    :type: generator of tuple(str, dict, callable, int)
+    """
+    pool = POOLS[95]
+
+    for pool_size, character_pool in POOLS.items():
+        for length in LENGTHS:
+            passwords = generate_passwords(number_of_passwords, length, character_pool)
+
+            def run(passwords=passwords, character_pool=character_pool):
+                for password in passwords:
+                    Password(password, character_pool)
+
+            yield "password", {"length": length, "pool": pool_size}, run, len(passwords)
+
+    for method in METHODS:
+        for length in LENGTHS:
+            passwords = generate_passwords(number_of_passwords, length, pool)
+
+            def run(passwords=passwords, method=method):
+                for password in passwords:
+                    calculate_entropy(password, method, pool)
+
+            yield "calculate_entropy", {
+                "method": method,
+                "length": length,
+                "pool": 95,
+            }, run, len(passwords)
+
+    classifier = Classifier()
+    values = [0.5 + i * 200 / number_of_passwords for i in range(number_of_passwords)]
+
+    def run():
+        for value in values:
+            classifier.classify(value)
+
+    yield "classify", {}, run, len(values)
+
+    words = generate_words(max(FORBIDDEN_WORDS_SIZES))
+    for size in FORBIDDEN_WORDS_SIZES:
+
+        def run(forbidden_words=words[:size]):
+            PasswordPolicy(forbidden_words=forbidden_words)
+
+        yield "policy_init", {"forbidden_words": size}, run, 1
+
+    for size in FORBIDDEN_WORDS_SIZES:
+        # half of the passwords are forbidden words, so every check is made
+        policy = PasswordPolicy(min_length=4, forbidden_words=words[:size])
+        for length in (8, 32, 128):
+            passwords = generate_passwords(number_of_passwords, length, pool)
+            if size:
+                passwords[::2] = words[: len(passwords[::2])]
+
+            for name, func in (
+                ("test_password", policy.test_password),
+                ("validate", policy.validate),
+            ):
+
+                def run(passwords=passwords, func=func):
+                    for password in passwords:
+                        func(password)
+
+                yield name, {
+                    "forbidden_words": size,
+                    "length": length,
+                    "pool": 95,
+                }, run, len(passwords)
+
+
+def key(name: str, parameters: dict) -> str:
+    """the key of a benchmark in the results, e.g. "password[length=8,pool=16]" """
+    if not parameters:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in parameters.items())}]"
+
+
+def time_benchmark(run, calls: int, repeat: int) -> float:
+    """the best time of a few repeats of a run, in nanoseconds per call"""
+    timer = timeit.Timer(run)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return best / (number * calls) * 1e9
+
+
+def run_benchmarks(
+    selected: str = None,
+    repeat: int = 5,
+    number_of_passwords: int = NUMBER_OF_PASSWORDS,
+) -> dict:
+    """
+    Run the benchmarks
+
+    :param selected: only run benchmarks with this in their key
+    :type: str
+
+    :param repeat: the number of repeats, the best is kept
+    :type: int
+
+    :param number_of_passwords: the number of passwords in each run
+    :type: int
+
+    :return: the results
+    :type: dict
+    """
+    results = {}
+    for name, parameters, run, calls in benchmarks(number_of_passwords):
+        benchmark = key(name, parameters)
+        if selected is not None and selected not in benchmark:
+            continue
+        results[benchmark] = {
+            "name": name,
+            "parameters": parameters,
+            "ns_per_call": round(time_benchmark(run, calls, repeat), 1),
+        }
+        # progress goes to stderr, the comparison to stdout
+        print(
+            f"{benchmark:<60} {results[benchmark]['ns_per_call']:>14.1f} ns",
+            file=sys.stderr,
+        )
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    Compare results against a baseline
+
+    :param results: the results, as run_benchmarks returns
+    :type: dict
+
+    :param baseline: the baseline, the same
+    :type: dict
+
+    :param threshold: how much slower, as a fraction, is a regression
+    :type: float
+
+    :return: the key, baseline, result and ratio of every benchmark in both,
+             and whether it is a regression
+    :type: list(tuple(str, float, float, float, bool))
+    """
+    rv = []
+    for benchmark, result in results["results"].items():
+        before = baseline["results"].get(benchmark)
+        if before is None:
+            continue
+        ratio = result["ns_per_call"] / before["ns_per_call"]
+        rv.append(
+            (
+                benchmark,
+                before["ns_per_call"],
+                result["ns_per_call"],
+                ratio,
+                ratio > 1 + threshold,
+            )
+        )
+    return rv
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark password_validation")
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    parser.add_argument("--compare", help="a baseline to compare the results with")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="how much slower than the baseline, as a fraction, is a regression",
+    )
+    parser.add_argument("--filter", help="only run benchmarks with this in their name")
+    parser.add_argument(
+        "--quick", action="store_true", help="fewer repeats and passwords, e.g. for CI"
+    )
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        results = run_benchmarks(args.filter, repeat=2, number_of_passwords=50)
+    else:
+        results = run_benchmarks(args.filter)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        comparison = compare(results, baseline, args.threshold)
+        print(f"{'benchmark':<60} {'baseline':>10} {'now':>10} {'ratio':>7}")
+        for benchmark, before, now, ratio, regression in comparison:
+            flag = "  REGRESSION" if regression else ""
+            print(f"{benchmark:<60} {before:>10.1f} {now:>10.1f} {ratio:>6.2f}x{flag}")
+        regressions = sum(1 for *_, regression in comparison if regression)
+        print(f"{regressions} regressions of {len(comparison)} benchmarks")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
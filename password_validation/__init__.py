@@ -1,4 +1,5 @@
 from .character_pool import CharacterPool
 from .policy import PasswordPolicy
+from .policy import RequirementCode
 
-__all__ = ["CharacterPool", "PasswordPolicy"]
+__all__ = ["CharacterPool", "PasswordPolicy", "RequirementCode"]
@@ -0,0 +1,586 @@
+"""
+Audit a large file of passwords across a pool of processes.
+
+The file (one password per line) is memory mapped and split into chunks of
+about chunk_size bytes that end on a line break. Each worker process maps the
+file itself and is only sent the byte range of a chunk, so lines are never
+pickled, and sends back a code for every line (see RequirementCode) and a
+summary of its chunk. The summaries merge into the summary of the audit.
+    e.g.
+    > summary = audit("dump.txt", policy, workers=8)
+    > summary.failures["forbidden_words"]
+    1234
+
+Given a checkpoint path, the chunks that are done (and their summary) are
+saved to it as the audit goes, and an interrupted audit started again with
+the same checkpoint only audits the chunks that weren't done.
+"""
+import hashlib
+import json
+import mmap
+import multiprocessing
+import os
+import time
+from array import array
+
+from password_validation.character_pool import CharacterRanges
+from password_validation.password import Password
+from password_validation.policy import PasswordPolicy
+from password_validation.policy import REQUIREMENT_BITS
+from password_validation.policy import REQUIREMENT_CODES
+from password_validation.policy import REQUIREMENT_NAMES
+from password_validation.policy import RequirementCode
+from password_validation.shared import PolicyHandle
+
+# the code of a line whose password has characters that aren't in the pool
+ERROR_CODE = 0xFFFF
+
+
+class AuditSummary:
+    """
+    Counts of the results of an audit, or of a chunk of one
+
+    :param histogram_width: the width, in bits, of each bin of the entropy
+                            histogram
+    :type: int or float
+    """
+
+    def __init__(self, histogram_width: float = 8):
+        assert histogram_width > 0, "histogram_width must be greater than 0"
+        self.histogram_width = histogram_width
+        self.total = 0
+        self.valid = 0
+        self.invalid = 0
+        self.errors = 0
+        self.failures = dict.fromkeys(REQUIREMENT_NAMES, 0)
+        # entropy_histogram[i] is the number of passwords with an entropy from
+        # i * histogram_width up to (i + 1) * histogram_width
+        self.entropy_histogram = []
+        self.classifications = {}
+
+    def merge(self, other):
+        """add the counts of another summary to this one"""
+        assert (
+            self.histogram_width == other.histogram_width
+        ), "only summaries with the same histogram_width can be merged"
+        self.total += other.total
+        self.valid += other.valid
+        self.invalid += other.invalid
+        self.errors += other.errors
+        for name, count in other.failures.items():
+            self.failures[name] = self.failures.get(name, 0) + count
+        histogram = self.entropy_histogram
+        if len(histogram) < len(other.entropy_histogram):
+            histogram.extend([0] * (len(other.entropy_histogram) - len(histogram)))
+        for i, count in enumerate(other.entropy_histogram):
+            histogram[i] += count
+        for classification, count in other.classifications.items():
+            self.classifications[classification] = (
+                self.classifications.get(classification, 0) + count
+            )
+        return self
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "failures": dict(self.failures),
+            "histogram_width": self.histogram_width,
+            "entropy_histogram": list(self.entropy_histogram),
+            "classifications": dict(self.classifications),
+        }
+
+    @classmethod
+    def from_dict(cls, summary: dict):
+        rv = cls(summary["histogram_width"])
+        rv.total = summary["total"]
+        rv.valid = summary["valid"]
+        rv.invalid = summary["invalid"]
+        rv.errors = summary["errors"]
+        rv.failures.update(summary["failures"])
+        rv.entropy_histogram = list(summary["entropy_histogram"])
+        rv.classifications = dict(summary["classifications"])
+        return rv
+
+    def __repr__(self):
+        return (
+            f"AuditSummary(total={self.total}, valid={self.valid}, "
+            f"invalid={self.invalid}, errors={self.errors})"
+        )
+
+
+class ChunkResult:
+    """
+    The result of auditing a chunk of a file
+
+    :param index: the index of the chunk
+    :param start: the byte offset the chunk starts at
+    :param end: the byte offset the chunk ends at
+    :param first_line: the line number (from 1) of the first line of the chunk
+    :param codes: the code of each line, ERROR_CODE for unacceptable characters
+    :param summary: the summary of the chunk
+    """
+
+    __slots__ = ("index", "start", "end", "first_line", "codes", "summary")
+
+    def __init__(
+        self,
+        index: int,
+        start: int,
+        end: int,
+        first_line: int,
+        codes: array,
+        summary: AuditSummary,
+    ):
+        self.index = index
+        self.start = start
+        self.end = end
+        self.first_line = first_line
+        self.codes = codes
+        self.summary = summary
+
+    def results(self):
+        """
+        The line number and code of each line, the code is None when the
+        password has characters that aren't in the policy's pool
+
+        :return: line number and code
+        :type: generator of tuple(int, int)
+        """
+        for number, code in enumerate(self.codes, self.first_line):
+            yield number, None if code == ERROR_CODE else code
+
+    def __repr__(self):
+        return (
+            f"ChunkResult(index={self.index}, lines={self.first_line}-"
+            f"{self.first_line + len(self.codes) - 1})"
+        )
+
+
+def _open_buffer(path: str):
+    with open(path, "rb") as f:
+        # an empty file can't be mapped, and has nothing to audit anyway
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def plan_chunks(buffer, chunk_size: int) -> list:
+    """
+    Split a buffer of lines into chunks of about chunk_size bytes that end on
+    a line break
+
+    :param buffer: the lines, e.g. a mmap
+    :type: bytes-like
+
+    :param chunk_size: the number of bytes in a chunk, before it is extended to
+                       the end of its last line
+    :type: int
+
+    :return: the start, end and first line number of each chunk
+    :type: list(tuple(int, int, int))
+    """
+    assert chunk_size > 0, "chunk_size must be greater than 0"
+    size = len(buffer)
+    # bytes count the line breaks in place, but a mmap has no count, so each
+    # of its chunks is copied to count them
+    count = getattr(buffer, "count", None)
+    rv = []
+    start = 0
+    first_line = 1
+    while start < size:
+        end = buffer.find(b"\n", min(start + chunk_size, size) - 1)
+        end = size if end == -1 else end + 1
+        rv.append((start, end, first_line))
+        if count is not None:
+            first_line += count(b"\n", start, end)
+        else:
+            first_line += buffer[start:end].count(b"\n")
+        start = end
+    return rv
+
+
+def _split_lines(buffer, start: int, end: int, encoding: str) -> list:
+    # undecodable bytes become surrogates, which are never in a pool
+    text = buffer[start:end].decode(encoding, "surrogateescape")
+    lines = text.split("\n")
+    # the last line ends with a line break, unless it is the end of the file
+    if lines[-1] == "":
+        lines.pop()
+    # and a file with Windows line breaks has a carriage return before each
+    return [line[:-1] if line.endswith("\r") else line for line in lines]
+
+
+def audit_chunk(
+    policy: PasswordPolicy,
+    lines,
+    histogram_width: float = 8,
+):
+    """
+    Audit lines of passwords
+
+    :param policy: the policy to audit against
+    :type: PasswordPolicy
+
+    :param lines: the passwords
+    :type: iterable of str
+
+    :param histogram_width: the width, in bits, of each bin of the entropy
+                            histogram
+    :type: int or float
+
+    :return: the code of each line and the summary of them
+    :type: tuple(array, AuditSummary)
+    """
+    summary = AuditSummary(histogram_width)
+    codes = array("H")
+    entropies = []
+    failures = [0] * len(REQUIREMENT_CODES)
+    pool = policy.pool
+    # the code and the entropy it was worked out from, so each password is
+    # only estimated once
+    code_and_actuals = policy._code_and_actuals
+    entropy_index = REQUIREMENT_CODES.index(RequirementCode.ENTROPY)
+
+    for line in lines:
+        try:
+            password = Password(line, pool)
+        except AssertionError:
+            codes.append(ERROR_CODE)
+            continue
+        code, actuals = code_and_actuals(password)
+        codes.append(code)
+        entropies.append(actuals[entropy_index])
+        if code:
+            for i, bit in enumerate(REQUIREMENT_BITS):
+                if code & bit:
+                    failures[i] += 1
+
+    summary.total = len(codes)
+    summary.errors = summary.total - len(entropies)
+    summary.valid = codes.count(0)
+    summary.invalid = len(entropies) - summary.valid
+    summary.failures = dict(zip(REQUIREMENT_NAMES, failures))
+
+    histogram = summary.entropy_histogram
+    for value in entropies:
+        i = int(value // histogram_width)
+        if i >= len(histogram):
+            histogram.extend([0] * (i + 1 - len(histogram)))
+        histogram[i] += 1
+
+    # ranges don't include their beginning, so an entropy of 0 (e.g. an empty
+    # password) is counted in the lowest classification
+    classifier = policy.classifier
+    classifications = summary.classifications
+    for classification in classifier.classify_many(v for v in entropies if v > 0):
+        classifications[classification] = classifications.get(classification, 0) + 1
+    zeros = sum(1 for v in entropies if v <= 0)
+    if zeros:
+        lowest = classifier.classifications[0]
+        classifications[lowest] = classifications.get(lowest, 0) + zeros
+    return codes, summary
+
+
+# the state of a worker process, set by _initialise
+_worker = {}
+
+
+def _initialise(path: str, policy: PasswordPolicy, encoding: str, histogram_width):
+    _worker["buffer"] = _open_buffer(path)
+    if isinstance(policy, PolicyHandle):
+        policy = policy.attach()
+    _worker["policy"] = policy
+    _worker["encoding"] = encoding
+    _worker["histogram_width"] = histogram_width
+
+
+def _audit_task(task) -> ChunkResult:
+    index, start, end, first_line = task
+    lines = _split_lines(_worker["buffer"], start, end, _worker["encoding"])
+    codes, summary = audit_chunk(
+        _worker["policy"], lines, _worker["histogram_width"]
+    )
+    return ChunkResult(index, start, end, first_line, codes, summary)
+
+
+def _canonical(value):
+    """a value of a policy's to_dict as JSON that is the same in every process"""
+    if isinstance(value, (set, frozenset)):
+        # a set's order depends on the process's hash seed
+        return sorted(value)
+    if isinstance(value, CharacterRanges):
+        return [list(pair) for pair in value.ranges]
+    return repr(value)
+
+
+def _policy_identity(policy: PasswordPolicy) -> str:
+    """
+    A SHA-256 of a policy's to_dict, with its character classes and forbidden
+    words sorted, so the same policy has the same identity in any process
+    """
+    policy = policy.to_dict()
+    if isinstance(policy["forbidden_words"], list):
+        policy["forbidden_words"] = sorted(policy["forbidden_words"])
+    canonical = json.dumps(
+        policy, default=_canonical, sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(canonical.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+class Checkpoint:
+    """
+    The chunks of an audit that are done, and their summary, saved to a JSON
+    file so an interrupted audit can resume
+
+    A checkpoint belongs to one audit, it can't be resumed with a different
+    file, chunk_size, encoding, histogram_width or policy.
+
+    :param path: the path to the checkpoint file
+    :type: str
+
+    :param audit: what identifies the audit, see Checkpoint.identify
+    :type: dict
+    """
+
+    def __init__(self, path: str, audit: dict, interval: float = 5.0):
+        self.path = path
+        self.audit = audit
+        self.interval = interval
+        self.done = set()
+        self.summary = AuditSummary(audit["histogram_width"])
+        self.saved = time.monotonic()
+
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+            assert saved["audit"] == audit, (
+                f"the checkpoint {path} is for a different audit, "
+                f"remove it to start again"
+            )
+            self.done = set(saved["done"])
+            self.summary = AuditSummary.from_dict(saved["summary"])
+
+    @staticmethod
+    def identify(
+        path: str,
+        chunk_size: int,
+        encoding: str,
+        histogram_width: float,
+        policy: PasswordPolicy,
+    ) -> dict:
+        stat = os.stat(path)
+        return {
+            "source": os.path.abspath(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "chunk_size": chunk_size,
+            "encoding": encoding,
+            "histogram_width": histogram_width,
+            "policy": _policy_identity(policy),
+        }
+
+    def add(self, chunk: ChunkResult):
+        self.done.add(chunk.index)
+        self.summary.merge(chunk.summary)
+        if time.monotonic() - self.saved >= self.interval:
+            self.save()
+
+    def save(self):
+        # write then rename, so the checkpoint is never half written
+        temporary_path = self.path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "audit": self.audit,
+                    "done": sorted(self.done),
+                    "summary": self.summary.to_dict(),
+                },
+                f,
+            )
+        os.replace(temporary_path, self.path)
+        self.saved = time.monotonic()
+
+
+def _run(
+    source: str,
+    policy: PasswordPolicy,
+    workers: int,
+    chunk_size: int,
+    ordered: bool,
+    checkpoint: Checkpoint,
+    encoding: str,
+    histogram_width: float,
+):
+    buffer = _open_buffer(source)
+    try:
+        tasks = [
+            (index, start, end, first_line)
+            for index, (start, end, first_line) in enumerate(
+                plan_chunks(buffer, chunk_size)
+            )
+            if checkpoint is None or index not in checkpoint.done
+        ]
+    finally:
+        if isinstance(buffer, mmap.mmap):
+            buffer.close()
+
+    initargs = (source, policy, encoding, histogram_width)
+    try:
+        if workers == 1:
+            # no processes, e.g. to debug
+            _initialise(*initargs)
+            try:
+                for task in tasks:
+                    chunk = _audit_task(task)
+                    if checkpoint is not None:
+                        checkpoint.add(chunk)
+                    yield chunk
+            finally:
+                if isinstance(_worker["buffer"], mmap.mmap):
+                    _worker["buffer"].close()
+                _worker.clear()
+        else:
+            with multiprocessing.Pool(
+                workers, initializer=_initialise, initargs=initargs
+            ) as process_pool:
+                if ordered:
+                    chunks = process_pool.imap(_audit_task, tasks)
+                else:
+                    chunks = process_pool.imap_unordered(_audit_task, tasks)
+                for chunk in chunks:
+                    if checkpoint is not None:
+                        checkpoint.add(chunk)
+                    yield chunk
+    finally:
+        if checkpoint is not None:
+            checkpoint.save()
+
+
+def _local(policy) -> PasswordPolicy:
+    return policy.attach() if isinstance(policy, PolicyHandle) else policy
+
+
+def iter_audit(
+    source: str,
+    policy: PasswordPolicy = None,
+    workers: int = None,
+    chunk_size: int = 1 << 22,
+    ordered: bool = True,
+    checkpoint: str = None,
+    encoding: str = "utf-8",
+    histogram_width: float = 8,
+):
+    """
+    Audit a file of passwords, one per line, in chunks across a pool of
+    processes, see the module docstring
+
+    :param source: the path to the file
+    :type: str
+
+    :param policy: the policy to audit against, PasswordPolicy() by default,
+                   or the handle of a SharedPolicy for the workers to attach
+    :type: PasswordPolicy or PolicyHandle
+
+    :param workers: the number of processes, the number of CPUs by default,
+                    1 audits in this process
+    :type: int
+
+    :param chunk_size: the number of bytes in a chunk (about)
+    :type: int
+
+    :param ordered: whether to yield the chunks in the order of the file,
+                    otherwise they are yielded as they are done
+    :type: bool
+
+    :param checkpoint: path to a checkpoint file, to resume from if it exists,
+                       the chunks done before aren't yielded again
+    :type: str
+
+    :param encoding: the encoding of the file
+    :type: str
+
+    :param histogram_width: the width, in bits, of each bin of the entropy
+                            histogram
+    :type: int or float
+
+    :return: the result of each chunk
+    :type: generator of ChunkResult
+    """
+    policy = PasswordPolicy() if policy is None else policy
+    if checkpoint is not None:
+        checkpoint = Checkpoint(
+            checkpoint,
+            Checkpoint.identify(
+                source, chunk_size, encoding, histogram_width, _local(policy)
+            ),
+        )
+    return _run(
+        source,
+        policy,
+        os.cpu_count() if workers is None else workers,
+        chunk_size,
+        ordered,
+        checkpoint,
+        encoding,
+        histogram_width,
+    )
+
+
+def audit(
+    source: str,
+    policy: PasswordPolicy = None,
+    workers: int = None,
+    chunk_size: int = 1 << 22,
+    checkpoint: str = None,
+    encoding: str = "utf-8",
+    histogram_width: float = 8,
+) -> AuditSummary:
+    """
+    Audit a file of passwords, one per line, and summarise the results, see
+    iter_audit for the parameters
+
+    When resuming from a checkpoint the summary includes the chunks done
+    before.
+
+    :return: the summary of the whole file
+    :type: AuditSummary
+    """
+    policy = PasswordPolicy() if policy is None else policy
+    workers = os.cpu_count() if workers is None else workers
+    if checkpoint is None:
+        summary = AuditSummary(histogram_width)
+        for chunk in _run(
+            source,
+            policy,
+            workers,
+            chunk_size,
+            False,
+            None,
+            encoding,
+            histogram_width,
+        ):
+            summary.merge(chunk.summary)
+        return summary
+
+    checkpoint = Checkpoint(
+        checkpoint,
+        Checkpoint.identify(
+            source, chunk_size, encoding, histogram_width, _local(policy)
+        ),
+    )
+    # the checkpoint merges every chunk's summary into its own
+    for _ in _run(
+        source,
+        policy,
+        workers,
+        chunk_size,
+        False,
+        checkpoint,
+        encoding,
+        histogram_width,
+    ):
+        pass
+    return checkpoint.summary
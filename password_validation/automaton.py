@@ -0,0 +1,251 @@
+import bisect
+import struct
+from array import array
+from collections import deque
+
+# number of nodes, number of transitions, number of words
+FROZEN_HEADER = struct.Struct("<QQQ")
+
+
+class AhoCorasick:
+    """
+    An Aho-Corasick automaton of words, to find every word embedded in a text.
+
+    The automaton is built once from the words, then finding the words in a
+    text takes time linear in the length of the text, however many words
+    there are. Matching is case-insensitive (words and text are casefolded).
+        e.g.
+        > automaton = AhoCorasick(["password", "summer"])
+        > automaton.findall("Summer2024password!")
+        ['summer', 'password']
+        > "Summer2024password!" in automaton
+        True
+
+    Note that `text in automaton` is whether any word is embedded in the text,
+    so it can be used as the requirement of the not_in function.
+
+    :param words: the words to find
+    :type: iterable of str
+    """
+
+    def __init__(self, words):
+        # each node is a dict of character to the next node
+        self.goto = [{}]
+        # the node to fall back to when there is no next node for a character
+        self.fail = [0]
+        # the words that end at each node, including through its fail nodes
+        self.output = [()]
+        self.words = []
+
+        for word in words:
+            assert isinstance(word, str), "all words must be strings"
+            node = 0
+            for character in word.casefold():
+                next_node = self.goto[node].get(character)
+                if next_node is None:
+                    next_node = len(self.goto)
+                    self.goto[node][character] = next_node
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.output.append(())
+                node = next_node
+            if word not in self.output[node]:
+                self.words.append(word)
+                self.output[node] += (word,)
+
+        # breadth first, so a node's fail node is always done before it
+        queue = deque(self.goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for character, next_node in self.goto[node].items():
+                queue.append(next_node)
+                fail = self.fail[node]
+                while fail and character not in self.goto[fail]:
+                    fail = self.fail[fail]
+                fail = self.goto[fail].get(character, 0)
+                self.fail[next_node] = fail
+                self.output[next_node] += self.output[fail]
+
+    def step(self, node: int, character: str) -> int:
+        """
+        The node after reading a (casefolded) character from a node
+
+        :param node: the current node, 0 is the start
+        :type: int
+
+        :param character: the next character
+        :type: str
+
+        :return: the next node
+        :type: int
+        """
+        goto = self.goto
+        fail = self.fail
+        while True:
+            next_node = goto[node].get(character)
+            if next_node is not None:
+                return next_node
+            if not node:
+                return 0
+            node = fail[node]
+
+    def matches(self, node: int) -> bool:
+        """whether a word ends at a node"""
+        return bool(self.output[node])
+
+    def findall(self, text: str) -> list:
+        """
+        Find every word embedded in a text, in the order they end in the text
+
+        :param text: the text to search
+        :type: str
+
+        :return: the words found
+        :type: list(str)
+        """
+        rv = list(self.output[0])
+        node = 0
+        step = self.step
+        output = self.output
+        for character in text.casefold():
+            node = step(node, character)
+            rv.extend(output[node])
+        return rv
+
+    def __contains__(self, text: str) -> bool:
+        if self.output[0]:
+            return True
+        node = 0
+        step = self.step
+        output = self.output
+        for character in text.casefold():
+            node = step(node, character)
+            if output[node]:
+                return True
+        return False
+
+    def freeze(self):
+        """
+        The automaton flattened into arrays in a single buffer, see
+        FrozenAhoCorasick
+
+        :return: the frozen automaton
+        :type: FrozenAhoCorasick
+        """
+        node_start = array("I", [0])
+        characters = array("I")
+        targets = array("I")
+        for transitions in self.goto:
+            for character, next_node in sorted(transitions.items()):
+                characters.append(ord(character))
+                targets.append(next_node)
+            node_start.append(len(characters))
+        fail = array("I", self.fail)
+        terminal = array("B", (1 if output else 0 for output in self.output))
+
+        buffer = bytearray(
+            FROZEN_HEADER.pack(len(self.goto), len(characters), len(self.words))
+        )
+        for part in (node_start, characters, targets, fail, terminal):
+            buffer += part.tobytes()
+        return FrozenAhoCorasick(buffer)
+
+    def __len__(self):
+        return len(self.words)
+
+    def __repr__(self):
+        return f"AhoCorasick({len(self.words)} words)"
+
+
+class FrozenAhoCorasick:
+    """
+    An AhoCorasick automaton flattened into arrays in a buffer, made with
+    AhoCorasick.freeze.
+
+    The buffer isn't copied, so it can be a mmap or shared memory and used by
+    many processes at once. Each node's transitions are sorted by character and
+    binary searched. It only answers whether any word is embedded in a text.
+        e.g.
+        > automaton = AhoCorasick(["password", "summer"]).freeze()
+        > "Summer2024password!" in automaton
+        True
+
+    :param buffer: the frozen automaton
+    :type: bytes-like
+    """
+
+    def __init__(self, buffer):
+        number_of_nodes, number_of_transitions, number_of_words = (
+            FROZEN_HEADER.unpack_from(buffer)
+        )
+        self.buffer = buffer
+        self.number_of_words = number_of_words
+
+        view = memoryview(buffer)
+        offset = FROZEN_HEADER.size
+        parts = []
+        for code, length in (
+            ("I", number_of_nodes + 1),
+            ("I", number_of_transitions),
+            ("I", number_of_transitions),
+            ("I", number_of_nodes),
+            ("B", number_of_nodes),
+        ):
+            size = length * array(code).itemsize
+            parts.append(view[offset:offset + size].cast(code))
+            offset += size
+        assert offset <= len(buffer), "the frozen automaton is truncated"
+        self.node_start, self.characters, self.targets, self.fail, self.terminal = (
+            parts
+        )
+
+    def __contains__(self, text: str) -> bool:
+        node_start = self.node_start
+        characters = self.characters
+        targets = self.targets
+        fail = self.fail
+        terminal = self.terminal
+        if terminal[0]:
+            return True
+        node = 0
+        for character in text.casefold():
+            character = ord(character)
+            while True:
+                low, high = node_start[node], node_start[node + 1]
+                i = bisect.bisect_left(characters, character, low, high)
+                if i < high and characters[i] == character:
+                    node = targets[i]
+                    break
+                if not node:
+                    break
+                node = fail[node]
+            if terminal[node]:
+                return True
+        return False
+
+    def step(self, node: int, character: str) -> int:
+        """the node after reading a (casefolded) character, see AhoCorasick.step"""
+        node_start = self.node_start
+        characters = self.characters
+        character = ord(character)
+        while True:
+            low, high = node_start[node], node_start[node + 1]
+            i = bisect.bisect_left(characters, character, low, high)
+            if i < high and characters[i] == character:
+                return self.targets[i]
+            if not node:
+                return 0
+            node = self.fail[node]
+
+    def matches(self, node: int) -> bool:
+        """whether a word ends at a node"""
+        return bool(self.terminal[node])
+
+    def __reduce__(self):
+        return FrozenAhoCorasick, (bytes(self.buffer),)
+
+    def __len__(self):
+        return self.number_of_words
+
+    def __repr__(self):
+        return f"FrozenAhoCorasick({self.number_of_words} words)"
@@ -0,0 +1,229 @@
+"""
+A Bloom filter of forbidden words, a memory-light alternative to a list.
+
+A Bloom filter answers "is this word in the set?" with no false negatives and
+a configurable rate of false positives, in about 1.44 * log2(1 / rate) bits
+per word, e.g. 10 million words at a rate of 0.001 take about 18MB.
+
+The filter is saved to a file that is memory mapped when opened, so it loads
+instantly and every process that opens it shares the same pages.
+
+Build one from a file of one word per line with:
+    python -m password_validation build-bloom words.txt words.bloom
+"""
+import hashlib
+import math
+import mmap
+import struct
+
+MAGIC = b"PVBLOOM1"
+# magic, number of bits, number of hashes, number of words
+HEADER = struct.Struct("<8sQQQ")
+
+
+def _hashes(word: str):
+    """two independent 64 bit hashes of a word, for double hashing"""
+    digest = hashlib.blake2b(word.encode("utf-8"), digest_size=16).digest()
+    # the second hash is odd so every probe of a word is distinct
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+
+def optimal_parameters(number_of_words: int, false_positive_rate: float):
+    """
+    The number of bits and hashes for a Bloom filter of a number of words with
+    a false positive rate
+
+    :param number_of_words: the number of words
+    :type: int
+
+    :param false_positive_rate: the rate of false positives, between 0 and 1
+    :type: float
+
+    :return: the number of bits and the number of hashes
+    :type: tuple(int, int)
+    """
+    assert 0 < false_positive_rate < 1, "false_positive_rate must be between 0 and 1"
+    number_of_words = max(number_of_words, 1)
+    number_of_bits = math.ceil(
+        -number_of_words * math.log(false_positive_rate) / math.log(2) ** 2
+    )
+    number_of_hashes = max(round(number_of_bits / number_of_words * math.log(2)), 1)
+    return max(number_of_bits, 8), number_of_hashes
+
+
+class BloomFilter:
+    """
+    A Bloom filter of words, backed by a buffer in the Bloom filter file format.
+
+    The buffer isn't copied, so it can be a mmap (see BloomFilter.open) or
+    shared memory.
+        e.g.
+        > bloom_filter = BloomFilter.build(["password", "qwerty"])
+        > "password" in bloom_filter
+        True
+        > "correct horse battery staple" in bloom_filter
+        False
+
+    :param buffer: the filter, a header then the bits
+    :type: bytes-like
+
+    :param path: the path the buffer was read from, if any
+    :type: str
+    """
+
+    def __init__(self, buffer, path: str = None):
+        magic, number_of_bits, number_of_hashes, number_of_words = HEADER.unpack_from(
+            buffer
+        )
+        assert magic == MAGIC, "not a Bloom filter file"
+        assert len(buffer) >= HEADER.size + (number_of_bits + 7) // 8, (
+            "the Bloom filter file is truncated"
+        )
+        self.buffer = buffer
+        self.path = path
+        self.number_of_bits = number_of_bits
+        self.number_of_hashes = number_of_hashes
+        self.number_of_words = number_of_words
+        self.bits = memoryview(buffer)[HEADER.size:HEADER.size + (number_of_bits + 7) // 8]
+
+    @classmethod
+    def build(
+        cls, words, false_positive_rate: float = 0.001, number_of_words: int = None
+    ):
+        """
+        Build a Bloom filter in memory
+
+        :param words: the words
+        :type: iterable of str
+
+        :param false_positive_rate: the rate of false positives, between 0 and 1
+        :type: float
+
+        :param number_of_words: the number of words, if words is an iterator
+                                this must be given
+        :type: int
+
+        :return: the Bloom filter
+        :type: BloomFilter
+        """
+        if number_of_words is None:
+            words = list(words)
+            number_of_words = len(words)
+        number_of_bits, number_of_hashes = optimal_parameters(
+            number_of_words, false_positive_rate
+        )
+        buffer = bytearray(HEADER.size + (number_of_bits + 7) // 8)
+        bits = memoryview(buffer)[HEADER.size:]
+
+        added = 0
+        for word in words:
+            assert isinstance(word, str), "all words must be strings"
+            first, second = _hashes(word)
+            for i in range(number_of_hashes):
+                index = (first + i * second) % number_of_bits
+                bits[index >> 3] |= 1 << (index & 7)
+            added += 1
+        bits.release()
+
+        HEADER.pack_into(buffer, 0, MAGIC, number_of_bits, number_of_hashes, added)
+        return cls(buffer)
+
+    @classmethod
+    def open(cls, path: str):
+        """
+        Memory map a Bloom filter file
+
+        :param path: the path to the file
+        :type: str
+
+        :return: the Bloom filter
+        :type: BloomFilter
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path=path)
+
+    def save(self, path: str):
+        """write the filter to a file, to be opened with BloomFilter.open"""
+        with open(path, "wb") as f:
+            f.write(self.buffer)
+
+    def __reduce__(self):
+        # a filter from a file is mapped again rather than copied
+        if self.path is not None:
+            return BloomFilter.open, (self.path,)
+        return BloomFilter, (bytes(self.buffer),)
+
+    def close(self):
+        self.bits.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    @property
+    def false_positive_rate(self) -> float:
+        """the expected rate of false positives for the words in the filter"""
+        return (
+            1 - math.exp(-self.number_of_hashes * self.number_of_words / self.number_of_bits)
+        ) ** self.number_of_hashes
+
+    def __contains__(self, word: str) -> bool:
+        first, second = _hashes(word)
+        number_of_bits = self.number_of_bits
+        bits = self.bits
+        for i in range(self.number_of_hashes):
+            index = (first + i * second) % number_of_bits
+            if not bits[index >> 3] & (1 << (index & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        return self.number_of_words
+
+    def __repr__(self):
+        if self.path is None:
+            return f"BloomFilter({self.number_of_words} words)"
+        return f"BloomFilter('{self.path}', {self.number_of_words} words)"
+
+
+def _read_words(path: str):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            word = line.rstrip("\r\n")
+            if word:
+                yield word
+
+
+def build_bloom_filter(
+    source: str, destination: str, false_positive_rate: float = 0.001
+) -> BloomFilter:
+    """
+    Build a Bloom filter file from a file of one word per line
+
+    The source is read twice, once to count the words and once to add them, so
+    it never has to fit in memory.
+
+    :param source: path to the words, one per line
+    :type: str
+
+    :param destination: path to write the Bloom filter to
+    :type: str
+
+    :param false_positive_rate: the rate of false positives, between 0 and 1
+    :type: float
+
+    :return: the Bloom filter
+    :type: BloomFilter
+    """
+    number_of_words = sum(1 for _ in _read_words(source))
+    bloom_filter = BloomFilter.build(
+        _read_words(source), false_positive_rate, number_of_words
+    )
+    bloom_filter.save(destination)
+    return bloom_filter
+
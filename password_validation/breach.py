@@ -0,0 +1,249 @@
+"""
+Breached password lookup, against a compact file of sorted SHA-1 digests.
+
+The file is the 20 byte SHA-1 digest of every breached password, sorted and
+with no separators, so a corpus of 500 million passwords is 10GB on disk. It
+is memory mapped rather than read, so opening it takes constant time and a
+lookup only touches the few pages an interpolation search lands on.
+
+Convert a text dump (e.g. the "HASH:COUNT" lines of the Pwned Passwords
+SHA-1 dump, or one plaintext password per line) with:
+    python -m password_validation build-breach dump.txt breached.sha1
+"""
+import hashlib
+import heapq
+import mmap
+import os
+import tempfile
+
+DIGEST_SIZE = 20
+# the number of bytes of a digest used as its integer key when interpolating
+KEY_SIZE = 8
+
+
+def sha1_digest(password: str) -> bytes:
+    """the SHA-1 digest of a password, as stored in a breach file"""
+    return hashlib.sha1(password.encode("utf-8")).digest()
+
+
+class BreachedPasswords:
+    """
+    A sorted array of SHA-1 digests of breached passwords.
+
+    `password in breached_passwords` hashes the password and looks it up with
+    an interpolation search, which takes about log log n probes as SHA-1
+    digests are uniformly distributed. It bisects when the digest isn't
+    between the keys at the ends of the range left, but unlike a binary
+    search it isn't bound to log n probes, digests that aren't uniformly
+    distributed can take many more.
+        e.g.
+        > breached_passwords = BreachedPasswords.open("breached.sha1")
+        > "password1" in breached_passwords
+        True
+
+    :param buffer: the sorted digests, e.g. bytes, a mmap or a memoryview
+    :type: bytes-like
+
+    :param path: the path the buffer was read from, if any
+    :type: str
+    """
+
+    def __init__(self, buffer, path: str = None):
+        assert len(buffer) % DIGEST_SIZE == 0, (
+            f"a breach file must be a whole number of {DIGEST_SIZE} byte digests"
+        )
+        self.buffer = buffer
+        self.path = path
+        self.number_of_digests = len(buffer) // DIGEST_SIZE
+
+    @classmethod
+    def open(cls, path: str):
+        """
+        Memory map a breach file
+
+        :param path: the path to the file
+        :type: str
+
+        :return: the breached passwords
+        :type: BreachedPasswords
+        """
+        with open(path, "rb") as f:
+            # an empty file can't be mapped, and has nothing to look up anyway
+            if os.fstat(f.fileno()).st_size == 0:
+                return cls(b"", path=path)
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path=path)
+
+    def __reduce__(self):
+        # a breach file is mapped again rather than copied
+        if self.path is not None:
+            return BreachedPasswords.open, (self.path,)
+        return BreachedPasswords, (bytes(self.buffer),)
+
+    def close(self):
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def digest(self, index: int) -> bytes:
+        start = index * DIGEST_SIZE
+        # bytes, as a slice of a memoryview can't be ordered
+        return bytes(self.buffer[start:start + DIGEST_SIZE])
+
+    def key(self, index: int) -> int:
+        start = index * DIGEST_SIZE
+        return int.from_bytes(self.buffer[start:start + KEY_SIZE], "big")
+
+    def contains_digest(self, digest: bytes) -> bool:
+        """
+        Whether a SHA-1 digest is in the file
+
+        :param digest: the 20 byte digest
+        :type: bytes
+
+        :return: whether the digest is in the file
+        :type: bool
+        """
+        low, high = 0, self.number_of_digests - 1
+        if high < 0:
+            return False
+        key = int.from_bytes(digest[:KEY_SIZE], "big")
+        low_key, high_key = self.key(low), self.key(high)
+
+        while low <= high:
+            # interpolate while the keys bracket the digest, otherwise bisect
+            if low_key < high_key and low_key <= key <= high_key:
+                middle = low + (key - low_key) * (high - low) // (high_key - low_key)
+            else:
+                middle = (low + high) // 2
+            found = self.digest(middle)
+            if found == digest:
+                return True
+            elif found < digest:
+                low = middle + 1
+                if low <= high:
+                    low_key = self.key(low)
+            else:
+                high = middle - 1
+                if low <= high:
+                    high_key = self.key(high)
+        return False
+
+    def __contains__(self, password: str) -> bool:
+        return self.contains_digest(sha1_digest(password))
+
+    def __len__(self):
+        return self.number_of_digests
+
+    def __repr__(self):
+        if self.path is None:
+            return f"BreachedPasswords({self.number_of_digests} digests)"
+        return f"BreachedPasswords('{self.path}', {self.number_of_digests} digests)"
+
+
+def _parse_line(line: bytes, plaintext: bool, line_number: int) -> bytes:
+    line = line.rstrip(b"\r\n")
+    if plaintext:
+        return hashlib.sha1(line).digest()
+    # "HASH" or "HASH:COUNT", a digest of any other size would misalign every
+    # digest after it in the file
+    try:
+        digest = bytes.fromhex(line.split(b":", 1)[0].decode("ascii"))
+    except ValueError:
+        digest = None
+    if digest is None or len(digest) != DIGEST_SIZE:
+        raise ValueError(
+            f"line {line_number} is not a SHA-1 hex digest (optionally followed "
+            f"by :COUNT): {line[:80]!r}"
+        )
+    return digest
+
+
+def _write_run(digests, directory):
+    digests.sort()
+    f = tempfile.TemporaryFile(dir=directory)
+    f.write(b"".join(digests))
+    f.seek(0)
+    return f
+
+
+def _read_run(f):
+    while True:
+        digest = f.read(DIGEST_SIZE)
+        if not digest:
+            return
+        yield digest
+
+
+def build_breach_file(
+    source: str,
+    destination: str,
+    plaintext: bool = False,
+    chunk_size: int = 10_000_000,
+    temporary_directory: str = None,
+) -> int:
+    """
+    Convert a text dump of breached passwords into a breach file
+
+    The dump is read line by line and sorted in chunks of chunk_size digests,
+    which are then merged, so it doesn't need to fit in memory. Duplicates are
+    removed.
+
+    :param source: path to the dump, one SHA-1 hex digest (optionally followed
+                   by ":COUNT") or plaintext password per line
+    :type: str
+
+    :param destination: path to write the breach file to
+    :type: str
+
+    :param plaintext: whether the dump is plaintext passwords
+    :type: bool
+
+    :param chunk_size: the number of digests to sort in memory at once
+    :type: int
+
+    :param temporary_directory: where to keep the sorted chunks
+    :type: str
+
+    :return: the number of digests written
+    :type: int
+    """
+    assert chunk_size > 0, "chunk_size must be greater than 0"
+
+    runs = []
+    try:
+        digests = []
+        with open(source, "rb") as f:
+            for line_number, line in enumerate(f, 1):
+                # a plaintext password can be whitespace, so only empty lines
+                # are skipped
+                if plaintext:
+                    if not line.rstrip(b"\r\n"):
+                        continue
+                elif not line.strip():
+                    continue
+                digests.append(_parse_line(line, plaintext, line_number))
+                if len(digests) >= chunk_size:
+                    runs.append(_write_run(digests, temporary_directory))
+                    digests = []
+        if digests or not runs:
+            runs.append(_write_run(digests, temporary_directory))
+
+        written = 0
+        previous = None
+        with open(destination, "wb") as f:
+            for digest in heapq.merge(*(_read_run(run) for run in runs)):
+                if digest != previous:
+                    f.write(digest)
+                    written += 1
+                    previous = digest
+        return written
+    finally:
+        for run in runs:
+            run.close()
+
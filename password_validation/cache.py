@@ -0,0 +1,208 @@
+"""
+Cache the results of a policy, for passwords that are checked again and again.
+
+A ResultCache keeps the code (see PasswordPolicy.check_code) of recently
+checked passwords, so the expensive checks (e.g. breached passwords or a
+large list of forbidden words) run once per distinct password. Each password
+is only kept as an HMAC of it under a random key of this process, with its
+code and the numbers its results are made from (its character counts, length
+and entropy), none of which holds any part of it. test_password results are
+made again from those, so they are the same as without a cache, without
+looking at the password again.
+    e.g.
+    > cache = policy.cache_results(maxsize=10000, ttl=300)
+    > policy.test_password("hello")
+    > policy.test_password("hello")  # from the cache
+    > cache.stats()["hits"]
+    1
+
+The cache is emptied when the policy changes, e.g. a requirement or the
+forbidden words.
+"""
+import hmac
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# the key of the HMAC of the passwords, a new one for every process
+_key = os.urandom(32)
+# bumped whenever any policy, requirement or list of forbidden words changes,
+# so a cache only works out its policy's fingerprint again after a change
+_generation = 0
+
+
+def policy_changed():
+    """note that a policy, one of its requirements or its words have changed"""
+    global _generation
+    _generation += 1
+
+
+def _new_key():
+    global _key
+    _key = os.urandom(32)
+
+
+if hasattr(os, "register_at_fork"):
+    # a forked process gets its own key, rather than its parent's
+    os.register_at_fork(after_in_child=_new_key)
+
+
+class ResultCache:
+    """
+    A bounded cache of the codes of passwords, least recently used first out
+
+    :param policy: the policy, see PasswordPolicy.cache_results
+    :type: PasswordPolicy
+
+    :param maxsize: the most passwords to keep
+    :type: int
+
+    :param ttl: the seconds to keep a password for, forever by default
+    :type: float
+    """
+
+    def __init__(self, policy, maxsize: int = 1024, ttl: float = None):
+        assert maxsize > 0, "maxsize must be greater than 0"
+        assert ttl is None or ttl > 0, "ttl must be greater than 0"
+        self.policy = policy
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        # the HMAC of each password to its code, its actual values for the
+        # cheap requirements (see PasswordPolicy._code_and_actuals) and when
+        # it expires
+        self.codes = OrderedDict()
+        self.key = _key
+        self.generation = _generation
+        self.fingerprint = policy._fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def _digest(self, password: str) -> bytes:
+        # a lone surrogate can't be encoded as UTF-8, but is still a password
+        return hmac.digest(
+            self.key, password.encode("utf-8", "surrogatepass"), "sha256"
+        )
+
+    def code(self, password: str) -> int:
+        """
+        The code of a password, from the cache if it is there, see
+        PasswordPolicy.check_code
+
+        :param password: the password
+        :type: str
+
+        :return: the code
+        :type: int
+        """
+        return self._code_and_actuals(password)[0]
+
+    def _code_and_actuals(self, password: str) -> tuple:
+        """the code and actual values of a password, from the cache if there"""
+        with self.lock:
+            if self.generation != _generation or self.key is not _key:
+                self._invalidate_if_changed()
+            digest = self._digest(password)
+            cached = self.codes.get(digest)
+            if cached is not None:
+                code, actuals, expires = cached
+                if expires is None or expires > time.monotonic():
+                    self.codes.move_to_end(digest)
+                    self.hits += 1
+                    return code, actuals
+                del self.codes[digest]
+            self.misses += 1
+
+        # checked outside the lock, so other passwords aren't held up
+        code, actuals = self.policy._code_and_actuals(password)
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+        with self.lock:
+            self.codes[digest] = (code, actuals, expires)
+            self.codes.move_to_end(digest)
+            while len(self.codes) > self.maxsize:
+                self.codes.popitem(last=False)
+                self.evictions += 1
+        return code, actuals
+
+    def _invalidate_if_changed(self):
+        # something changed, but maybe not this policy
+        self.generation = _generation
+        fingerprint = self.policy._fingerprint()
+        if fingerprint != self.fingerprint or self.key is not _key:
+            self.codes.clear()
+            self.fingerprint = fingerprint
+            self.key = _key
+            self.invalidations += 1
+
+    def test_password(
+        self, password: str, failures_only: bool = True, fail_fast: bool = False
+    ) -> list:
+        """
+        The same as PasswordPolicy.test_password, made from the cached code
+        and actual values
+
+        :param password: the password
+        :type: str
+
+        :param failures_only: only return the unfulfilled requirements
+        :type: bool
+
+        :param fail_fast: only return the first unfulfilled requirement
+        :type: bool
+
+        :return: the requirements
+        :type: list
+        """
+        policy = self.policy
+        if fail_fast:
+            # a password of the wrong length fails before it is looked at
+            if not policy._length_fulfilled(len(password)):
+                return policy._test_password(password, failures_only, fail_fast)
+            code, actuals = self._code_and_actuals(password)
+            # a valid password has nothing to make again
+            if code == 0:
+                return []
+            return [policy._first_failure_from_code(code, password, actuals)]
+        code, actuals = self._code_and_actuals(password)
+        if failures_only:
+            if code == 0:
+                return []
+            return policy._failures_from_code(code, password, actuals)
+        return policy._results_from_code(code, password, actuals)
+
+    def validate(self, password: str) -> bool:
+        """the same as PasswordPolicy.validate, from the cached code"""
+        policy = self.policy
+        # a password of the wrong length fails before it is looked at
+        if not policy._length_fulfilled(len(password)):
+            return False
+        return self.code(password) == 0
+
+    def clear(self):
+        with self.lock:
+            self.codes.clear()
+
+    def stats(self) -> dict:
+        """
+        :return: the hits, misses, evictions and invalidations so far, and the
+                 number of passwords cached
+        :type: dict
+        """
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self.codes),
+                "maxsize": self.maxsize,
+            }
+
+    def __len__(self):
+        return len(self.codes)
+
+    def __repr__(self):
+        return f"ResultCache({len(self.codes)}/{self.maxsize} passwords)"
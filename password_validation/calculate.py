@@ -1,19 +1,174 @@
+import bisect
+import functools
 import math
 
+from password_validation.character_pool import CharacterAnalysis
 from password_validation.character_pool import CharacterPool
+from password_validation.character_pool import DEFAULT_CHARACTER_POOL
 from password_validation.character_pool import lenient_pool_of_unique_characters
 from password_validation.character_pool import normal_pool_of_unique_characters
 from password_validation.character_pool import strict_pool_of_unique_characters
 from password_validation.exceptions import UnacceptableCharacters, ClassificationError
+from password_validation.markov import MarkovModel
+from password_validation.markov import default_model
+from password_validation.patterns import default_estimator
 from typing import Union
 
 
-def calculate_number_of_possible_passwords(
-        password: str, method: str = "normal", character_pool: CharacterPool = None
-):
+def log2_power(base: int, exponent: int) -> float:
+    """log base 2 of base ^ exponent, worked out as exponent * log2(base)"""
+    # an empty password has exactly 1 possible password, whatever the pool
+    if exponent == 0:
+        return 0.0
+    return exponent * math.log2(base)
+
+
+def calculate_minimum_length(
+        pool_of_characters: int, min_entropy: Union[int, float]
+) -> Union[int, None]:
     """
-    Calculate the number of possible passwords according to the formula:
-    size of pool of characters (int) ^ number of characters in password (int)
+    Calculate the shortest password length from a pool of characters that has
+    at least the minimum entropy
+
+    :param pool_of_characters: size of the pool of characters
+    :type: int
+
+    :param min_entropy: the minimum entropy
+    :type: int or float
+
+    :return: the minimum length, or None if no length is enough
+    :type: int or None
+    """
+    # a pool of 0 or 1 characters never gains entropy, unless none is needed
+    if pool_of_characters <= 1:
+        return 0 if min_entropy <= 0 else None
+
+    length = max(math.ceil(min_entropy / math.log2(pool_of_characters)), 0)
+    # nudge for floating point error so it agrees with log2_power exactly
+    while length > 0 and log2_power(pool_of_characters, length - 1) >= min_entropy:
+        length -= 1
+    while log2_power(pool_of_characters, length) < min_entropy:
+        length += 1
+    return length
+
+
+@functools.lru_cache(maxsize=64)
+def calculate_entropy_table(character_pool: CharacterPool, max_length: int) -> tuple:
+    """
+    Calculate the "normal" entropy of every class mask and length of password
+
+    The table is cached for each pool and max_length, as pools are immutable.
+
+    :param character_pool: pool of characters to use
+    :type: CharacterPool
+
+    :param max_length: the longest password in the table
+    :type: int
+
+    :return: table of entropy, indexed by [class mask][length]
+    :type: tuple(tuple(float))
+    """
+    return tuple(
+        tuple(
+            log2_power(size, length) if size else 0.0
+            for length in range(max_length + 1)
+        )
+        for size in character_pool.mask_sizes
+    )
+
+
+@functools.lru_cache(maxsize=64)
+def calculate_minimum_lengths(
+        character_pool: CharacterPool, min_entropy: Union[int, float]
+) -> tuple:
+    """
+    Calculate the minimum length of password for every class mask that has at
+    least the minimum entropy, see calculate_minimum_length
+
+    The lengths are cached for each pool and min_entropy, as pools are
+    immutable.
+
+    :param character_pool: pool of characters to use
+    :type: CharacterPool
+
+    :param min_entropy: the minimum entropy
+    :type: int or float
+
+    :return: the minimum length (or None) indexed by class mask
+    :type: tuple
+    """
+    return tuple(
+        calculate_minimum_length(size, min_entropy)
+        for size in character_pool.mask_sizes
+    )
+
+
+class Power:
+    """
+    A lazily evaluated power, base ^ exponent.
+
+    The number of possible passwords grows very quickly with the length of the
+    password, e.g. a 128 character password from a pool of 95 characters has an
+    840 bit number of possible passwords. This holds the base and exponent and
+    only builds the exact integer if it is asked for.
+        e.g.
+        > power = Power(95, 128)
+        > power.log2()
+        840.9...
+        > int(power)
+        14...
+
+    :param base: the base, the size of the pool of characters
+    :type: int
+
+    :param exponent: the exponent, the length of the password
+    :type: int
+    """
+
+    def __init__(self, base: int, exponent: int):
+        assert isinstance(base, int), "base must be an int"
+        assert isinstance(exponent, int), "exponent must be an int"
+        assert 0 <= exponent, "exponent must be greater than or equal to 0"
+        self.base = base
+        self.exponent = exponent
+        self._value = None
+
+    def log2(self) -> float:
+        """log base 2 of the power, without building the exact integer"""
+        return log2_power(self.base, self.exponent)
+
+    def __int__(self):
+        if self._value is None:
+            self._value = self.base ** self.exponent
+        return self._value
+
+    __index__ = __int__
+
+    def __float__(self):
+        return float(int(self))
+
+    def __eq__(self, other):
+        if isinstance(other, Power):
+            return int(self) == int(other)
+        if isinstance(other, int):
+            return int(self) == other
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(int(self))
+
+    def __repr__(self):
+        return f"Power({self.base}, {self.exponent})"
+
+
+def calculate_pool_of_characters(
+        password: str,
+        method: str = "normal",
+        character_pool: CharacterPool = None,
+        analysis: CharacterAnalysis = None,
+) -> int:
+    """
+    Calculate the size of the pool of characters a password was picked from
 
     :param password: the password
     :type: str
@@ -24,69 +179,135 @@ def calculate_number_of_possible_passwords(
     :param character_pool: pool of characters to use
     :type: CharacterPool
 
-    :return: Number Of Possible Passwords
+    :param analysis: the password already analysed against the pool, if any
+    :type: CharacterAnalysis
+
+    :return: size of the pool of characters
     :type: int
     """
     # set default char pool if user doesn't pass one
     if character_pool is None:
-        pool = CharacterPool()
+        pool = DEFAULT_CHARACTER_POOL
     # else set user char pool, should be init'd or have viable class methods
     else:
         pool = character_pool
 
     # user can pick between strict, normal and lenient
     if method == "strict":
-        pool_of_characters = strict_pool_of_unique_characters(password)
+        return strict_pool_of_unique_characters(password)
     elif method == "normal":
-        pool_of_characters = normal_pool_of_unique_characters(
-            password, character_pool=pool
-        )
+        if analysis is None:
+            return normal_pool_of_unique_characters(password, character_pool=pool)
+        return pool.mask_sizes[analysis.mask]
     elif method == "lenient":
-        pool_of_characters = lenient_pool_of_unique_characters(character_pool=pool)
+        return lenient_pool_of_unique_characters(character_pool=pool)
     else:
         raise ValueError('method must be either "strict", "normal" or "lenient"')
 
+
+def calculate_number_of_possible_passwords(
+        password: str,
+        method: str = "normal",
+        character_pool: CharacterPool = None,
+        analysis: CharacterAnalysis = None,
+        lazy: bool = False,
+):
+    """
+    Calculate the number of possible passwords according to the formula:
+    size of pool of characters (int) ^ number of characters in password (int)
+
+    :param password: the password
+    :type: str
+
+    :param method: method to calculate the pool of characters
+    :type: str ("strict", "normal" or "lenient")
+
+    :param character_pool: pool of characters to use
+    :type: CharacterPool
+
+    :param analysis: the password already analysed against the pool, if any
+    :type: CharacterAnalysis
+
+    :param lazy: return a Power, which only builds the integer when asked to
+    :type: bool
+
+    :return: Number Of Possible Passwords
+    :type: int (or Power if lazy)
+    """
+    pool_of_characters = calculate_pool_of_characters(
+        password, method, character_pool, analysis
+    )
+
     # return pool of chars ^ len password
-    return pool_of_characters ** len(password)
+    power = Power(pool_of_characters, len(password))
+    return power if lazy else int(power)
 
 
 def calculate_entropy(
-        password: str, method: str = "normal", character_pool: CharacterPool = None
+        password: str,
+        method: str = "normal",
+        character_pool: CharacterPool = None,
+        analysis: CharacterAnalysis = None,
+        markov_model: MarkovModel = None,
 ):
     """
     Calculate the entropy of a password according to the formula:
     log base 2 (number of possible passwords)
 
+    This is worked out in log space, as:
+    number of characters in password * log base 2 (size of pool of characters)
+    so the number of possible passwords is never built.
+
     :param password: the password
     :type: str
 
-    :param method: method to calculate the pool of characters
-    :type: str ("strict", "normal" or "lenient")
+    :param method: method to calculate the pool of characters, or "pattern" to
+                   estimate the entropy from the patterns in the password
+                   (see patterns.PatternEstimator), or "markov" to estimate
+                   it from a Markov model of characters (see markov)
+    :type: str ("strict", "normal", "lenient", "pattern" or "markov")
 
     :param character_pool: pool of characters to use
     :type: CharacterPool
 
+    :param analysis: the password already analysed against the pool, if any
+    :type: CharacterAnalysis
+
+    :param markov_model: the model for the "markov" method, the small default
+                         model (see markov.default_model) if not given
+    :type: MarkovModel
+
     :return: Entropy of password
     :type: float
     """
     # set default char pool if user doesn't pass one
     if character_pool is None:
-        pool = CharacterPool()
+        pool = DEFAULT_CHARACTER_POOL
     # else set user char pool, should be init'd or have viable class methods
     else:
         pool = character_pool
 
+    # classify the password once, unless the caller already has
+    if analysis is None:
+        analysis = pool.analyse(password)
+
     # all chars must be in password char pool
-    if not all(i in pool.all for i in password):
+    if analysis.unknown:
         raise UnacceptableCharacters(
             f"You can only use characters from the character pool, "
             f"which are: {pool.all}"
         )
+    elif method == "pattern":
+        return default_estimator().entropy(password, pool)
+    elif method == "markov":
+        if markov_model is None:
+            markov_model = default_model()
+        return markov_model.entropy(password, pool)
     else:
-        number_of_possible_passwords = calculate_number_of_possible_passwords(
-            password, method, pool
+        pool_of_characters = calculate_pool_of_characters(
+            password, method, pool, analysis
         )
-        return math.log(number_of_possible_passwords, 2)
+        return log2_power(pool_of_characters, len(password))
 
 
 class EntropyRange:
@@ -190,19 +411,38 @@ class Classifier:
             self.ranges = self.default_ranges
         else:
             self.ranges = ranges
+        self.validate_ranges()
 
-    # todo: validate the ranges
-    # def validate_ranges(self):
-    #     ranges = sorted([i for j in self.ranges for i in j])
-    #     start, end = ranges.pop(0), ranges.pop(-1)
-    #     assert start == 0, "start must be 0"
-    #     assert end > start, "end must be greater than start"
-    #
-    #     for c, (i, j) in enumerate([r.to_tuple() for r in self.ranges]):
-    #         if c == 0:
-    #             assert i == 0, "start must be 0"
-    #         else:
-    #             pass
+        # the ranges sorted, as boundaries and the classification between them
+        # a value between boundaries[i] and boundaries[i + 1] is classifications[i]
+        ordered = sorted(self.ranges.items(), key=lambda item: item[1].beginning)
+        self.classifications = [classification for classification, _ in ordered]
+        self.boundaries = [ordered[0][1].beginning] + [r.end for _, r in ordered]
+
+    def validate_ranges(self):
+        """
+        Check the ranges start at 0 and follow on from each other, without gaps
+        or overlaps, so every value above 0 fits into exactly one of them
+        """
+        assert isinstance(self.ranges, dict), "ranges must be a dict"
+        for classification, entropy_range in self.ranges.items():
+            assert isinstance(
+                entropy_range, EntropyRange
+            ), f"the range for {classification!r} must be an EntropyRange"
+
+        ordered = sorted(self.ranges.items(), key=lambda item: item[1].beginning)
+        assert ordered[0][1].beginning == 0, "the first range must start at 0"
+        for (classification, entropy_range), (next_classification, next_range) in zip(
+            ordered, ordered[1:]
+        ):
+            assert entropy_range.end <= next_range.beginning, (
+                f"the ranges for {classification!r} and {next_classification!r} "
+                f"overlap"
+            )
+            assert entropy_range.end == next_range.beginning, (
+                f"there is a gap between the ranges for {classification!r} and "
+                f"{next_classification!r}"
+            )
 
     def classify(self, value: Union[int, float]) -> str:
         """
@@ -214,11 +454,34 @@ class Classifier:
         :return: the classification
         :type: str
         """
-        results = [k for k, v in self.ranges.items() if value in v]
-        if len(results) != 1:
+        # ranges don't include their beginning, but do include their end
+        index = bisect.bisect_left(self.boundaries, value) - 1
+        if not 0 <= index < len(self.classifications):
             raise ClassificationError(
-                f"value fits into {len(results)} provided entropy ranges. "
-                f"It should be 1."
+                "value fits into 0 provided entropy ranges. It should be 1."
             )
-        else:
-            return results.pop()
+        return self.classifications[index]
+
+    def classify_many(self, values) -> list:
+        """
+        classify many values
+
+        :param values: numbers
+        :type: iterable of int or float, e.g. a list or array
+
+        :return: the classifications, in the same order as the values
+        :type: list(str)
+        """
+        boundaries = self.boundaries
+        classifications = self.classifications
+        number_of_classifications = len(classifications)
+        rv = []
+        for value in values:
+            index = bisect.bisect_left(boundaries, value) - 1
+            if not 0 <= index < number_of_classifications:
+                raise ClassificationError(
+                    f"value {value} fits into 0 provided entropy ranges. "
+                    f"It should be 1."
+                )
+            rv.append(classifications[index])
+        return rv
@@ -1,3 +1,209 @@
+import bisect
+import functools
+import sys
+import unicodedata
+import weakref
+from array import array
+from collections import Counter
+
+# the classes of character in a pool, in the order they are reported
+CHARACTER_CLASSES = (
+    "lowercase",
+    "uppercase",
+    "numbers",
+    "symbols",
+    "whitespace",
+    "other",
+)
+
+# the default (ascii) characters of each class
+DEFAULT_LOWERCASE = "abcdefghijklmnopqrstuvwxyz"
+DEFAULT_UPPERCASE = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+DEFAULT_NUMBERS = "0123456789"
+DEFAULT_SYMBOLS = r"""!"#$%&'()*+,-./:;<=>?@[\]^_`{|}~"""
+DEFAULT_WHITESPACE = " "
+DEFAULT_OTHER = ""
+
+# one bit per character class, these are combined into a class mask
+LOWERCASE = 1 << 0
+UPPERCASE = 1 << 1
+NUMBERS = 1 << 2
+SYMBOLS = 1 << 3
+WHITESPACE = 1 << 4
+OTHER = 1 << 5
+NUMBER_OF_MASKS = 1 << len(CHARACTER_CLASSES)
+
+# a class of a pool with more characters than this is kept as ranges, and one
+# with this many or fewer as a frozenset, so the same characters are always
+# kept the same way, see _make_class
+MAX_FROZENSET_CLASS_SIZE = 256
+
+# the class indices set in every possible class mask
+MASK_INDICES = tuple(
+    tuple(i for i in range(len(CHARACTER_CLASSES)) if mask & (1 << i))
+    for mask in range(NUMBER_OF_MASKS)
+)
+
+
+@functools.lru_cache(maxsize=None)
+def _unicode_category_ranges() -> dict:
+    """the codepoint ranges of every unicode category, found in one scan"""
+    ranges = {}
+    category = None
+    start = 0
+    for codepoint in range(sys.maxunicode + 1):
+        this_category = unicodedata.category(chr(codepoint))
+        if this_category != category:
+            if category is not None:
+                ranges.setdefault(category, []).append((start, codepoint - 1))
+            category = this_category
+            start = codepoint
+    ranges.setdefault(category, []).append((start, sys.maxunicode))
+    return ranges
+
+
+class CharacterRanges:
+    """
+    A set of characters stored as sorted ranges of codepoints.
+
+    For large alphabets, e.g. CJK ideographs, a set of every character would
+    hold tens of thousands of strings. This holds a start and end codepoint per
+    range, and finds a character with a binary search. It behaves like a
+    frozenset of characters for a CharacterPool, but is only equal to other
+    ranges (it couldn't hash the same as an equal frozenset).
+        e.g.
+        > ideographs = CharacterRanges([(0x4E00, 0x9FFF)])
+        > len(ideographs)
+        20992
+        > "字" in ideographs
+        True
+
+    :param ranges: the (start, end) codepoints of each range, inclusive
+    :type: iterable of tuple(int, int)
+    """
+
+    def __init__(self, ranges=()):
+        merged = []
+        for start, end in sorted(ranges):
+            assert 0 <= start <= end <= sys.maxunicode, (
+                f"ranges must be of codepoints between 0 and {sys.maxunicode} "
+                f"with the start before the end"
+            )
+            # merge ranges that overlap or touch
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        self.starts = array("I", (start for start, _ in merged))
+        self.ends = array("I", (end for _, end in merged))
+        self.size = sum(end - start + 1 for start, end in merged)
+        self._hash = hash(self.ranges)
+
+    @classmethod
+    def from_characters(cls, characters):
+        """
+        Make ranges from characters
+
+        :param characters: the characters
+        :type: iterable of str
+        """
+        return cls((ord(character), ord(character)) for character in characters)
+
+    @classmethod
+    def from_categories(cls, *categories: str):
+        """
+        Make ranges of every character in some unicode categories
+
+        A single letter is every category starting with it, e.g. "L" is "Lu",
+        "Ll", "Lt", "Lm" and "Lo".
+            e.g.
+            > CharacterRanges.from_categories("Lu", "Lt")
+
+        :param categories: the unicode categories
+        :type: str
+        """
+        ranges = []
+        for category, category_ranges in _unicode_category_ranges().items():
+            if any(category.startswith(wanted) for wanted in categories):
+                ranges.extend(category_ranges)
+        return cls(ranges)
+
+    @property
+    def ranges(self) -> tuple:
+        return tuple(zip(self.starts, self.ends))
+
+    def __contains__(self, character) -> bool:
+        if not isinstance(character, str) or len(character) != 1:
+            return False
+        codepoint = ord(character)
+        index = bisect.bisect_right(self.starts, codepoint) - 1
+        return index >= 0 and codepoint <= self.ends[index]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for start, end in zip(self.starts, self.ends):
+            for codepoint in range(start, end + 1):
+                yield chr(codepoint)
+
+    def __or__(self, other):
+        if isinstance(other, CharacterRanges):
+            return CharacterRanges(self.ranges + other.ranges)
+        if isinstance(other, (set, frozenset)):
+            return self | CharacterRanges.from_characters(other)
+        return NotImplemented
+
+    __ror__ = __or__
+
+    def __eq__(self, other):
+        if isinstance(other, CharacterRanges):
+            return self.ranges == other.ranges
+        return NotImplemented
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return type(self), (self.ranges,)
+
+    def __repr__(self):
+        return f"CharacterRanges({list(self.ranges)!r})"
+
+
+class CharacterAnalysis:
+    """
+    The result of classifying every character of a word against a pool.
+
+    Holds the number of characters in each class, the mask of classes present,
+    the length of the word and whether any character is outside of the pool.
+    """
+
+    __slots__ = CHARACTER_CLASSES + ("mask", "unknown", "length")
+
+    def __init__(self, counts, mask: int, unknown: bool, length: int):
+        (
+            self.lowercase,
+            self.uppercase,
+            self.numbers,
+            self.symbols,
+            self.whitespace,
+            self.other,
+        ) = counts
+        self.mask = mask
+        self.unknown = unknown
+        self.length = length
+
+    def __repr__(self):
+        return (
+            f"CharacterAnalysis(lowercase={self.lowercase}, "
+            f"uppercase={self.uppercase}, numbers={self.numbers}, "
+            f"symbols={self.symbols}, whitespace={self.whitespace}, "
+            f"other={self.other}, mask={self.mask}, unknown={self.unknown}, "
+            f"length={self.length})"
+        )
+
+
 class CharacterPool:
     """
     The pool of characters to make a password from.
@@ -17,30 +223,226 @@ class CharacterPool:
     This class can be passed different values if you wanted to use for, say,
     another non-english alphabet.
 
+    A class can also be CharacterRanges, for alphabets too large for a set of
+    characters, see CharacterPool.from_unicode_categories.
+
+    Pools are immutable and interned, constructing a pool with the same
+    characters as an existing pool returns that pool. So the sets of characters
+    and the lookup tables derived from them are only ever built once, and pools
+    can be hashed, e.g. to cache work done per pool.
+
     :param lowercase: the lowercase characters
     :type: str
     :default: abcdefghijklmnopqrstuvwxyz
 
 
     """
+    # pools by their characters, see __new__
+    _interned = weakref.WeakValueDictionary()
+    # set once a pool has been built, after which it can't be changed
+    _frozen = False
+
+    def __new__(
+        cls,
+        lowercase: str = DEFAULT_LOWERCASE,
+        uppercase: str = DEFAULT_UPPERCASE,
+        numbers: str = DEFAULT_NUMBERS,
+        symbols: str = DEFAULT_SYMBOLS,
+        whitespace: str = DEFAULT_WHITESPACE,
+        other: str = DEFAULT_OTHER,
+    ):
+        # return the existing pool of these characters, __init__ then leaves it
+        key = cls._make_key(lowercase, uppercase, numbers, symbols, whitespace, other)
+        pool = cls._interned.get(key)
+        if pool is None:
+            pool = super().__new__(cls)
+        return pool
+
     def __init__(
         self,
-        lowercase: str = "abcdefghijklmnopqrstuvwxyz",
-        uppercase: str = "ABCDEFGHIJKLMNOPQRSTUVWXYZ",
-        numbers: str = "0123456789",
-        symbols: str = r"""!"#$%&'()*+,-./:;<=>?@[\]^_`{|}~""",
-        whitespace: str = " ",
-        other: str = "",
+        lowercase: str = DEFAULT_LOWERCASE,
+        uppercase: str = DEFAULT_UPPERCASE,
+        numbers: str = DEFAULT_NUMBERS,
+        symbols: str = DEFAULT_SYMBOLS,
+        whitespace: str = DEFAULT_WHITESPACE,
+        other: str = DEFAULT_OTHER,
+    ):
+        # an interned pool is already built
+        if self._frozen:
+            return
+
+        set_attribute = super().__setattr__
+        set_attribute("lowercase", _make_class(lowercase))
+        set_attribute("uppercase", _make_class(uppercase))
+        set_attribute("numbers", _make_class(numbers))
+        set_attribute("symbols", _make_class(symbols))
+        set_attribute("whitespace", _make_class(whitespace))
+        set_attribute("other", _make_class(other))
+        set_attribute("letters", self.lowercase | self.uppercase)
+        set_attribute("alphanumeric", self.letters | self.numbers)
+        set_attribute(
+            "all", self.alphanumeric | self.symbols | self.whitespace | self.other
+        )
+
+        # the classes in the same order as CHARACTER_CLASSES
+        set_attribute(
+            "classes",
+            (
+                self.lowercase,
+                self.uppercase,
+                self.numbers,
+                self.symbols,
+                self.whitespace,
+                self.other,
+            ),
+        )
+        # the number of characters in each class
+        set_attribute("sizes", tuple(len(characters) for characters in self.classes))
+        # lookup of character to the mask of the classes it belongs to
+        # a character can belong to more than one class in a custom pool
+        lookup = {}
+        for index, characters in enumerate(self.classes):
+            if isinstance(characters, CharacterRanges):
+                continue
+            for character in characters:
+                lookup[character] = lookup.get(character, 0) | (1 << index)
+        set_attribute("lookup", lookup)
+        # the classes that are ranges, which are too big for the lookup
+        set_attribute(
+            "range_classes",
+            tuple(
+                (1 << index, characters)
+                for index, characters in enumerate(self.classes)
+                if isinstance(characters, CharacterRanges)
+            ),
+        )
+        # size of the pool made from the classes in each mask, used for the
+        # "normal" pool of unique characters
+        set_attribute(
+            "mask_sizes",
+            tuple(
+                sum(self.sizes[i] for i in MASK_INDICES[mask])
+                for mask in range(NUMBER_OF_MASKS)
+            ),
+        )
+
+        key = self._make_key(*self.classes)
+        set_attribute("_key", key)
+        set_attribute("_hash", hash(key))
+        set_attribute("_frozen", True)
+        type(self)._interned[key] = self
+
+    @classmethod
+    def _make_key(cls, *classes):
+        return (cls,) + tuple(_make_class(characters) for characters in classes)
+
+    @classmethod
+    def from_unicode_categories(
+        cls,
+        lowercase=("Ll",),
+        uppercase=("Lu", "Lt"),
+        numbers=("Nd",),
+        symbols=("P", "S"),
+        whitespace=("Zs",),
+        other=(),
     ):
-        self.lowercase = set(lowercase)
-        self.uppercase = set(uppercase)
-        self.numbers = set(numbers)
-        self.symbols = set(symbols)
-        self.whitespace = set(whitespace)
-        self.other = set(other)
-        self.letters = self.lowercase | self.uppercase
-        self.alphanumeric = self.letters | self.numbers
-        self.all = self.alphanumeric | self.symbols | self.whitespace | self.other
+        """
+        Make a pool where each class is every character in some unicode
+        categories, e.g. to allow letters from every alphabet, see
+        CharacterRanges.from_categories
+
+        The defaults are the unicode equivalents of the default (ascii) pool,
+        "other" could be e.g. ("Lo",) for CJK ideographs and other letters
+        without case.
+
+        :return: the pool
+        :type: CharacterPool
+        """
+        return cls(
+            *(
+                CharacterRanges.from_categories(*categories)
+                for categories in (
+                    lowercase,
+                    uppercase,
+                    numbers,
+                    symbols,
+                    whitespace,
+                    other,
+                )
+            )
+        )
+
+    def character_mask(self, character: str):
+        """
+        The mask of the classes a character belongs to
+
+        :param character: the character
+        :type: str
+
+        :return: the mask, or None if the character isn't in the pool
+        :type: int or None
+        """
+        mask = self.lookup.get(character)
+        if not self.range_classes:
+            return mask
+        mask = mask or 0
+        for bit, characters in self.range_classes:
+            if character in characters:
+                mask |= bit
+        return mask or None
+
+    def __setattr__(self, name, value):
+        raise AttributeError("a CharacterPool can't be changed, make a new one")
+
+    def __delattr__(self, name):
+        raise AttributeError("a CharacterPool can't be changed, make a new one")
+
+    def __eq__(self, other):
+        if self is other:
+            return True
+        if not isinstance(other, CharacterPool):
+            return NotImplemented
+        return self._key == other._key
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # rebuild (or find the interned pool) from the characters when unpickled
+        return type(self), tuple(_class_argument(c) for c in self.classes)
+
+    def __repr__(self):
+        arguments = ", ".join(
+            f"{name}={_class_argument(characters)!r}"
+            for name, characters in zip(CHARACTER_CLASSES, self.classes)
+        )
+        return f"CharacterPool({arguments})"
+
+    def analyse(self, word: str) -> CharacterAnalysis:
+        """
+        Classify every character of a word in a single pass.
+
+        :param word: the word to classify
+        :type: str
+
+        :return: the per class counts, class mask and unknown character flag
+        :type: CharacterAnalysis
+        """
+        counts = [0, 0, 0, 0, 0, 0]
+        mask = 0
+        unknown = False
+        # ranges have to be searched, otherwise a dict lookup is enough
+        get_mask = self.character_mask if self.range_classes else self.lookup.get
+        # count each distinct character once, then add its count to its classes
+        for character, number in Counter(word).items():
+            character_mask = get_mask(character)
+            if character_mask is None:
+                unknown = True
+                continue
+            mask |= character_mask
+            for index in MASK_INDICES[character_mask]:
+                counts[index] += number
+        return CharacterAnalysis(counts, mask, unknown, len(word))
 
     def to_dict(self) -> dict:
         rv = {
@@ -54,48 +456,51 @@ class CharacterPool:
         return rv
 
 
+def _make_class(characters):
+    """
+    a class of a pool, as ranges if it is large or a frozenset if it is small,
+    whichever it was given as, so equal pools have equal classes
+    """
+    if isinstance(characters, CharacterRanges):
+        if len(characters) > MAX_FROZENSET_CLASS_SIZE:
+            return characters
+        return frozenset(characters)
+    characters = frozenset(characters)
+    if len(characters) > MAX_FROZENSET_CLASS_SIZE:
+        return CharacterRanges.from_characters(characters)
+    return characters
+
+
+def _class_argument(characters):
+    """the argument to make a class of a pool again"""
+    if isinstance(characters, CharacterRanges):
+        return characters
+    return "".join(sorted(characters))
+
+
 def strict_pool_of_unique_characters(word):
     return len(set(word))
 
 
+# the default pool, shared by everything that isn't given a pool
+DEFAULT_CHARACTER_POOL = CharacterPool()
+
+
 def normal_pool_of_unique_characters(word, character_pool=None):
     # set pool if not passed
     if character_pool is None:
-        pool = CharacterPool()
+        pool = DEFAULT_CHARACTER_POOL
     else:
         pool = character_pool
 
-    # set unique characters to 01
-    unique_characters = 0
-    # turn word into set of characters
-    characters = set(word)
-
-    # get intersections for lowercase
-    if characters & pool.lowercase:
-        unique_characters += len(pool.lowercase)
-    # get intersections for uppercase
-    if characters & pool.uppercase:
-        unique_characters += len(pool.uppercase)
-    # get intersections for numbers
-    if characters & pool.numbers:
-        unique_characters += len(pool.numbers)
-    # get intersections for symbols
-    if characters & pool.symbols:
-        unique_characters += len(pool.symbols)
-    # get intersections for whitespace
-    if characters & pool.whitespace:
-        unique_characters += len(pool.whitespace)
-    # get intersections for other
-    if characters & pool.other:
-        unique_characters += len(pool.other)
-
-    return unique_characters
+    # sum the sizes of the classes that appear in the word
+    return pool.mask_sizes[pool.analyse(word).mask]
 
 
 def lenient_pool_of_unique_characters(character_pool=None):
     # set pool if not passed
     if character_pool is None:
-        pool = CharacterPool()
+        pool = DEFAULT_CHARACTER_POOL
     else:
         pool = character_pool
 
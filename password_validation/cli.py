@@ -0,0 +1,326 @@
+"""
+Audit passwords from the command line.
+
+Passwords are read one per line, from a file or stdin, and a result for each
+is streamed to stdout as JSON lines or CSV, so a dump of any size can be
+audited without loading it into memory.
+    e.g.
+    python -m password_validation dump.txt --policy policy.toml --failures-only
+
+The policy file is JSON or TOML (by its extension) and mirrors
+PasswordPolicy.to_dict(), e.g.
+    min_length = 12
+    entropy = 32
+    forbidden_words = ["password", "qwerty"]
+
+Passwords aren't written out unless asked for (--include-password), each
+result has the line number of its password instead.
+
+It also builds the files a policy can use, from a file of one per line:
+    python -m password_validation build-bloom words.txt words.bloom
+    python -m password_validation build-breach dump.txt breached.sha1
+    python -m password_validation build-markov passwords.txt passwords.markov
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import time
+
+from password_validation.bloom import build_bloom_filter
+from password_validation.breach import build_breach_file
+from password_validation.markov import build_markov_model
+from password_validation.policy import PasswordPolicy
+from password_validation.policy import REQUIREMENT_CODES
+from password_validation.policy import REQUIREMENT_NAMES
+
+CSV_FIELDS = ("line", "valid", "code", "failures", "error")
+
+
+def load_policy(path: str) -> PasswordPolicy:
+    """
+    Load a policy from a JSON or TOML file, see PasswordPolicy.from_dict
+
+    :param path: path to the file, ending .json or .toml
+    :type: str
+
+    :return: the policy
+    :type: PasswordPolicy
+    """
+    if path.endswith(".toml"):
+        try:
+            import tomllib
+        except ImportError:  # python < 3.11
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise ImportError(
+                    "reading a TOML policy needs python 3.11+ or the tomli package"
+                )
+        with open(path, "rb") as f:
+            policy = tomllib.load(f)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            policy = json.load(f)
+    return PasswordPolicy.from_dict(policy)
+
+
+def failure_names(code: int) -> list:
+    """the names of the requirements set in a code, see RequirementCode"""
+    return [name for bit, name in zip(REQUIREMENT_CODES, REQUIREMENT_NAMES) if code & bit]
+
+
+def audit_lines(policy: PasswordPolicy, lines):
+    """
+    Check each password from lines of text
+
+    :param policy: the policy to check against
+    :type: PasswordPolicy
+
+    :param lines: lines of text, one password per line
+    :type: iterable of str
+
+    :return: line number, password, code (None on error) and error (or None)
+    :type: generator of tuple
+    """
+    check_code = policy.check_code
+    for number, line in enumerate(lines, 1):
+        password = line[:-1] if line.endswith("\n") else line
+        try:
+            yield number, password, check_code(password), None
+        except AssertionError:
+            # the password has characters that aren't in the policy's pool
+            yield number, password, None, "unacceptable characters"
+
+
+class Summary:
+    """Counts of the results of an audit"""
+
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        self.invalid = 0
+        self.errors = 0
+        self.failures = dict.fromkeys(REQUIREMENT_NAMES, 0)
+        self.started = time.perf_counter()
+
+    def add(self, code, error):
+        self.total += 1
+        if error is not None:
+            self.errors += 1
+        elif code:
+            self.invalid += 1
+            for bit, name in zip(REQUIREMENT_CODES, REQUIREMENT_NAMES):
+                if code & bit:
+                    self.failures[name] += 1
+        else:
+            self.valid += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "total": self.total,
+            "valid": self.valid,
+            "invalid": self.invalid,
+            "errors": self.errors,
+            "failures": self.failures,
+        }
+
+    def stats(self) -> dict:
+        seconds = time.perf_counter() - self.started
+        return {
+            "passwords": self.total,
+            "seconds": round(seconds, 6),
+            "passwords_per_second": round(self.total / seconds, 1) if seconds else None,
+        }
+
+
+def build_bloom(argv, stdout):
+    parser = argparse.ArgumentParser(
+        prog="python -m password_validation build-bloom",
+        description="Build a Bloom filter file of forbidden words",
+    )
+    parser.add_argument("source", help="the words, one per line")
+    parser.add_argument("destination", help="where to write the Bloom filter")
+    parser.add_argument(
+        "--false-positive-rate",
+        type=float,
+        default=0.001,
+        help="the rate of false positives, between 0 and 1",
+    )
+    args = parser.parse_args(argv)
+    if not 0 < args.false_positive_rate < 1:
+        parser.error("--false-positive-rate must be between 0 and 1")
+    bloom_filter = build_bloom_filter(
+        args.source, args.destination, args.false_positive_rate
+    )
+    stdout.write(
+        f"wrote {bloom_filter.number_of_words} words in "
+        f"{len(bloom_filter.buffer)} bytes to {args.destination}\n"
+    )
+    return 0
+
+
+def build_breach(argv, stdout):
+    parser = argparse.ArgumentParser(
+        prog="python -m password_validation build-breach",
+        description="Convert a text dump of breached passwords into a breach file",
+    )
+    parser.add_argument("source", help="the text dump, one entry per line")
+    parser.add_argument("destination", help="where to write the breach file")
+    parser.add_argument(
+        "--plaintext",
+        action="store_true",
+        help="the dump is plaintext passwords rather than SHA-1 hex digests",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=10_000_000,
+        help="the number of digests to sort in memory at once",
+    )
+    args = parser.parse_args(argv)
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+    try:
+        written = build_breach_file(
+            args.source, args.destination, args.plaintext, args.chunk_size
+        )
+    except ValueError as e:
+        # a line that isn't a digest
+        parser.error(str(e))
+    stdout.write(f"wrote {written} digests to {args.destination}\n")
+    return 0
+
+
+def build_markov(argv, stdout):
+    parser = argparse.ArgumentParser(
+        prog="python -m password_validation build-markov",
+        description="Train a Markov model file of the characters of passwords",
+    )
+    parser.add_argument("source", help="the passwords, one per line")
+    parser.add_argument("destination", help="where to write the model")
+    parser.add_argument(
+        "--order",
+        type=int,
+        default=3,
+        help="the number of characters before a character it depends on",
+    )
+    parser.add_argument(
+        "--buckets",
+        type=int,
+        default=2 ** 20,
+        help="the size of the model in bytes, a power of two",
+    )
+    parser.add_argument("--encoding", default="utf-8", help="encoding of the input")
+    args = parser.parse_args(argv)
+    if args.order < 0:
+        parser.error("--order must be at least 0")
+    if args.buckets < 1 or args.buckets & (args.buckets - 1):
+        parser.error("--buckets must be a power of two")
+    model = build_markov_model(
+        args.source, args.destination, args.order, args.buckets, args.encoding
+    )
+    stdout.write(
+        f"wrote a model of order {model.order} of {model.number_of_passwords} "
+        f"passwords in {len(model.buffer)} bytes to {args.destination}\n"
+    )
+    return 0
+
+
+# the files that can be built, by the first argument
+BUILDERS = {
+    "build-bloom": build_bloom,
+    "build-breach": build_breach,
+    "build-markov": build_markov,
+}
+
+
+def main(argv=None, stdin=None, stdout=None, stderr=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in BUILDERS:
+        return BUILDERS[argv[0]](argv[1:], sys.stdout if stdout is None else stdout)
+
+    parser = argparse.ArgumentParser(
+        prog="python -m password_validation",
+        description="Audit passwords, one per line, against a password policy",
+        epilog=(
+            "or build a file for a policy with build-bloom, build-breach or "
+            "build-markov, see python -m password_validation build-bloom --help"
+        ),
+    )
+    parser.add_argument(
+        "input", nargs="?", default="-", help="file of passwords, or - for stdin"
+    )
+    parser.add_argument(
+        "--policy", help="JSON or TOML file of the policy, like PasswordPolicy.to_dict()"
+    )
+    parser.add_argument(
+        "--format", choices=("jsonl", "csv"), default="jsonl", help="output format"
+    )
+    parser.add_argument(
+        "--failures-only", action="store_true", help="only output invalid passwords"
+    )
+    parser.add_argument(
+        "--include-password", action="store_true", help="include the passwords"
+    )
+    parser.add_argument(
+        "--summary", action="store_true", help="write summary counts to stderr"
+    )
+    parser.add_argument(
+        "--stats", action="store_true", help="write throughput stats to stderr"
+    )
+    parser.add_argument("--encoding", default="utf-8", help="encoding of the input")
+    args = parser.parse_args(argv)
+
+    stdout = sys.stdout if stdout is None else stdout
+    stderr = sys.stderr if stderr is None else stderr
+    policy = PasswordPolicy() if args.policy is None else load_policy(args.policy)
+
+    # undecodable bytes become surrogates, which are never in a pool
+    if args.input == "-":
+        if stdin is None:
+            stdin = io.TextIOWrapper(
+                sys.stdin.buffer, encoding=args.encoding, errors="surrogateescape"
+            )
+        lines = stdin
+    else:
+        lines = open(args.input, "r", encoding=args.encoding, errors="surrogateescape")
+
+    if args.format == "csv":
+        fields = CSV_FIELDS + (("password",) if args.include_password else ())
+        writer = csv.writer(stdout, lineterminator="\n")
+        writer.writerow(fields)
+
+    summary = Summary()
+    try:
+        for number, password, code, error in audit_lines(policy, lines):
+            summary.add(code, error)
+            if args.failures_only and code == 0:
+                continue
+            failures = [] if code is None else failure_names(code)
+            if args.format == "csv":
+                row = [number, code == 0, code, ";".join(failures), error or ""]
+                if args.include_password:
+                    # undecodable bytes are written as escapes
+                    row.append(
+                        password.encode("utf-8", "backslashreplace").decode("utf-8")
+                    )
+                writer.writerow(row)
+            else:
+                result = {"line": number, "valid": code == 0, "code": code}
+                result["failures"] = failures
+                if error is not None:
+                    result["error"] = error
+                if args.include_password:
+                    result["password"] = password
+                stdout.write(json.dumps(result) + "\n")
+    finally:
+        if lines is not stdin:
+            lines.close()
+
+    if args.summary:
+        stderr.write(json.dumps({"summary": summary.to_dict()}) + "\n")
+    if args.stats:
+        stderr.write(json.dumps({"stats": summary.stats()}) + "\n")
+    return 0
@@ -0,0 +1,199 @@
+"""
+Coalesce concurrent validations into batches.
+
+Under load many validations arrive at once, each paying for its own trip to
+the executor. A ValidationCoalescer queues them and validates the queue as one
+batch with PasswordPolicy.avalidate_many (one trip to the executor, identical
+passwords checked once) when it reaches max_batch_size, or max_delay seconds
+after its first password, whichever is first.
+    e.g.
+    > coalescer = ValidationCoalescer(policy, max_batch_size=64, max_delay=0.002)
+    > await coalescer.validate("hello")
+    False
+"""
+import time
+import typing
+
+from password_validation.policy import PasswordPolicy
+
+if typing.TYPE_CHECKING:
+    import concurrent.futures
+
+
+class ValidationCoalescer:
+    """
+    Validate passwords in batches, see the module docstring
+
+    :param policy: the policy to validate against
+    :type: PasswordPolicy
+
+    :param max_batch_size: the most passwords in a batch
+    :type: int
+
+    :param max_delay: the most seconds a password waits for a batch to fill
+    :type: float
+
+    :param executor: the executor for the heavy checks, see
+                     PasswordPolicy.avalidate
+    :type: concurrent.futures.Executor
+    """
+
+    def __init__(
+        self,
+        policy: PasswordPolicy,
+        max_batch_size: int = 64,
+        max_delay: float = 0.001,
+        executor: "concurrent.futures.Executor" = None,
+    ):
+        assert isinstance(policy, PasswordPolicy), "policy must be a PasswordPolicy"
+        assert max_batch_size > 0, "max_batch_size must be greater than 0"
+        assert max_delay >= 0, "max_delay must be at least 0"
+        self.policy = policy
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.executor = executor
+
+        # the queued passwords, their futures and when they were queued
+        self.queue = []
+        self.timer = None
+        self.tasks = set()
+
+        # metrics, see ValidationCoalescer.metrics
+        self.batches = 0
+        self.validations = 0
+        self.largest_batch = 0
+        self.flushes_by_size = 0
+        self.flushes_by_time = 0
+        self.total_latency = 0.0
+        self.largest_latency = 0.0
+
+    async def validate(self, password: str) -> bool:
+        """
+        Validate a password in the next batch, see PasswordPolicy.validate
+
+        :param password: the password
+        :type: str or Password
+
+        :return: whether the password is valid
+        :type: bool
+        """
+        # asyncio is imported when it's needed, as it is slow to import
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self.queue.append((password, future, time.perf_counter()))
+        if len(self.queue) >= self.max_batch_size:
+            self.flushes_by_size += 1
+            self.flush()
+        elif self.timer is None:
+            self.timer = loop.call_later(self.max_delay, self._flush_by_time)
+        return await future
+
+    def _flush_by_time(self):
+        self.timer = None
+        if self.queue:
+            self.flushes_by_time += 1
+            self.flush()
+
+    def flush(self):
+        """validate the queued passwords now, rather than wait for the batch"""
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+        batch, self.queue = self.queue, []
+        if batch:
+            import asyncio
+
+            task = asyncio.ensure_future(self._validate_batch(batch))
+            # keep a reference, so the task isn't garbage collected
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def close(self):
+        """validate the queued passwords and wait for every batch"""
+        self.flush()
+        if self.tasks:
+            import asyncio
+
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _validate_batch(self, batch: list):
+        started = time.perf_counter()
+        self.batches += 1
+        self.validations += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        for _, _, queued in batch:
+            latency = started - queued
+            self.total_latency += latency
+            self.largest_latency = max(self.largest_latency, latency)
+
+        # a caller may have been cancelled while it was queued
+        batch = [item for item in batch if not item[1].done()]
+        try:
+            await self._set_results(batch)
+        finally:
+            # e.g. the batch was cancelled, so no caller is left waiting for a
+            # result that will never come
+            for _, future, _ in batch:
+                if not future.done():
+                    future.cancel()
+
+    async def _set_results(self, batch: list):
+        """validate a batch, giving each caller its result or error"""
+        try:
+            results = await self.policy.avalidate_many(
+                [password for password, _, _ in batch], self.executor
+            )
+        except Exception:
+            # e.g. a password with characters that aren't in the pool, so
+            # validate each on its own to give the error to the right caller
+            for password, future, _ in batch:
+                try:
+                    result = await self.policy.avalidate(password, self.executor)
+                except Exception as e:
+                    if not future.done():
+                        future.set_exception(e)
+                else:
+                    if not future.done():
+                        future.set_result(result)
+            return
+        for (_, future, _), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def metrics(self) -> dict:
+        """
+        The batches so far
+
+        :return: the number of batches and validations, the mean and largest
+                 batch size, how many batches were flushed by size and by time,
+                 and the mean and largest seconds a password was queued for
+        :type: dict
+        """
+        return {
+            "batches": self.batches,
+            "validations": self.validations,
+            "mean_batch_size": (
+                self.validations / self.batches if self.batches else 0.0
+            ),
+            "largest_batch_size": self.largest_batch,
+            "flushes_by_size": self.flushes_by_size,
+            "flushes_by_time": self.flushes_by_time,
+            "mean_queue_latency": (
+                self.total_latency / self.validations if self.validations else 0.0
+            ),
+            "largest_queue_latency": self.largest_latency,
+        }
+
+    def __repr__(self):
+        return (
+            f"ValidationCoalescer(max_batch_size={self.max_batch_size}, "
+            f"max_delay={self.max_delay}, queued={len(self.queue)})"
+        )
@@ -0,0 +1,341 @@
+"""
+Analyse a password as it is typed, e.g. for a live strength meter.
+
+Making a Password scans the whole password, so doing it on every keystroke
+takes time linear in the length of the password, every time. An
+IncrementalPassword keeps the number of each class of character and the length
+of a password, and updates them in time linear in the edit, so typing or
+deleting a character is O(1). The class mask comes from the counts and the
+entropy from the policy's entropy table (the pattern or Markov entropy, see
+PasswordPolicy's entropy_method, is worked out again from the whole password).
+    e.g.
+    > password = IncrementalPassword(policy)
+    > password.append("hello")
+    > password.validate()
+    False
+    > password.backspace()
+    > password.length
+    4
+
+Whether each requirement is fulfilled is remembered, and only worked out again
+when its input changes, e.g. typing a lowercase letter doesn't test the
+uppercase requirement again. When forbidden words are matched as substrings,
+the state of the automaton after each character is kept, so typing or deleting
+at the end is one step of the automaton, and an edit in the middle rescans from
+the edit onwards.
+"""
+from password_validation.automaton import AhoCorasick
+from password_validation.automaton import FrozenAhoCorasick
+from password_validation.calculate import log2_power
+from password_validation.character_pool import CHARACTER_CLASSES
+from password_validation.character_pool import MASK_INDICES
+from password_validation.policy import FAIL_FAST_ORDER
+from password_validation.policy import PasswordPolicy
+from password_validation.policy import PasswordRequirement
+from password_validation.policy import REQUIREMENT_BITS
+from password_validation.policy import REQUIREMENT_CODES
+from password_validation.policy import RequirementCode
+
+# the index of each requirement, in the order of REQUIREMENT_CODES
+MIN_LENGTH = REQUIREMENT_CODES.index(RequirementCode.MIN_LENGTH)
+MAX_LENGTH = REQUIREMENT_CODES.index(RequirementCode.MAX_LENGTH)
+ENTROPY = REQUIREMENT_CODES.index(RequirementCode.ENTROPY)
+FORBIDDEN_WORDS = REQUIREMENT_CODES.index(RequirementCode.FORBIDDEN_WORDS)
+BREACHED_PASSWORDS = REQUIREMENT_CODES.index(RequirementCode.BREACHED_PASSWORDS)
+
+
+class IncrementalPassword:
+    """
+    A password that is edited a little at a time, see the module docstring
+
+    Like a Password, the characters have to be in the policy's pool, an edit
+    with any other character raises an AssertionError and changes nothing.
+
+    :param policy: the policy to test the password against
+    :type: PasswordPolicy
+
+    :param password: the password to start with
+    :type: str
+    """
+
+    def __init__(self, policy: PasswordPolicy, password: str = ""):
+        assert isinstance(policy, PasswordPolicy), "policy must be a PasswordPolicy"
+        self.policy = policy
+        self.pool = policy.pool
+
+        # the characters, the class mask of each and the number in each class
+        self.characters = []
+        self.masks = []
+        self.counts = [0] * len(CHARACTER_CLASSES)
+        self._password = ""
+
+        # when forbidden words are matched as substrings, the node of the
+        # automaton after each character and whether a word has ended by then
+        automaton = policy.forbidden_words_requirements.requirement
+        if policy.forbidden_words_match == "substring" and isinstance(
+            automaton, (AhoCorasick, FrozenAhoCorasick)
+        ):
+            self.automaton = automaton
+            self.nodes = [0]
+            self.found = [automaton.matches(0)]
+        else:
+            self.automaton = None
+
+        self.requirements = policy._requirements()
+        # the breached passwords are only checked when there is a breach file
+        if policy.breached_passwords is None:
+            self.requirements = self.requirements[:BREACHED_PASSWORDS]
+        self.fail_fast_order = [
+            REQUIREMENT_CODES.index(code)
+            for code in FAIL_FAST_ORDER
+            if REQUIREMENT_CODES.index(code) < len(self.requirements)
+        ]
+        # whether each requirement (by its index) is fulfilled, as worked out
+        # since its input last changed
+        self.fulfilled = {}
+
+        if password:
+            self.append(password)
+
+    @property
+    def password(self) -> str:
+        if self._password is None:
+            self._password = "".join(self.characters)
+        return self._password
+
+    @property
+    def length(self) -> int:
+        return len(self.characters)
+
+    @property
+    def mask(self) -> int:
+        """the mask of the classes of character in the password"""
+        return sum(1 << i for i, count in enumerate(self.counts) if count)
+
+    @property
+    def lowercase(self) -> int:
+        return self.counts[0]
+
+    @property
+    def uppercase(self) -> int:
+        return self.counts[1]
+
+    @property
+    def numbers(self) -> int:
+        return self.counts[2]
+
+    @property
+    def symbols(self) -> int:
+        return self.counts[3]
+
+    @property
+    def whitespace(self) -> int:
+        return self.counts[4]
+
+    @property
+    def other(self) -> int:
+        return self.counts[5]
+
+    @property
+    def entropy(self) -> float:
+        """the entropy of the password, see PasswordPolicy.entropy"""
+        length = len(self.characters)
+        if self.policy.estimator is not None and length <= self.policy.max_length:
+            return self.policy.estimator.entropy(self.password, self.pool)
+        if length <= self.policy.max_length:
+            return self.policy.entropy_table[self.mask][length]
+        return log2_power(self.pool.mask_sizes[self.mask], length)
+
+    def replace(self, start: int, stop: int, characters: str = ""):
+        """
+        Replace the characters from start up to stop, like a slice
+
+        :param start: the index of the first character to replace
+        :type: int
+
+        :param stop: the index after the last character to replace
+        :type: int
+
+        :param characters: the characters to put in their place
+        :type: str
+        """
+        start, stop, _ = slice(start, stop).indices(len(self.characters))
+        stop = max(start, stop)
+        get_mask = self.pool.character_mask
+        masks = [get_mask(character) for character in characters]
+        assert (
+            None not in masks
+        ), "A password can only use characters from the character_pool provided"
+        if start == stop and not masks:
+            return
+
+        counts = self.counts
+        before = tuple(counts)
+        length = len(self.characters)
+        mask = self.mask
+        for character_mask in self.masks[start:stop]:
+            for index in MASK_INDICES[character_mask]:
+                counts[index] -= 1
+        for character_mask in masks:
+            for index in MASK_INDICES[character_mask]:
+                counts[index] += 1
+        self.characters[start:stop] = characters
+        self.masks[start:stop] = masks
+        self._password = None
+
+        if self.automaton is not None:
+            # the nodes up to the edit are still right, the rest are rescanned
+            del self.nodes[start + 1:]
+            del self.found[start + 1:]
+            self._scan(start)
+
+        # forget the results of the requirements whose input changed
+        fulfilled = self.fulfilled
+        for index, count in enumerate(counts):
+            if count != before[index]:
+                fulfilled.pop(index, None)
+        if len(self.characters) != length:
+            fulfilled.pop(MIN_LENGTH, None)
+            fulfilled.pop(MAX_LENGTH, None)
+            fulfilled.pop(ENTROPY, None)
+        elif self.mask != mask or self.policy.estimator is not None:
+            # the pattern or Markov entropy can change with any character
+            fulfilled.pop(ENTROPY, None)
+        fulfilled.pop(FORBIDDEN_WORDS, None)
+        fulfilled.pop(BREACHED_PASSWORDS, None)
+
+    def _scan(self, start: int):
+        """step the automaton over the characters from start onwards"""
+        step = self.automaton.step
+        matches = self.automaton.matches
+        nodes = self.nodes
+        found = self.found
+        node = nodes[-1]
+        ended = found[-1]
+        for character in self.characters[start:]:
+            # casefolding can make more than one character, e.g. "ß" is "ss"
+            for folded in character.casefold():
+                node = step(node, folded)
+                ended = ended or matches(node)
+            nodes.append(node)
+            found.append(ended)
+
+    def append(self, characters: str):
+        """add characters to the end, e.g. as they are typed"""
+        length = len(self.characters)
+        self.replace(length, length, characters)
+
+    def insert(self, index: int, characters: str):
+        """add characters before an index"""
+        self.replace(index, index, characters)
+
+    def delete(self, start: int, stop: int = None):
+        """delete the character at start, or the characters up to stop"""
+        if stop is None:
+            if start < 0:
+                start += len(self.characters)
+            stop = start + 1
+        self.replace(start, stop)
+
+    def backspace(self, number: int = 1):
+        """delete characters from the end"""
+        length = len(self.characters)
+        self.replace(max(length - number, 0), length)
+
+    def clear(self):
+        self.replace(0, len(self.characters))
+
+    def update(self, password: str):
+        """
+        Change the password to a new one, editing only the characters between
+        the prefix and suffix they have in common, e.g. when the whole of a
+        form field is sent on every keystroke
+
+        :param password: the new password
+        :type: str
+        """
+        characters = self.characters
+        length = len(characters)
+        shortest = min(length, len(password))
+        prefix = 0
+        while prefix < shortest and characters[prefix] == password[prefix]:
+            prefix += 1
+        suffix = 0
+        while (
+            suffix < shortest - prefix
+            and characters[length - suffix - 1] == password[-suffix - 1]
+        ):
+            suffix += 1
+        self.replace(prefix, length - suffix, password[prefix:len(password) - suffix])
+
+    def _actual(self, index: int):
+        """the password's actual value for a requirement"""
+        if index < len(CHARACTER_CLASSES):
+            return self.counts[index]
+        if index == MIN_LENGTH or index == MAX_LENGTH:
+            return len(self.characters)
+        if index == ENTROPY:
+            return self.entropy
+        return self.password
+
+    def _fulfilled(self, index: int) -> bool:
+        """whether a requirement is fulfilled, only tested if its input changed"""
+        fulfilled = self.fulfilled.get(index)
+        if fulfilled is None:
+            requirement = self.requirements[index]
+            if (
+                index == FORBIDDEN_WORDS
+                and self.automaton is not None
+                and requirement.cls is PasswordRequirement
+            ):
+                fulfilled = not self.found[-1]
+            else:
+                fulfilled = bool(requirement.test(self._actual(index)))
+            self.fulfilled[index] = fulfilled
+        return fulfilled
+
+    def test_password(self, failures_only: bool = True, fail_fast: bool = False):
+        """
+        Test the password against every requirement of the policy, the same as
+        PasswordPolicy.test_password would
+
+        :param failures_only: only return the unfulfilled requirements
+        :type: bool
+
+        :param fail_fast: only return the first unfulfilled requirement
+        :type: bool
+
+        :return: the requirements
+        :type: list
+        """
+        if fail_fast:
+            for index in self.fail_fast_order:
+                if not self._fulfilled(index):
+                    requirement = self.requirements[index]
+                    return [requirement.result(self._actual(index), False)]
+            return []
+        rv = []
+        for index, requirement in enumerate(self.requirements):
+            fulfilled = self._fulfilled(index)
+            if not (failures_only and fulfilled):
+                rv.append(requirement.result(self._actual(index), fulfilled))
+        return rv
+
+    def check_code(self) -> int:
+        """the code of the password, see PasswordPolicy.check_code"""
+        code = 0
+        for index, bit in zip(range(len(self.requirements)), REQUIREMENT_BITS):
+            if not self._fulfilled(index):
+                code |= bit
+        return code
+
+    def validate(self) -> bool:
+        """whether the password fulfils every requirement of the policy"""
+        return all(self._fulfilled(index) for index in self.fail_fast_order)
+
+    def __len__(self):
+        return len(self.characters)
+
+    def __repr__(self):
+        # like a Password, the password itself isn't shown
+        return f"IncrementalPassword(length={len(self.characters)})"
@@ -0,0 +1,191 @@
+"""
+Count and time what a policy does, to see where validation time goes.
+
+Instrumentation is opt-in, a policy only records anything once it has some:
+    e.g.
+    > instrumentation = policy.instrument()
+    > policy.test_password("hello")
+    > instrumentation.snapshot()["requirements"]["min_length"]
+    {'evaluations': 1, 'failures': 1}
+    > print(instrumentation.to_prometheus())
+    # TYPE password_validation_requirement_evaluations_total counter
+    ...
+
+Without it (policy.instrumentation is None) the cost is one attribute check
+per call.
+"""
+import bisect
+import threading
+
+# the upper bounds, in seconds, of the buckets of the latency histograms
+DEFAULT_BUCKETS = (
+    1e-6,
+    2.5e-6,
+    5e-6,
+    1e-5,
+    2.5e-5,
+    5e-5,
+    1e-4,
+    2.5e-4,
+    5e-4,
+    1e-3,
+    2.5e-3,
+    5e-3,
+    1e-2,
+    0.1,
+    1.0,
+)
+
+
+class Histogram:
+    """
+    A histogram of durations, in the buckets of a Prometheus histogram
+
+    :param buckets: the upper bound of each bucket, ascending, a last bucket
+                    of everything above them is added
+    :type: tuple(float)
+    """
+
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        # a value equal to an upper bound is in that bucket
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def to_dict(self) -> dict:
+        return {
+            "buckets": list(self.buckets),
+            "counts": list(self.counts),
+            "sum": self.sum,
+            "count": self.count,
+        }
+
+
+class Instrumentation:
+    """
+    The counts and latency histograms of a policy, see the module docstring
+
+    For every requirement, the number of times it was evaluated and the number
+    of times it was unfulfilled. For every phase, a histogram of how long it
+    took: "analysis" (making the Password), "entropy", "forbidden_words" and
+    "breached_passwords" (the lookups), and "test_password" and "validate" (the
+    whole call).
+
+    Recording is thread safe.
+
+    :param buckets: the upper bounds, in seconds, of the histogram buckets
+    :type: tuple(float)
+
+    :param prefix: the prefix of the Prometheus metric names
+    :type: str
+    """
+
+    def __init__(
+        self, buckets: tuple = DEFAULT_BUCKETS, prefix: str = "password_validation"
+    ):
+        assert list(buckets) == sorted(buckets), "buckets must be ascending"
+        self.buckets = tuple(buckets)
+        self.prefix = prefix
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """forget everything recorded so far"""
+        with self.lock:
+            self.evaluations = {}
+            self.failures = {}
+            self.histograms = {}
+
+    def record(self, durations: dict, results=()):
+        """
+        Record a call
+
+        :param durations: the seconds each phase took
+        :type: dict(str, float)
+
+        :param results: the name of each requirement evaluated, and whether it
+                        was fulfilled
+        :type: iterable of tuple(str, bool)
+        """
+        with self.lock:
+            for phase, duration in durations.items():
+                histogram = self.histograms.get(phase)
+                if histogram is None:
+                    histogram = self.histograms[phase] = Histogram(self.buckets)
+                histogram.observe(duration)
+            evaluations = self.evaluations
+            failures = self.failures
+            for name, fulfilled in results:
+                evaluations[name] = evaluations.get(name, 0) + 1
+                if not fulfilled:
+                    failures[name] = failures.get(name, 0) + 1
+
+    def snapshot(self) -> dict:
+        """
+        Everything recorded so far, as plain dicts
+
+        :return: "requirements" (the evaluations and failures of each) and
+                 "latency" (the histogram of each phase)
+        :type: dict
+        """
+        with self.lock:
+            return {
+                "requirements": {
+                    name: {
+                        "evaluations": evaluations,
+                        "failures": self.failures.get(name, 0),
+                    }
+                    for name, evaluations in self.evaluations.items()
+                },
+                "latency": {
+                    phase: histogram.to_dict()
+                    for phase, histogram in self.histograms.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Everything recorded so far, in the Prometheus text exposition format
+
+        :return: the metrics
+        :type: str
+        """
+        snapshot = self.snapshot()
+        prefix = self.prefix
+        lines = []
+
+        for metric, key, description in (
+            ("requirement_evaluations_total", "evaluations", "Requirement evaluations"),
+            ("requirement_failures_total", "failures", "Unfulfilled requirements"),
+        ):
+            lines.append(f"# HELP {prefix}_{metric} {description}")
+            lines.append(f"# TYPE {prefix}_{metric} counter")
+            for name, counts in sorted(snapshot["requirements"].items()):
+                lines.append(
+                    f'{prefix}_{metric}{{requirement="{name}"}} {counts[key]}'
+                )
+
+        metric = f"{prefix}_duration_seconds"
+        lines.append(f"# HELP {metric} Time taken by each phase of validation")
+        lines.append(f"# TYPE {metric} histogram")
+        for phase, histogram in sorted(snapshot["latency"].items()):
+            cumulative = 0
+            for bound, count in zip(
+                histogram["buckets"] + ["+Inf"], histogram["counts"]
+            ):
+                cumulative += count
+                lines.append(
+                    f'{metric}_bucket{{phase="{phase}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{metric}_sum{{phase="{phase}"}} {histogram["sum"]}')
+            lines.append(f'{metric}_count{{phase="{phase}"}} {histogram["count"]}')
+        return "\n".join(lines) + "\n"
+
+    def __repr__(self):
+        return f"Instrumentation({sum(self.evaluations.values())} evaluations)"
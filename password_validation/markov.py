@@ -0,0 +1,330 @@
+"""
+Estimate the entropy of a password with a Markov model of characters.
+
+A model of order n gives the probability of each character from the n
+characters before it (fewer at the start of a password), as learnt from a
+corpus of passwords. The entropy of a password is the sum of -log2 of the
+probability of each of its characters, so passwords made like the ones in the
+corpus have less entropy than their classes of character and length suggest.
+    e.g.
+    > calculate_entropy("password1", method="markov")
+    23.8...
+    > calculate_entropy("password1")
+    46.5...
+    > model = MarkovModel.open("passwords.markov")
+    > calculate_entropy("password1", method="markov", markov_model=model)
+
+The default model (see default_model) is only trained on the few hundred
+common passwords and words of patterns, train one on a large corpus for
+better estimates.
+
+A character is never counted as more than the "normal" method would (and a
+character the model hasn't seen after its context is counted as that), so the
+estimate is never more than the "normal" entropy.
+
+The model is a flat array of one byte for each of a power of two of buckets,
+indexed by a hash of a context and the character after it, holding -log2 of
+the probability of the character in steps of 1 / scale of a bit (0 for a
+bucket nothing hashed to). It is saved to a file that is memory mapped when
+opened, so it loads instantly, and scoring a password is one pass over it.
+
+Train one from a file of one password per line with:
+    python -m password_validation build-markov passwords.txt passwords.markov
+"""
+import functools
+import math
+import mmap
+import struct
+from array import array
+
+from password_validation.character_pool import DEFAULT_CHARACTER_POOL
+from password_validation.exceptions import UnacceptableCharacters
+from password_validation.patterns import COMMON_PASSWORDS
+from password_validation.patterns import COMMON_WORDS
+
+MAGIC = b"PVMARKV1"
+# magic, order, number of buckets, scale, number of passwords
+HEADER = struct.Struct("<8sIQIQ")
+# the steps of a bit each cost is stored in, so the most a byte holds is 31.875
+SCALE = 8
+# added to the count of every character after a context, so the characters
+# that are rarely seen after it aren't given a probability of 0
+SMOOTHING = 0.5
+
+# a context and the character after it are hashed as a polynomial of their
+# code points, which can be rolled along a password a character at a time,
+# then mixed with their length and multiplied, and the top bits are the bucket
+BASE = 0x100000001B3
+LENGTH_SALT = 0x9E3779B97F4A7C15
+MIX = 0xBF58476D1CE4E5B9
+MASK_64 = 0xFFFFFFFFFFFFFFFF
+
+
+def _bucket(code_points: list, shift: int) -> int:
+    """the bucket of some code points, of a model of 2 ** (64 - shift) buckets"""
+    polynomial = 0
+    for code_point in code_points:
+        polynomial = (polynomial * BASE + code_point) & MASK_64
+    return (
+        ((polynomial + len(code_points) * LENGTH_SALT) * MIX) & MASK_64
+    ) >> shift
+
+
+class MarkovModel:
+    """
+    A Markov model of characters, backed by a buffer in the model file format
+
+    The buffer isn't copied, so it can be a mmap (see MarkovModel.open).
+
+    :param buffer: the model, a header then a byte for every bucket
+    :type: bytes-like
+
+    :param path: the path the buffer was read from, if any
+    :type: str
+    """
+
+    def __init__(self, buffer, path: str = None):
+        magic, order, number_of_buckets, scale, number_of_passwords = (
+            HEADER.unpack_from(buffer)
+        )
+        assert magic == MAGIC, "not a Markov model file"
+        assert number_of_buckets & (number_of_buckets - 1) == 0, (
+            "the number of buckets must be a power of two"
+        )
+        assert len(buffer) >= HEADER.size + number_of_buckets, (
+            "the Markov model file is truncated"
+        )
+        self.buffer = buffer
+        self.path = path
+        self.order = order
+        self.number_of_buckets = number_of_buckets
+        self.scale = scale
+        self.number_of_passwords = number_of_passwords
+        self.costs = memoryview(buffer)[HEADER.size:HEADER.size + number_of_buckets]
+
+    @classmethod
+    def build(cls, passwords, order: int = 3, number_of_buckets: int = 2 ** 20):
+        """
+        Train a model in memory
+
+        The passwords are read twice, once to count the characters after each
+        context and once to work out their probabilities, so only the counts
+        (8 bytes for each bucket, twice) are kept in memory.
+
+        :param passwords: the passwords, an iterable that can be read twice,
+                          e.g. a list (an iterator is read into a list)
+        :type: iterable of str
+
+        :param order: the number of characters before a character it depends on
+        :type: int
+
+        :param number_of_buckets: the size of the model, a power of two
+        :type: int
+
+        :return: the model
+        :type: MarkovModel
+        """
+        assert isinstance(order, int) and order >= 0, "order must be an int >= 0"
+        assert number_of_buckets > 0 and (
+            number_of_buckets & (number_of_buckets - 1) == 0
+        ), "the number of buckets must be a power of two"
+        if iter(passwords) is passwords:
+            passwords = list(passwords)
+        shift = 64 - number_of_buckets.bit_length() + 1
+
+        # the number of times each context, and each character after a
+        # context, is seen
+        context_counts = array("Q", bytes(8 * number_of_buckets))
+        counts = array("Q", bytes(8 * number_of_buckets))
+        alphabet = set()
+        number_of_passwords = 0
+        for password in passwords:
+            assert isinstance(password, str), "all passwords must be strings"
+            code_points = [ord(character) for character in password]
+            for i in range(len(code_points)):
+                context = code_points[max(i - order, 0):i]
+                context_counts[_bucket(context, shift)] += 1
+                counts[_bucket(context + [code_points[i]], shift)] += 1
+            alphabet.update(password)
+            number_of_passwords += 1
+
+        buffer = bytearray(HEADER.size + number_of_buckets)
+        costs = memoryview(buffer)[HEADER.size:]
+        smoothing = SMOOTHING * max(len(alphabet), 1)
+        for password in passwords:
+            code_points = [ord(character) for character in password]
+            for i in range(len(code_points)):
+                context = code_points[max(i - order, 0):i]
+                bucket = _bucket(context + [code_points[i]], shift)
+                if costs[bucket]:
+                    continue
+                probability = (counts[bucket] + SMOOTHING) / (
+                    context_counts[_bucket(context, shift)] + smoothing
+                )
+                # a bucket that isn't 0 has been seen, even if it costs nothing
+                cost = round(-math.log2(probability) * SCALE)
+                costs[bucket] = min(max(cost, 1), 255)
+        costs.release()
+
+        HEADER.pack_into(
+            buffer, 0, MAGIC, order, number_of_buckets, SCALE, number_of_passwords
+        )
+        return cls(buffer)
+
+    @classmethod
+    def open(cls, path: str):
+        """
+        Memory map a Markov model file
+
+        :param path: the path to the file
+        :type: str
+
+        :return: the model
+        :type: MarkovModel
+        """
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(buffer, path=path)
+
+    def save(self, path: str):
+        """write the model to a file, to be opened with MarkovModel.open"""
+        with open(path, "wb") as f:
+            f.write(self.buffer)
+
+    def __reduce__(self):
+        # a model from a file is mapped again rather than copied, and the
+        # default model is trained again
+        if self.path is not None:
+            return MarkovModel.open, (self.path,)
+        if self is default_model():
+            return default_model, ()
+        return MarkovModel, (bytes(self.buffer),)
+
+    def close(self):
+        self.costs.release()
+        if isinstance(self.buffer, mmap.mmap):
+            self.buffer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def entropy(self, password: str, character_pool=None) -> float:
+        """
+        The entropy of a password, the sum of -log2 of the probability of
+        each of its characters
+
+        :param password: the password
+        :type: str
+
+        :param character_pool: the pool of characters, for the most a
+                               character can count for
+        :type: CharacterPool
+
+        :return: the entropy
+        :type: float
+        """
+        pool = DEFAULT_CHARACTER_POOL if character_pool is None else character_pool
+        analysis = pool.analyse(password)
+        if analysis.unknown:
+            raise UnacceptableCharacters(
+                f"You can only use characters from the character pool, "
+                f"which are: {pool.all}"
+            )
+        if not password:
+            return 0.0
+        # the most a character counts for, as the "normal" method, in steps
+        most = math.log2(pool.mask_sizes[analysis.mask] or 1) * self.scale
+
+        costs = self.costs
+        shift = 64 - self.number_of_buckets.bit_length() + 1
+        window = self.order + 1
+        # to take the character that leaves the window out of the polynomial
+        leaving = pow(BASE, window, MASK_64 + 1)
+        code_points = [ord(character) for character in password]
+        polynomial = 0
+        total = 0
+        # _bucket of the context and character at each position, rolled along
+        for i, code_point in enumerate(code_points):
+            polynomial = polynomial * BASE + code_point
+            if i >= window:
+                polynomial -= code_points[i - window] * leaving
+            polynomial &= MASK_64
+            length = i + 1 if i < window else window
+            cost = costs[
+                (((polynomial + length * LENGTH_SALT) * MIX) & MASK_64) >> shift
+            ]
+            total += cost if 0 < cost < most else most
+        return total / self.scale
+
+    def __repr__(self):
+        if self.path is None:
+            return f"MarkovModel(order={self.order})"
+        return f"MarkovModel('{self.path}', order={self.order})"
+
+
+@functools.lru_cache(maxsize=None)
+def default_model() -> MarkovModel:
+    """
+    A small model of the common passwords and words of patterns, trained the
+    first time it is used, train one on a real corpus for better estimates
+    """
+    return MarkovModel.build(
+        COMMON_PASSWORDS.split() + COMMON_WORDS.split(),
+        order=2,
+        number_of_buckets=2 ** 14,
+    )
+
+
+class _Lines:
+    """the lines of a file that aren't empty, every time it is iterated over"""
+
+    def __init__(self, path: str, encoding: str = "utf-8"):
+        self.path = path
+        self.encoding = encoding
+
+    def __iter__(self):
+        with open(self.path, "r", encoding=self.encoding, errors="replace") as f:
+            for line in f:
+                password = line.rstrip("\r\n")
+                if password:
+                    yield password
+
+
+def build_markov_model(
+    source: str,
+    destination: str,
+    order: int = 3,
+    number_of_buckets: int = 2 ** 20,
+    encoding: str = "utf-8",
+) -> MarkovModel:
+    """
+    Train a Markov model file from a file of one password per line
+
+    The source is streamed twice (see MarkovModel.build), so it never has to
+    fit in memory.
+
+    :param source: path to the passwords, one per line
+    :type: str
+
+    :param destination: path to write the model to
+    :type: str
+
+    :param order: the number of characters before a character it depends on
+    :type: int
+
+    :param number_of_buckets: the size of the model, a power of two
+    :type: int
+
+    :param encoding: the encoding of the source
+    :type: str
+
+    :return: the model
+    :type: MarkovModel
+    """
+    model = MarkovModel.build(_Lines(source, encoding), order, number_of_buckets)
+    model.save(destination)
+    return model
+
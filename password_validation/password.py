@@ -1,5 +1,6 @@
-from password_validation.calculate import calculate_entropy
+from password_validation.calculate import log2_power
 from password_validation.character_pool import CharacterPool
+from password_validation.character_pool import DEFAULT_CHARACTER_POOL
 
 
 class Password:
@@ -13,49 +14,40 @@ class Password:
     def __init__(self, password: str, character_pool: CharacterPool = None):
         # set character pool
         if character_pool is None:
-            self.pool = CharacterPool()
+            self.pool = DEFAULT_CHARACTER_POOL
         else:
             self.pool = character_pool
 
-        assert all(
-            i in self.pool.all for i in password
+        # classify every character against the pool in a single pass
+        analysis = self.pool.analyse(password)
+
+        assert (
+            not analysis.unknown
         ), "A password can only use characters from the character_pool provided"
 
         # set password
         self.password = password
 
-        # set the number of lowercase in the password
-        self.lowercase = len(
-            [character for character in password if character in self.pool.lowercase]
-        )
-
-        # set the uppercase of lowercase in the password
-        self.uppercase = len(
-            [character for character in password if character in self.pool.uppercase]
-        )
-
-        # set the symbols of lowercase in the password
-        self.symbols = len(
-            [character for character in password if character in self.pool.symbols]
-        )
+        # set the number of each class of character in the password
+        self.lowercase = analysis.lowercase
+        self.uppercase = analysis.uppercase
+        self.symbols = analysis.symbols
+        self.numbers = analysis.numbers
+        self.whitespace = analysis.whitespace
+        self.other = analysis.other
 
-        # set the numbers of lowercase in the password
-        self.numbers = len(
-            [character for character in password if character in self.pool.numbers]
-        )
-
-        # set the numbers of whitespace in the password
-        self.whitespace = len(
-            [character for character in password if character in self.pool.whitespace]
-        )
-
-        # set the other of lowercase in the password
-        self.other = len(
-            [character for character in password if character in self.pool.other]
-        )
+        # set the mask of character classes used in the password
+        self.mask = analysis.mask
 
         # set the length of the password
-        self.length = len(password)
+        self.length = analysis.length
+
+        # entropy is worked out when first asked for, a policy may not need it
+        self._entropy = None
 
-        # set entropy
-        self.entropy = calculate_entropy(password, character_pool=self.pool)
+    @property
+    def entropy(self) -> float:
+        """the "normal" entropy of the password, see calculate_entropy"""
+        if self._entropy is None:
+            self._entropy = log2_power(self.pool.mask_sizes[self.mask], self.length)
+        return self._entropy
@@ -0,0 +1,923 @@
+"""
+Estimate the entropy of a password from the patterns in it.
+
+The pool size formulas (see calculate_entropy) rate "Password1!Password1!" as
+strong, as it has every class of character and 20 of them. A PatternEstimator
+finds the patterns an attacker would guess first:
+    - dictionary words, from ranked lists of common passwords and words, in
+      any case and with l33t substitutions (e.g. "p4$$w0rd")
+    - repeats (e.g. "abcabc", or "Password1!Password1!")
+    - sequences (e.g. "abcd", "9753")
+    - dates and recent years (e.g. "13/05/1990", "2024")
+    - keyboard walks on a qwerty keyboard or a keypad (e.g. "qwerty", "zxcv")
+then finds the decomposition of the password into patterns (and characters
+guessed by brute force) that takes the fewest guesses, by dynamic
+programming. The entropy is log base 2 of those guesses.
+    e.g.
+    > calculate_entropy("Password1!Password1!", method="pattern")
+    16.5...
+    > calculate_entropy("Password1!Password1!")
+    131.1...
+
+A character guessed by brute force takes as many guesses as the "normal"
+method gives it, so the estimate is never more than the "normal" entropy.
+
+The tries of the dictionaries and the keyboard graphs are built once, the
+default estimator (see default_estimator) when it is first used. Patterns are
+only looked for in the first MAX_ESTIMATED_LENGTH characters of a password.
+"""
+import functools
+import math
+import re
+
+from password_validation.character_pool import DEFAULT_CHARACTER_POOL
+from password_validation.exceptions import UnacceptableCharacters
+
+# the most common passwords, most common first
+COMMON_PASSWORDS = """
+123456 password 12345678 qwerty 123456789 12345 1234 111111 1234567 dragon
+123123 baseball abc123 football monkey letmein 696969 shadow master 666666
+qwertyuiop 123321 mustang 1234567890 michael 654321 superman 1qaz2wsx 7777777
+121212 000000 qazwsx 123qwe killer trustno1 jordan jennifer zxcvbnm asdfgh
+hunter buster soccer harley batman andrew tigger sunshine iloveyou 2000
+charlie robert thomas hockey ranger daniel starwars klaster 112233 george
+computer michelle jessica pepper 1111 zxcvbn 555555 11111111 131313 freedom
+777777 pass maggie 159753 aaaaaa ginger princess joshua cheese amanda summer
+love ashley 6969 nicole chelsea biteme matthew access yankees 987654321 dallas
+austin thunder taylor matrix william corvette hello martin heather secret
+merlin diamond 1234qwer gfhjkm hammer silver 222222 88888888 anthony justin
+test bailey q1w2e3r4t5 patrick internet scooter orange 11111 golfer cookie
+richard samantha bigdog guitar jackson whatever mickey chicken sparky snoopy
+maverick phoenix camaro peanut morgan welcome falcon cowboy ferrari samsung
+andrea smokey steelers joseph mercedes dakota arsenal eagles melissa boomer
+booboo spider nascar monster tigers yellow xxxxxx 123123123 gateway marina
+diablo bulldog qwer1234 compaq purple banana junior hannah 123654
+porsche lakers iceman money cowboys 987654 london tennis 999999 ncc1701 coffee
+scooby 0000 miller boston q1w2e3r4 brandon yamaha chester mother forever
+johnny edward 333333 oliver redsox player nikita knight fender barney midnight
+please brandy chicago badboy slayer rangers charles angel flower rabbit wizard
+jasper enter rachel chris steven winner adidas victoria natasha 1q2w3e
+jasmine winter prince marine ghbdtn fishing cocacola casper james
+232323 raiders 888888 marlboro gandalf asdfasdf crystal 87654321 12344321
+golden 8675309 disney lovely 1q2w3e4r5t qwe123 admin administrator changeme
+welcome1 password1 letmein1 abcd1234 passw0rd p@ssw0rd iloveu monkey1 sunshine1
+"""
+
+# common english words, most common first
+COMMON_WORDS = """
+the and for that with this from your have more will home page free time they
+site what which their news there only when contact here business also help
+view online first been would were services some these click like service than
+find price date back people list name just over state year into email health
+world next used work last most products music data make them should product
+system post city policy number such please available copyright support message
+after best software then good video well where info rights public books high
+school through each links review years order very privacy book items company
+read group need many user said does under general research university january
+mail full team around house again river spring summer autumn winter garden
+family friend friends water money love life baby angel happy sunshine secret
+dragon monkey flower orange purple silver golden summer princess football
+soccer hockey cookie banana cheese chocolate coffee computer internet welcome
+master shadow killer hunter ranger thunder freedom forever heaven butterfly
+password letmein access admin qwerty login user guest root test default
+"""
+
+# the letters a character could stand in for, in l33t
+L33T_TABLE = {
+    "4": ("a",),
+    "@": ("a",),
+    "8": ("b",),
+    "(": ("c",),
+    "{": ("c",),
+    "[": ("c",),
+    "<": ("c",),
+    "3": ("e",),
+    "6": ("g",),
+    "9": ("g",),
+    "1": ("i", "l"),
+    "!": ("i",),
+    "|": ("i", "l"),
+    "7": ("l", "t"),
+    "0": ("o",),
+    "$": ("s",),
+    "5": ("s",),
+    "+": ("t",),
+    "%": ("x",),
+    "2": ("z",),
+}
+# the letters that have a l33t substitution
+L33T_LETTERS = frozenset(
+    letter for letters in L33T_TABLE.values() for letter in letters
+)
+
+# the letters a character could be, itself first
+L33T_CHOICES = {
+    character: (character,) + letters for character, letters in L33T_TABLE.items()
+}
+
+# a sequence changes by at most this much between characters, e.g. "acegi"
+MAX_SEQUENCE_DELTA = 5
+
+# the years a date can be in, and the year guesses are counted from, fixed
+# so an estimate doesn't change from one year to the next
+DATE_MIN_YEAR = 1000
+DATE_MAX_YEAR = 2050
+REFERENCE_YEAR = 2024
+# the fewest years to guess, even for a date in the reference year
+MIN_YEAR_SPACE = 20
+# where to split a date without separators of each length, into 3 numbers
+DATE_SPLITS = {
+    4: ((1, 2), (2, 3)),
+    5: ((1, 3), (2, 3)),
+    6: ((1, 2), (2, 4), (4, 5)),
+    7: ((1, 3), (2, 3), (4, 5), (4, 6)),
+    8: ((2, 4), (4, 6)),
+}
+DATE_WITH_SEPARATOR = re.compile(
+    r"(?=(([0-9]{1,4})([\s/\\_.-])([0-9]{1,2})\3([0-9]{1,4})))"
+)
+RECENT_YEAR = re.compile(r"(?=(19[0-9][0-9]|20[0-9][0-9]))")
+
+# the fewest guesses of a pattern that isn't the whole password, so that many
+# short patterns don't look easier to guess than the characters themselves
+LOG2_MIN_GUESSES_SINGLE_CHARACTER = math.log2(10)
+LOG2_MIN_GUESSES_MULTIPLE_CHARACTERS = math.log2(50)
+
+# patterns are only looked for in this many characters of a password, the
+# characters after are guessed by brute force, so a long password can't take
+# long to estimate
+MAX_ESTIMATED_LENGTH = 256
+
+# the most decompositions of a prefix of a password, each with a different
+# number of patterns, kept for finding the one that takes the fewest guesses
+MAX_DECOMPOSITIONS = 3
+
+# log base 2 of l! for l patterns, the orders of them
+LOG2_ORDERS = [
+    math.lgamma(patterns + 1) / math.log(2)
+    for patterns in range(MAX_ESTIMATED_LENGTH + 1)
+]
+
+# a term of a keyboard walk's guesses this many bits below their sum doesn't
+# change it as a float
+NEGLIGIBLE_LOG2_TERM = 64
+
+# the keys of a qwerty keyboard, unshifted and shifted, each row is half a key
+# to the right of the one above
+QWERTY = (
+    "`~ 1! 2@ 3# 4$ 5% 6^ 7& 8* 9( 0) -_ =+",
+    "qQ wW eE rR tT yY uU iI oO pP [{ ]} \\|",
+    "aA sS dD fF gG hH jJ kK lL ;: '\"",
+    "zZ xX cC vV bB nN mM ,< .> /?",
+)
+# the keys of a keypad, as rows of columns (None is no key)
+KEYPAD = (
+    (None, "/", "*", "-"),
+    ("7", "8", "9", "+"),
+    ("4", "5", "6", None),
+    ("1", "2", "3", None),
+    (None, "0", ".", None),
+)
+# a key with no neighbours
+NO_NEIGHBOURS = {}
+# the neighbours of a key, in order, on a keyboard and on a keypad
+SLANTED_DIRECTIONS = ((-1, 0), (0, -1), (1, -1), (1, 0), (0, 1), (-1, 1))
+ALIGNED_DIRECTIONS = (
+    (-1, 0),
+    (-1, -1),
+    (0, -1),
+    (1, -1),
+    (1, 0),
+    (1, 1),
+    (0, 1),
+    (-1, 1),
+)
+
+
+class Match:
+    """
+    A pattern found in a password, from start up to end, and its entropy, log
+    base 2 of how many guesses it takes to guess it
+    """
+
+    __slots__ = ("pattern", "start", "end", "entropy")
+
+    def __init__(self, pattern: str, start: int, end: int, entropy: float):
+        self.pattern = pattern
+        self.start = start
+        self.end = end
+        self.entropy = entropy
+
+    def __repr__(self):
+        return (
+            f"Match({self.pattern!r}, start={self.start}, end={self.end}, "
+            f"entropy={self.entropy:.2f})"
+        )
+
+
+class KeyboardGraph:
+    """
+    Which key is next to which on a keyboard, for finding keyboard walks
+
+    :param keys: the position (column, row) of each key, a key is its
+                 characters, unshifted then shifted
+    :type: dict(tuple(int, int), str)
+
+    :param directions: the (column, row) offset of each neighbour of a key
+    :type: tuple(tuple(int, int))
+    """
+
+    def __init__(self, keys: dict, directions: tuple):
+        # the direction to each neighbouring character, and whether it's
+        # shifted, for every character
+        self.neighbours = {}
+        self.shifted = set()
+        degrees = 0
+        for (column, row), key in keys.items():
+            self.shifted.update(key[1:])
+            neighbours = {}
+            for direction, (x, y) in enumerate(directions):
+                neighbour = keys.get((column + x, row + y))
+                if neighbour is None:
+                    continue
+                degrees += 1
+                for index, character in enumerate(neighbour):
+                    neighbours[character] = (direction, index > 0)
+            for character in key:
+                self.neighbours[character] = neighbours
+        self.starting_positions = len(keys)
+        self.average_degree = degrees / len(keys)
+
+    @classmethod
+    def slanted(cls, rows: tuple):
+        """a keyboard of rows of space separated keys, see QWERTY"""
+        keys = {}
+        for row, keys_in_row in enumerate(rows):
+            # the first row starts half a key to the left of the others
+            for column, key in enumerate(keys_in_row.split(), 0 if row == 0 else 1):
+                keys[(column, row)] = key
+        return cls(keys, SLANTED_DIRECTIONS)
+
+    @classmethod
+    def aligned(cls, rows: tuple):
+        """a keypad of rows of keys, see KEYPAD"""
+        keys = {
+            (column, row): key
+            for row, keys_in_row in enumerate(rows)
+            for column, key in enumerate(keys_in_row)
+            if key is not None
+        }
+        return cls(keys, ALIGNED_DIRECTIONS)
+
+    def entropy(self, length: int, turns: int, shifted: int) -> float:
+        """
+        log base 2 of the guesses to find a walk of a length, turns and shifted
+        keys, each guess is a starting key and which neighbour each turn is to
+        """
+        most_turns = min(turns, length - 1)
+        degree = self.average_degree
+        # every walk of length i from 2 to the length with j of its i - 1 steps
+        # being turns, comb(i - 1, j - 1) * degree ** j of them, summed over i
+        # is (comb(length, j) - 1) * degree ** j, summed over j here
+
+        # the terms get larger up to the largest, then smaller, so they are
+        # summed relative to the largest, out from it until they no longer
+        # change the sum, as a long walk would overflow a float
+        largest = int((length * degree - 1) / (degree + 1))
+        largest = min(max(largest, 1), most_turns)
+        log2_largest = (
+            math.lgamma(length + 1)
+            - math.lgamma(largest + 1)
+            - math.lgamma(length - largest + 1)
+        ) / math.log(2) + largest * math.log2(degree)
+        negligible = 2**-NEGLIGIBLE_LOG2_TERM
+        total = 1.0
+        term = 1.0
+        for j in range(largest, 1, -1):
+            # comb(length, j - 1) / comb(length, j), over the degree
+            term *= j / ((length - j + 1) * degree)
+            if term < negligible:
+                break
+            total += term
+        term = 1.0
+        for j in range(largest, most_turns):
+            term *= (length - j) * degree / (j + 1)
+            if term < negligible:
+                break
+            total += term
+        # less the degree ** j of every term, a geometric series
+        log2_geometric = (
+            math.log2(degree)
+            + most_turns * math.log2(degree)
+            + math.log2(1 - degree**-most_turns)
+            - math.log2(degree - 1)
+        )
+        rv = log2_largest + math.log2(total - 2 ** (log2_geometric - log2_largest))
+        return (
+            rv
+            + math.log2(self.starting_positions)
+            + math.log2(_variations(shifted, length - shifted))
+        )
+
+
+def _variations(changed: int, unchanged: int) -> int:
+    """
+    the guesses of which characters of a pattern were changed, e.g. which
+    letters of a word are uppercase
+    """
+    if not changed:
+        return 1
+    if not unchanged:
+        return 2
+    return sum(
+        math.comb(changed + unchanged, i) for i in range(1, min(changed, unchanged) + 1)
+    )
+
+
+def _uppercase_variations(token: str) -> int:
+    uppercase = sum(1 for character in token if character.isupper())
+    if not uppercase:
+        return 1
+    lowercase = sum(1 for character in token if character.islower())
+    # only the first or last letter, or every letter, is uppercase
+    if (
+        not lowercase
+        or uppercase == 1
+        and (token[0].isupper() or token[-1].isupper())
+    ):
+        return 2
+    return _variations(uppercase, lowercase)
+
+
+def _two_to_four_digit_year(year: int) -> int:
+    if year > 99:
+        return year
+    if year > 50:
+        return 1900 + year
+    return 2000 + year
+
+
+def _day_and_month(first: int, second: int) -> bool:
+    """whether two numbers are a day and month, in either order"""
+    return (
+        1 <= first <= 31
+        and 1 <= second <= 12
+        or 1 <= second <= 31
+        and 1 <= first <= 12
+    )
+
+
+def _date(numbers: tuple):
+    """
+    The year of three numbers that could be a day, month and year in any
+    order, or None if they can't be
+    """
+    first, middle, last = numbers
+    if not 1 <= middle <= 31:
+        return None
+    for number in (first, last):
+        if 99 < number < DATE_MIN_YEAR or number > DATE_MAX_YEAR:
+            return None
+    # the middle is a day or month, so the others can't both be over 31 or
+    # under 1, or all three over 12
+    if (
+        first > 31
+        and last > 31
+        or first <= 0
+        and last <= 0
+        or first > 12
+        and middle > 12
+        and last > 12
+    ):
+        return None
+
+    # the year is last or first
+    if DATE_MIN_YEAR <= last <= DATE_MAX_YEAR:
+        # a four digit year, so the rest has to be a day and month
+        return last if _day_and_month(first, middle) else None
+    if DATE_MIN_YEAR <= first <= DATE_MAX_YEAR:
+        return first if _day_and_month(middle, last) else None
+    if _day_and_month(first, middle):
+        return _two_to_four_digit_year(last)
+    if _day_and_month(middle, last):
+        return _two_to_four_digit_year(first)
+    return None
+
+
+def _year_guesses(year: int) -> int:
+    return max(abs(year - REFERENCE_YEAR), MIN_YEAR_SPACE)
+
+
+# the entropy of a date without separators in each year it can be in
+DATE_ENTROPIES = {
+    year: math.log2(_year_guesses(year) * 365)
+    for year in range(DATE_MIN_YEAR, DATE_MAX_YEAR + 1)
+}
+
+
+def _date_entropy(numbers: tuple) -> float:
+    """
+    The entropy of three numbers as a date without separators, or infinity
+    if they can't be a date
+    """
+    return DATE_ENTROPIES.get(_date(numbers), math.inf)
+
+
+@functools.lru_cache(maxsize=256)
+def _run_dates(digits: str) -> tuple:
+    """
+    The dates without separators in a run of digits, for each length of
+    DATE_SPLITS the entropy of the date nearest to the reference year from
+    each start, or infinity where there isn't one
+    """
+    length = len(digits)
+    # the number of each size at each position, read once for every date
+    numbers = {
+        size: [int(digits[i : i + size]) for i in range(length - size + 1)]
+        for size in range(1, 5)
+    }
+    # and whether each can be first or last, a year or a day or month
+    ends = {
+        size: [
+            number <= 99 or DATE_MIN_YEAR <= number <= DATE_MAX_YEAR
+            for number in sizes
+        ]
+        for size, sizes in numbers.items()
+    }
+    inf = math.inf
+    return tuple(
+        tuple(
+            map(
+                min,
+                *(
+                    # most can't be dates, so are ruled out before looking
+                    [
+                        _date_entropy((first, middle, last))
+                        if first_end and last_end and 1 <= middle <= 31
+                        else inf
+                        for first, middle, last, first_end, last_end in zip(
+                            numbers[i],
+                            numbers[j - i][i:],
+                            numbers[size - j][j:],
+                            ends[i],
+                            ends[size - j][j:],
+                        )
+                    ]
+                    for i, j in splits
+                ),
+            )
+        )
+        for size, splits in DATE_SPLITS.items()
+    )
+
+
+class PatternEstimator:
+    """
+    Estimate entropy from the patterns in a password, see the module docstring
+
+    :param dictionaries: ranked lists of words, most common first, by name,
+                         COMMON_PASSWORDS and COMMON_WORDS by default
+    :type: dict(str, list(str))
+    """
+
+    def __init__(self, dictionaries: dict = None):
+        if dictionaries is None:
+            dictionaries = {
+                "passwords": COMMON_PASSWORDS.split(),
+                "words": COMMON_WORDS.split(),
+            }
+        self.dictionaries = dictionaries
+
+        # a trie of every word, lowercase, each node is a dict of character to
+        # the next node, and "" to the best rank of a word that ends there
+        self.trie = {}
+        for words in dictionaries.values():
+            for rank, word in enumerate(words, 1):
+                assert isinstance(word, str), "all words must be strings"
+                node = self.trie
+                for character in word.lower():
+                    node = node.setdefault(character, {})
+                if rank < node.get("", rank + 1):
+                    node[""] = rank
+        # the most characters of a word, the depth of the trie
+        self.longest = max(
+            (len(word.lower()) for words in dictionaries.values() for word in words),
+            default=0,
+        )
+
+        self.graphs = (KeyboardGraph.slanted(QWERTY), KeyboardGraph.aligned(KEYPAD))
+
+    def __reduce__(self):
+        # the default estimator is built again rather than its dictionaries
+        # pickled, e.g. for a policy sent to another process
+        if self is default_estimator():
+            return default_estimator, ()
+        return PatternEstimator, (self.dictionaries,)
+
+    def entropy(self, password: str, character_pool=None) -> float:
+        """
+        The entropy of a password, log base 2 of the fewest guesses to find it
+
+        :param password: the password
+        :type: str
+
+        :param character_pool: the pool of characters, for the characters that
+                               are guessed by brute force
+        :type: CharacterPool
+
+        :return: the entropy
+        :type: float
+        """
+        return self._estimate(password, character_pool)[0]
+
+    def match_sequence(self, password: str, character_pool=None) -> list:
+        """
+        The patterns of the password that take the fewest guesses, in order,
+        where the characters between patterns are a "bruteforce" Match
+
+        :param password: the password
+        :type: str
+
+        :param character_pool: the pool of characters
+        :type: CharacterPool
+
+        :return: the matches
+        :type: list(Match)
+        """
+        return self._estimate(password, character_pool)[1]
+
+    def _estimate(self, password: str, character_pool) -> tuple:
+        pool = DEFAULT_CHARACTER_POOL if character_pool is None else character_pool
+        analysis = pool.analyse(password)
+        if analysis.unknown:
+            raise UnacceptableCharacters(
+                f"You can only use characters from the character pool, "
+                f"which are: {pool.all}"
+            )
+        if not password:
+            return 0.0, []
+        # the guesses of a character, as the "normal" method
+        bruteforce = math.log2(pool.mask_sizes[analysis.mask] or 1)
+        estimated = password[:MAX_ESTIMATED_LENGTH]
+        starting = _by_start(self._matches(estimated), len(estimated), bruteforce)
+        repeats = self._repeat_matches(
+            estimated, 0, len(estimated), starting, bruteforce
+        )
+        entropy, sequence = self._minimum_guesses(
+            starting, 0, len(estimated), bruteforce, repeats
+        )
+        if len(password) > len(estimated):
+            entropy += bruteforce * (len(password) - len(estimated))
+            start = len(estimated)
+            if sequence[-1].pattern == "bruteforce":
+                start = sequence.pop().start
+            sequence.append(_bruteforce_match(start, len(password), bruteforce))
+        return entropy, sequence
+
+    def _matches(self, password: str):
+        """every pattern but repeats, as (pattern, start, end, entropy)"""
+        yield from self._dictionary_matches(password)
+        yield from self._sequence_matches(password)
+        yield from self._date_matches(password)
+        for graph in self.graphs:
+            yield from self._keyboard_matches(password, graph)
+
+    def _minimum_guesses(
+        self,
+        starting: list,
+        start: int,
+        end: int,
+        bruteforce: float,
+        repeats: list = (),
+    ) -> tuple:
+        """
+        log base 2 of the fewest guesses of the password from start to end,
+        and its patterns, from the patterns found in it (see _by_start) and
+        the repeats in it
+
+        The best decomposition with a given number of patterns is found for
+        every prefix. A decomposition of l patterns can be in any order of
+        them, so it takes l! times the guesses of its patterns.
+        """
+        length = end - start
+        if repeats:
+            starting = [
+                found + repeated
+                for found, repeated in zip(
+                    starting, _by_start(repeats, end, bruteforce)
+                )
+            ]
+
+        # the decompositions of every prefix, as log2 guesses by number of
+        # patterns, and the match each ends with, or none when it ends with a
+        # character guessed by brute force
+        rows = [{} for _ in range(length + 1)]
+        rows[0][0] = 0.0
+        back = [{} for _ in range(length + 1)]
+        inf = math.inf
+        # the guesses of a pattern of the whole password, nothing that takes
+        # more before the password ends can do better
+        bound = inf
+        for position in range(length + 1):
+            row = rows[position]
+            # a decomposition with more patterns is only worth keeping when it
+            # would take fewer guesses if the password ended here, as however
+            # many patterns follow there are more orders of its patterns
+            kept = []
+            lowest = inf if position == length else bound
+            for patterns in sorted(row):
+                cost = row[patterns]
+                if cost + LOG2_ORDERS[patterns] < lowest:
+                    lowest = cost + LOG2_ORDERS[patterns]
+                    kept.append((patterns, cost))
+            # and only the ones that take the fewest guesses so far, the rest
+            # are very unlikely to catch up
+            del kept[:-MAX_DECOMPOSITIONS]
+            if position == length:
+                break
+            if not kept:
+                continue
+
+            # the patterns that start here
+            for match_end, entropy, match in starting[start + position]:
+                if match_end > end:
+                    continue
+                characters = match_end - start - position
+                if characters == length:
+                    # the whole password, so as few guesses as it takes
+                    entropy = match[3]
+                    bound = min(bound, entropy)
+                elif entropy >= bruteforce * characters:
+                    continue
+                following = rows[match_end - start]
+                lookup = following.get
+                steps = back[match_end - start]
+                for patterns, cost in kept:
+                    cost += entropy
+                    patterns += 1
+                    if cost < lookup(patterns, inf):
+                        following[patterns] = cost
+                        steps[patterns] = match
+            # the next character guessed by brute force, rather than a pattern
+            # that takes as many guesses
+            following = rows[position + 1]
+            lookup = following.get
+            steps = back[position + 1]
+            for patterns, cost in kept:
+                cost += bruteforce
+                if cost <= lookup(patterns, inf):
+                    following[patterns] = cost
+                    steps.pop(patterns, None)
+
+        # l! orders of l patterns
+        patterns, entropy = min(
+            ((patterns, cost + LOG2_ORDERS[patterns]) for patterns, cost in kept),
+            key=lambda item: item[1],
+        )
+
+        # walk back through the best decomposition
+        rv = []
+        position = length
+        bruteforce_end = None
+        while position:
+            match = back[position].get(patterns)
+            if match is None:
+                if bruteforce_end is None:
+                    bruteforce_end = position
+                position -= 1
+                continue
+            if bruteforce_end is not None:
+                rv.append(
+                    _bruteforce_match(
+                        start + position, start + bruteforce_end, bruteforce
+                    )
+                )
+                bruteforce_end = None
+            patterns -= 1
+            rv.append(Match(*match))
+            position = match[1] - start
+        if bruteforce_end is not None:
+            rv.append(_bruteforce_match(start, start + bruteforce_end, bruteforce))
+        rv.reverse()
+        return entropy, rv
+
+    def _dictionary_matches(self, password: str):
+        """words of the dictionaries, in any case and with l33t substitutions"""
+        lowered = [character.lower() for character in password]
+        length = len(password)
+        # the number of uppercase characters, and letters that could have been
+        # substituted, before each position
+        uppercase = [0]
+        substitutable = [0]
+        for character, lower in zip(password, lowered):
+            uppercase.append(uppercase[-1] + character.isupper())
+            substitutable.append(substitutable[-1] + (lower in L33T_LETTERS))
+        # the letters each character could be
+        letters = [L33T_CHOICES.get(character) for character in lowered]
+        # the words from a position only depend on the characters up to the
+        # longest word, so each is only looked for once, e.g. in repeats
+        found = {}
+        for start in range(length):
+            window = password[start : start + self.longest]
+            words = found.get(window)
+            if words is None:
+                words = found[window] = []
+                # every node reached, with its number of substitutions
+                nodes = [(self.trie, 0)]
+                for end in range(start + 1, length + 1):
+                    character = lowered[end - 1]
+                    substitutions = letters[end - 1]
+                    if substitutions is None:
+                        nodes = [
+                            (node[character], substituted)
+                            for node, substituted in nodes
+                            if character in node
+                        ]
+                    else:
+                        nodes = [
+                            (node[letter], substituted + (letter != character))
+                            for node, substituted in nodes
+                            for letter in substitutions
+                            if letter in node
+                        ]
+                    if not nodes:
+                        break
+
+                    # the fewest guesses of the words that end here
+                    guesses = None
+                    for node, substituted in nodes:
+                        rank = node.get("")
+                        if rank is None:
+                            continue
+                        if substituted:
+                            rank *= _variations(
+                                substituted,
+                                substitutable[end] - substitutable[start],
+                            )
+                        if guesses is None or rank < guesses:
+                            guesses = rank
+                    if guesses is not None:
+                        if uppercase[end] != uppercase[start]:
+                            guesses *= _uppercase_variations(password[start:end])
+                        words.append((end - start, math.log2(guesses)))
+            for characters, entropy in words:
+                yield ("dictionary", start, start + characters, entropy)
+
+    def _repeat_matches(
+        self, password: str, start: int, end: int, starting: list, bruteforce: float
+    ) -> list:
+        """
+        Bases repeated more than once from start to end, guessed as the base
+        and the number of times it's repeated
+
+        From the first position that starts a repeat, the repeat that covers
+        the most characters is taken (with the shortest base, e.g. "ab" rather
+        than "abab" in "abababab"), then the search carries on after it. The
+        guesses of a base are from the patterns found in it, and the repeats
+        in it.
+        """
+        # the positions of each character, a repeat of a base of length n at
+        # a position needs the same character n characters later
+        positions = {}
+        for position in range(start, end):
+            positions.setdefault(password[position], []).append(position)
+
+        rv = []
+        while start < end - 1:
+            span = 0
+            base = 0
+            for later in positions[password[start]]:
+                length = later - start
+                if length <= 0:
+                    continue
+                if start + 2 * length > end:
+                    break
+                piece = password[start:later]
+                stop = later + length
+                while stop <= end and password[stop - length:stop] == piece:
+                    stop += length
+                if stop - length - start > span:
+                    span = stop - length - start
+                    base = length
+            if span <= base:
+                start += 1
+                continue
+            inner = self._repeat_matches(
+                password, start, start + base, starting, bruteforce
+            )
+            base_entropy, _ = self._minimum_guesses(
+                starting, start, start + base, bruteforce, inner
+            )
+            rv.append(
+                ("repeat", start, start + span, base_entropy + math.log2(span // base))
+            )
+            start += span
+        return rv
+
+    def _sequence_matches(self, password: str):
+        """characters that go up or down by the same amount, e.g. "abcd" """
+        length = len(password)
+        start = 0
+        while start < length - 2:
+            delta = ord(password[start + 1]) - ord(password[start])
+            end = start + 2
+            while end < length and ord(password[end]) - ord(password[end - 1]) == delta:
+                end += 1
+            if end - start >= 3 and 0 < abs(delta) <= MAX_SEQUENCE_DELTA:
+                first = password[start]
+                if first in "aAzZ019":
+                    guesses = 4
+                elif first.isdigit():
+                    guesses = 10
+                else:
+                    guesses = 26
+                if delta < 0:
+                    guesses *= 2
+                yield ("sequence", start, end, math.log2(guesses * (end - start)))
+            # the last character can start the next sequence
+            start = end - 1
+
+    def _date_matches(self, password: str):
+        """dates, with or without separators, and recent years"""
+        # runs of digits, with a date of 4 to 8 digits anywhere in them
+        for run in re.finditer(r"[0-9]{4,}", password):
+            offset = run.start()
+            for size, entropies in zip(DATE_SPLITS, _run_dates(run.group(0))):
+                for start, entropy in enumerate(entropies, offset):
+                    if entropy < math.inf:
+                        yield ("date", start, start + size, entropy)
+
+        for match in DATE_WITH_SEPARATOR.finditer(password):
+            numbers = tuple(int(match.group(i)) for i in (2, 4, 5))
+            year = _date(numbers)
+            if year is not None:
+                start = match.start()
+                # the separator could be any of a few
+                yield (
+                    "date",
+                    start,
+                    start + len(match.group(1)),
+                    math.log2(_year_guesses(year) * 365 * 4),
+                )
+
+        for match in RECENT_YEAR.finditer(password):
+            start = match.start()
+            year = int(match.group(1))
+            yield ("year", start, start + 4, math.log2(_year_guesses(year)))
+
+    def _keyboard_matches(self, password: str, graph: KeyboardGraph):
+        """walks of at least 3 neighbouring keys, e.g. "qwerty" or "zaq1" """
+        neighbours = graph.neighbours
+        length = len(password)
+        start = 0
+        while start < length - 2:
+            shifted = 1 if password[start] in graph.shifted else 0
+            turns = 0
+            direction = None
+            end = start + 1
+            while end < length:
+                step = neighbours.get(password[end - 1], NO_NEIGHBOURS).get(
+                    password[end]
+                )
+                if step is None:
+                    break
+                if step[0] != direction:
+                    turns += 1
+                    direction = step[0]
+                shifted += step[1]
+                end += 1
+            if end - start >= 3:
+                entropy = graph.entropy(end - start, turns, shifted)
+                yield ("keyboard", start, end, entropy)
+            # a walk from any key before end would stop at end too
+            start = end
+
+
+def _by_start(matches, length: int, bruteforce: float) -> list:
+    """
+    The matches that start at each position of a password of a length, as
+    (end, log2 guesses, match) with at least the guesses of any pattern of
+    its length, when it takes fewer guesses than its characters by brute force
+    """
+    rv = [[] for _ in range(length)]
+    for match in matches:
+        _, start, end, entropy = match
+        # a pattern is only ever used when it takes fewer guesses than its
+        # characters by brute force
+        if entropy < bruteforce * (end - start):
+            if end - start == 1:
+                least = LOG2_MIN_GUESSES_SINGLE_CHARACTER
+            else:
+                least = LOG2_MIN_GUESSES_MULTIPLE_CHARACTERS
+            rv[start].append((end, entropy if entropy > least else least, match))
+    return rv
+
+
+def _bruteforce_match(start: int, end: int, bruteforce: float) -> Match:
+    return Match("bruteforce", start, end, bruteforce * (end - start))
+
+
+@functools.lru_cache(maxsize=None)
+def default_estimator() -> PatternEstimator:
+    """the estimator of the built in dictionaries, built the first time"""
+    return PatternEstimator()
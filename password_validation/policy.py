@@ -1,42 +1,185 @@
+import enum
+import functools
 import operator
+import time
 import typing
+from collections import Counter
 from typing import Any
 
+if typing.TYPE_CHECKING:
+    import concurrent.futures
+
 from password_validation.character_pool import CharacterPool
+from password_validation.character_pool import CharacterRanges
+from password_validation.character_pool import DEFAULT_CHARACTER_POOL
+from password_validation.character_pool import MASK_INDICES
+from password_validation.character_pool import NUMBER_OF_MASKS
 from password_validation.funcs import greater_than_or_equal_to
 from password_validation.funcs import less_than_or_equal_to
+from password_validation.automaton import AhoCorasick
+from password_validation.bloom import BloomFilter
+from password_validation.cache import ResultCache
+from password_validation.cache import policy_changed
+from password_validation.breach import BreachedPasswords
 from password_validation.calculate import Classifier
+from password_validation.calculate import calculate_entropy_table
+from password_validation.calculate import calculate_minimum_lengths
+from password_validation.calculate import log2_power
 from password_validation.funcs import not_in
+from password_validation.instrumentation import Instrumentation
 from password_validation.password import Password
+from password_validation.markov import MarkovModel
+from password_validation.markov import default_model
+from password_validation.patterns import default_estimator
 
 
-def _make_password(password):
+def _make_password(password, character_pool=None):
     if isinstance(password, str):
-        return Password(password)
+        return Password(password, character_pool=character_pool)
     elif isinstance(password, Password):
         return password
     else:
         raise ValueError("password must be str or Password")
 
 
+def _counts_changes(method):
+    @functools.wraps(method)
+    def changes(self, *args, **kwargs):
+        self.version += 1
+        policy_changed()
+        return method(self, *args, **kwargs)
+
+    return changes
+
+
+class WordList(list):
+    """
+    A policy's own list of forbidden words, that counts every change to it in
+    its version, so cached results can be thrown away when a word is added,
+    removed or replaced
+    """
+
+    version = 0
+
+    append = _counts_changes(list.append)
+    extend = _counts_changes(list.extend)
+    insert = _counts_changes(list.insert)
+    remove = _counts_changes(list.remove)
+    pop = _counts_changes(list.pop)
+    clear = _counts_changes(list.clear)
+    sort = _counts_changes(list.sort)
+    reverse = _counts_changes(list.reverse)
+    __setitem__ = _counts_changes(list.__setitem__)
+    __delitem__ = _counts_changes(list.__delitem__)
+    __iadd__ = _counts_changes(list.__iadd__)
+    __imul__ = _counts_changes(list.__imul__)
+
+
+class RequirementCode(enum.IntFlag):
+    """
+    One bit for each requirement, a password's code is the bits of the
+    requirements it doesn't fulfil, see PasswordPolicy.check_code.
+
+    The values are stable, new requirements only ever get new bits.
+    """
+
+    LOWERCASE = 1 << 0
+    UPPERCASE = 1 << 1
+    NUMBERS = 1 << 2
+    SYMBOLS = 1 << 3
+    WHITESPACE = 1 << 4
+    OTHER = 1 << 5
+    MIN_LENGTH = 1 << 6
+    MAX_LENGTH = 1 << 7
+    ENTROPY = 1 << 8
+    FORBIDDEN_WORDS = 1 << 9
+    BREACHED_PASSWORDS = 1 << 10
+
+
+# the codes in the same order as the requirements in test_password
+REQUIREMENT_CODES = tuple(RequirementCode)
+# and as plain ints, which are quicker to test than the flags
+REQUIREMENT_BITS = tuple(int(code) for code in REQUIREMENT_CODES)
+# the name of each requirement, e.g. "min_length"
+REQUIREMENT_NAMES = tuple(code.name.lower() for code in REQUIREMENT_CODES)
+# the order test_password(fail_fast=True) checks the requirements in
+FAIL_FAST_ORDER = (
+    RequirementCode.MIN_LENGTH,
+    RequirementCode.MAX_LENGTH,
+    RequirementCode.LOWERCASE,
+    RequirementCode.UPPERCASE,
+    RequirementCode.NUMBERS,
+    RequirementCode.SYMBOLS,
+    RequirementCode.WHITESPACE,
+    RequirementCode.OTHER,
+    RequirementCode.ENTROPY,
+    RequirementCode.FORBIDDEN_WORDS,
+    RequirementCode.BREACHED_PASSWORDS,
+)
+FAIL_FAST_BITS = tuple(int(code) for code in FAIL_FAST_ORDER)
+# the number of requirements before the heavy ones (the forbidden words and
+# breached passwords) in test_password
+CHEAP_REQUIREMENTS = 9
+# the most forbidden words in a list to check without an executor
+INLINE_FORBIDDEN_WORDS = 1024
+
+
+def _test_requirements(validity) -> list:
+    return [requirement.test(actual) for requirement, actual in validity]
+
+
+def _run_checks(checks) -> list:
+    return [bool(func(argument)) for func, argument in checks]
+
+
 class PasswordRequirement:
+    """
+    The result of testing a password against a requirement.
+
+    Whether the requirement is fulfilled is worked out once, when the result is
+    made. The human readable statement is only made when it is asked for.
+    """
+
+    __slots__ = ("name", "requirement", "actual", "func", "fulfilled")
+
     def __init__(
-        self, name: str, actual: Any, requirement: Any, func: operator,
+        self,
+        name: str,
+        actual: Any,
+        requirement: Any,
+        func: operator,
+        fulfilled: bool = None,
     ):
         self.name = name
         self.requirement = requirement
         self.actual = actual
         self.func = func
+        # it can be given when it is already known, e.g. from a cached code
+        if fulfilled is None:
+            self.fulfilled = bool(func(actual, requirement))
+        else:
+            self.fulfilled = fulfilled
 
     def __bool__(self):
-        return self.func(self.actual, self.requirement)
+        return self.fulfilled
+
+    @property
+    def statement(self) -> str:
+        """the requirement as a statement, e.g. 5 >= 12"""
+        return self.func.format_statement(x=self.actual, y=self.requirement)
+
+    @property
+    def message(self) -> str:
+        """a human readable message, e.g. for showing to a user"""
+        return (
+            f"{self.name} {'' if self else 'not '}satisfied: "
+            f"expected: {self.requirement}, got: {self.actual}"
+        )
 
     def __repr__(self):
         message = (
             f"<Requirement{'F' if self else 'Unf'}ulfilled('{self.name}', "
-            f"statement=({self.func.format_statement(x=self.actual, y=self.requirement)}))>"
-            # f"expected={self.requirement}, got={self.actual}, "
-            # f"operation={self.func.__qualname__}({self.actual}, {self.requirement}))>"
+            f"statement=({self.statement}))>"
         )
         return message
 
@@ -57,10 +200,33 @@ class MakePasswordRequirement:
         else:
             self.cls = cls
 
+    def __setattr__(self, name, value):
+        # e.g. a threshold, so cached results are thrown away
+        super().__setattr__(name, value)
+        policy_changed()
+
     def __call__(self, actual):
         cls = self.cls(self.name, actual, self.requirement, self.func)
         return cls
 
+    def test(self, actual) -> bool:
+        """whether the actual value fulfils the requirement, without making one"""
+        if self.cls is PasswordRequirement:
+            return self.func(actual, self.requirement)
+        return bool(self(actual))
+
+    def result(self, actual, fulfilled: bool):
+        """
+        The result for an actual value when whether it fulfils the requirement
+        is already known, so it isn't tested again (unless the requirement has
+        a custom class)
+        """
+        if self.cls is PasswordRequirement:
+            return PasswordRequirement(
+                self.name, actual, self.requirement, self.func, fulfilled
+            )
+        return self(actual)
+
 
 class PasswordPolicy:
     """
@@ -82,8 +248,34 @@ class PasswordPolicy:
                              password
     :param min_length (int): the minimum length for a password
     :param max_length (int): the maximum length for a password
-    :param forbidden_words (list(str)): a list of forbidden words as strings
+    :param forbidden_words (list(str) or BloomFilter or str): a list of
+                                                            forbidden words as
+                                                            strings, or a Bloom
+                                                            filter of them, or
+                                                            a path to a Bloom
+                                                            filter file
     :param character_pool (CharacterPool): the pool or characters to pick from
+    :param forbidden_words_match (str): "exact" to forbid passwords that are a
+                                        forbidden word, or "substring" to
+                                        forbid passwords that contain one
+                                        (case-insensitive), the forbidden
+                                        words are then a tuple that can't be
+                                        changed
+    :param breached_passwords (BreachedPasswords or str): breached passwords,
+                                                          or a path to a
+                                                          breach file, that
+                                                          passwords must not be
+    :param entropy_method (str): "normal" for the entropy of the classes of
+                                 character and the length of a password,
+                                 "pattern" to estimate it from the patterns in
+                                 the password, e.g. words, dates and keyboard
+                                 walks (see patterns.PatternEstimator), or
+                                 "markov" to estimate it from a Markov model
+                                 of characters (see markov.MarkovModel)
+    :param markov_model (MarkovModel or str): the model, or a path to a model
+                                              file, for the "markov"
+                                              entropy_method, a small default
+                                              model if not given
     """
 
     def __init__(
@@ -97,14 +289,18 @@ class PasswordPolicy:
         min_length: int = 12,
         max_length: int = 128,
         min_entropy: typing.Union[int, float] = 32,
-        forbidden_words: list = None,
+        forbidden_words: typing.Union[list, BloomFilter, str] = None,
         character_pool: CharacterPool = None,
         requirement_cls: PasswordRequirement = None,
         classifier: Classifier = None,
+        forbidden_words_match: str = "exact",
+        breached_passwords: typing.Union[BreachedPasswords, str] = None,
+        entropy_method: str = "normal",
+        markov_model: typing.Union[MarkovModel, str] = None,
     ):
         # set character pool if not passed
         if character_pool is None:
-            self.pool = CharacterPool()
+            self.pool = DEFAULT_CHARACTER_POOL
         else:
             self.pool = character_pool
 
@@ -258,12 +454,87 @@ class PasswordPolicy:
             "entropy", self.min_entropy, cls=requirement_cls
         )
 
-        self.forbidden_words = forbidden_words if forbidden_words else []
-        assert isinstance(self.forbidden_words, list), "forbidden words must be a list"
-        for word in self.forbidden_words:
-            assert isinstance(word, str), "all forbidden words must be strings"
+        # "normal" entropy only depends on the classes of character in a
+        # password and its length, so work it out up front for every class
+        # mask and every length up to the max_length
+        self.entropy_table = calculate_entropy_table(self.pool, self.max_length)
+        # and the shortest password for every class mask that has enough entropy
+        self.min_length_for_mask = calculate_minimum_lengths(
+            self.pool, self.min_entropy
+        )
+
+        assert entropy_method in ("normal", "pattern", "markov"), (
+            'entropy_method must be either "normal", "pattern" or "markov"'
+        )
+        self.entropy_method = entropy_method
+        # open the Markov model file if given a path, it is memory mapped
+        if isinstance(markov_model, str):
+            markov_model = MarkovModel.open(markov_model)
+        assert markov_model is None or isinstance(markov_model, MarkovModel), (
+            "markov_model must be a MarkovModel or a path to a model file"
+        )
+        assert markov_model is None or entropy_method == "markov", (
+            'a markov_model is only used by the "markov" entropy_method'
+        )
+        self.markov_model = markov_model
+        # the pattern and Markov entropy of a password can only be worked out
+        # from all of its characters, so the tables above are only for "normal"
+        if self.entropy_method == "pattern":
+            self.estimator = default_estimator()
+        elif self.entropy_method == "markov":
+            self.estimator = (
+                default_model() if self.markov_model is None else self.markov_model
+            )
+        else:
+            self.estimator = None
+
+        # open the Bloom filter file if given a path, it is memory mapped
+        if isinstance(forbidden_words, str):
+            forbidden_words = BloomFilter.open(forbidden_words)
+        # an empty BloomFilter is falsy, but is still the words to use
+        self.forbidden_words = [] if forbidden_words is None else forbidden_words
+        assert isinstance(
+            self.forbidden_words, (list, BloomFilter)
+        ), "forbidden words must be a list or a BloomFilter"
+        if isinstance(self.forbidden_words, list):
+            # a copy, so the words can only be changed through the policy,
+            # which notices
+            self.forbidden_words = WordList(self.forbidden_words)
+            for word in self.forbidden_words:
+                assert isinstance(word, str), "all forbidden words must be strings"
+        assert forbidden_words_match in ("exact", "substring"), (
+            'forbidden_words_match must be either "exact" or "substring"'
+        )
+        assert forbidden_words_match == "exact" or isinstance(
+            self.forbidden_words, list
+        ), 'a BloomFilter of forbidden words only supports "exact" matching'
+
+        self.forbidden_words_match = forbidden_words_match
+        # for substring matching, build an automaton of the words once, then
+        # "password not in automaton" is whether no word is in the password
+        if self.forbidden_words_match == "substring":
+            # and as it isn't built again, the words are a tuple so they can't
+            # be changed, a new policy is needed for other words
+            self.forbidden_words = tuple(self.forbidden_words)
+            forbidden = AhoCorasick(self.forbidden_words)
+        else:
+            forbidden = self.forbidden_words
         self.forbidden_words_requirements = MakePasswordRequirement(
-            "forbidden words", self.forbidden_words, cls=requirement_cls, func=not_in,
+            "forbidden words", forbidden, cls=requirement_cls, func=not_in,
+        )
+
+        # open the breach file if given a path, it is memory mapped
+        if isinstance(breached_passwords, str):
+            breached_passwords = BreachedPasswords.open(breached_passwords)
+        assert breached_passwords is None or isinstance(
+            breached_passwords, BreachedPasswords
+        ), "breached passwords must be BreachedPasswords or a path to a breach file"
+        self.breached_passwords = breached_passwords
+        self.breached_passwords_requirement = MakePasswordRequirement(
+            "breached passwords",
+            self.breached_passwords,
+            cls=requirement_cls,
+            func=not_in,
         )
 
         # set a classifier if not passed
@@ -281,6 +552,17 @@ class PasswordPolicy:
         # set a classification level from the entropy value
         self.classification = self.classifier.classify(self.min_entropy)
 
+        # nothing is recorded until instrumentation is asked for, see instrument
+        self.instrumentation = None
+        # nothing is cached until asked for, see cache_results
+        self.result_cache = None
+
+    def __setattr__(self, name, value):
+        # e.g. another list of forbidden words, so cached results are thrown
+        # away
+        super().__setattr__(name, value)
+        policy_changed()
+
     def to_dict(self) -> dict:
         rv = {
             "lowercase": self.lowercase,
@@ -292,27 +574,899 @@ class PasswordPolicy:
             "min_length": self.min_length,
             "max_length": self.max_length,
             "entropy": self.min_entropy,
-            "forbidden_words": self.forbidden_words,
+            "forbidden_words": (
+                self.forbidden_words.path
+                if isinstance(self.forbidden_words, BloomFilter)
+                and self.forbidden_words.path is not None
+                else self.forbidden_words
+                if isinstance(self.forbidden_words, (list, BloomFilter))
+                # e.g. the sorted words of a shared policy
+                else list(self.forbidden_words)
+            ),
+            "forbidden_words_match": self.forbidden_words_match,
+            "entropy_method": self.entropy_method,
+            "markov_model": (
+                None if self.markov_model is None else self.markov_model.path
+            ),
+            "breached_passwords": (
+                None
+                if self.breached_passwords is None
+                else self.breached_passwords.path
+            ),
             "classification": self.classification,
             "character_pool": self.pool.to_dict(),
         }
         return rv
 
-    def test_password(self, password: str, failures_only: bool = True):
-        password = _make_password(password)
-        validity = [
-            self.lowercase_requirement(password.lowercase),
-            self.uppercase_requirement(password.uppercase),
-            self.numbers_requirement(password.numbers),
-            self.symbols_requirement(password.symbols),
-            self.whitespace_requirement(password.whitespace),
-            self.other_requirement(password.other),
-            self.min_length_requirement(password.length),
-            self.max_length_requirement(password.length),
-            self.entropy_requirement(password.entropy),
-            self.forbidden_words_requirements(password.password),
+    def __getstate__(self) -> dict:
+        # the entropy tables are cached for each pool, so rather than pickle
+        # them they are looked up (or worked out) again when unpickled
+        state = self.__dict__.copy()
+        del state["entropy_table"]
+        del state["min_length_for_mask"]
+        # instrumentation and cached results belong to a process
+        state["instrumentation"] = None
+        state["result_cache"] = None
+        return state
+
+    def __setstate__(self, state: dict):
+        self.__dict__.update(state)
+        self.entropy_table = calculate_entropy_table(self.pool, self.max_length)
+        self.min_length_for_mask = calculate_minimum_lengths(
+            self.pool, self.min_entropy
+        )
+
+    @classmethod
+    def from_dict(cls, policy: dict, **kwargs):
+        """
+        Make a policy from a dict like the one to_dict returns, e.g. loaded
+        from a JSON or TOML file
+
+        Every key is optional. The classification is worked out from the
+        entropy, so it is ignored. The character pool's classes can be strings
+        or lists of characters.
+
+        :param policy: the policy
+        :type: dict
+
+        :param kwargs: any other arguments for the policy, e.g. classifier
+
+        :return: the policy
+        :type: PasswordPolicy
+        """
+        policy = dict(policy)
+        policy.pop("classification", None)
+        if "entropy" in policy:
+            policy["min_entropy"] = policy.pop("entropy")
+        character_pool = policy.pop("character_pool", None)
+        if character_pool is not None:
+            policy["character_pool"] = CharacterPool(
+                **{
+                    name: characters
+                    if isinstance(characters, CharacterRanges)
+                    else "".join(characters)
+                    for name, characters in character_pool.items()
+                }
+            )
+        return cls(**policy, **kwargs)
+
+    def instrument(self, instrumentation: Instrumentation = None) -> Instrumentation:
+        """
+        Record the requirements evaluated by test_password and the time taken
+        by each part of it and of validate, see Instrumentation
+
+        Set policy.instrumentation to None to stop. Compiled policies (see
+        compile) and the async methods aren't instrumented.
+
+        :param instrumentation: where to record, a new Instrumentation by
+                                default
+        :type: Instrumentation
+
+        :return: the instrumentation
+        :type: Instrumentation
+        """
+        if instrumentation is None:
+            instrumentation = Instrumentation()
+        self.instrumentation = instrumentation
+        return instrumentation
+
+    def cache_results(self, maxsize: int = 1024, ttl: float = None) -> ResultCache:
+        """
+        Cache the results of test_password, check_code and validate for
+        passwords as str, see ResultCache
+
+        Set policy.result_cache to None to stop.
+
+        :param maxsize: the most passwords to keep
+        :type: int
+
+        :param ttl: the seconds to keep a password for, forever by default
+        :type: float
+
+        :return: the cache
+        :type: ResultCache
+        """
+        self.result_cache = ResultCache(self, maxsize, ttl)
+        return self.result_cache
+
+    def _requirements(self) -> tuple:
+        return (
+            self.lowercase_requirement,
+            self.uppercase_requirement,
+            self.numbers_requirement,
+            self.symbols_requirement,
+            self.whitespace_requirement,
+            self.other_requirement,
+            self.min_length_requirement,
+            self.max_length_requirement,
+            self.entropy_requirement,
+            self.forbidden_words_requirements,
+            self.breached_passwords_requirement,
+        )
+
+    def _fingerprint(self) -> tuple:
+        """
+        Changes when a requirement changes, e.g. a threshold, or forbidden
+        words are added, removed or replaced, so cached results can be thrown
+        away
+        """
+        rv = [self.pool, id(self.estimator)]
+        for requirement in self._requirements():
+            value = requirement.requirement
+            if isinstance(value, WordList):
+                value = (id(value), value.version)
+            elif not (value is None or isinstance(value, (int, float))):
+                # words that can't change, e.g. an automaton or BloomFilter
+                value = id(value)
+            rv.append((id(requirement), requirement.func, requirement.cls, value))
+        return tuple(rv)
+
+    def entropy(self, password: Password) -> float:
+        """
+        The entropy of a password, looked up from the entropy table when the
+        password was analysed with this policy's pool, or from its patterns or
+        a Markov model when the entropy_method is "pattern" or "markov"
+
+        A password longer than the max_length fails anyway, so its entropy is
+        never estimated, it is the "normal" entropy.
+
+        :param password: the password
+        :type: Password
+
+        :return: the entropy of the password
+        :type: float
+        """
+        if self.estimator is not None and password.length <= self.max_length:
+            return self.estimator.entropy(password.password, password.pool)
+        if password.pool is self.pool and password.length <= self.max_length:
+            return self.entropy_table[password.mask][password.length]
+        return password.entropy
+
+    def test_password(
+        self, password: str, failures_only: bool = True, fail_fast: bool = False
+    ):
+        """
+        Test a password against every requirement of the policy
+
+        :param password: the password
+        :type: str or Password
+
+        :param failures_only: only return the unfulfilled requirements
+        :type: bool
+
+        :param fail_fast: stop at the first unfulfilled requirement, checking
+                          the cheapest requirements first, and only return
+                          that one (failures_only is then ignored)
+        :type: bool
+
+        :return: the requirements
+        :type: list
+        """
+        if self.result_cache is not None and isinstance(password, str):
+            return self.result_cache.test_password(password, failures_only, fail_fast)
+        return self._test_password(password, failures_only, fail_fast)
+
+    def _test_password(
+        self, password: str, failures_only: bool = True, fail_fast: bool = False
+    ) -> list:
+        if self.instrumentation is not None:
+            return self._instrumented_test_password(password, failures_only, fail_fast)
+
+        if fail_fast:
+            failure = self._first_failure(password)
+            return [] if failure is None else [failure]
+
+        password = _make_password(password, self.pool)
+        validity = self._requirements_and_actuals(password)
+        # only make results for the requirements that are returned, each is
+        # only tested once
+        if failures_only:
+            return [
+                requirement.result(actual, False)
+                for requirement, actual in validity
+                if not requirement.test(actual)
+            ]
+        return [requirement(actual) for requirement, actual in validity]
+
+    def _instrumented_test_password(
+        self, password: str, failures_only: bool, fail_fast: bool
+    ) -> list:
+        """test_password, recording what it does in the instrumentation"""
+        instrumentation = self.instrumentation
+        perf_counter = time.perf_counter
+        started = perf_counter()
+        if fail_fast:
+            failure = self._first_failure(password)
+            instrumentation.record({"test_password": perf_counter() - started})
+            return [] if failure is None else [failure]
+
+        password = _make_password(password, self.pool)
+        analysed = perf_counter()
+        entropy = self.entropy(password)
+        durations = {
+            "analysis": analysed - started,
+            "entropy": perf_counter() - analysed,
+        }
+
+        results = []
+        rv = []
+        for name, (requirement, actual) in zip(
+            REQUIREMENT_NAMES, self._requirements_and_actuals(password, entropy)
+        ):
+            if name == "forbidden_words" or name == "breached_passwords":
+                looking_up = perf_counter()
+                fulfilled = requirement.test(actual)
+                durations[name] = perf_counter() - looking_up
+            else:
+                fulfilled = requirement.test(actual)
+            results.append((name, fulfilled))
+            if not (failures_only and fulfilled):
+                rv.append(requirement.result(actual, fulfilled))
+
+        durations["test_password"] = perf_counter() - started
+        instrumentation.record(durations, results)
+        return rv
+
+    def check_code(self, password: str) -> int:
+        """
+        Test a password against every requirement of the policy, as a code with
+        a bit set for each unfulfilled requirement, see RequirementCode
+
+            e.g.
+            > policy.check_code("hello")
+            320
+            > RequirementCode(320)
+            <RequirementCode.MIN_LENGTH|ENTROPY: 320>
+
+        :param password: the password
+        :type: str or Password
+
+        :return: the code, 0 if the password is valid
+        :type: int
+        """
+        if self.result_cache is not None and isinstance(password, str):
+            return self.result_cache.code(password)
+        return self._check_code(password)
+
+    def _check_code(self, password: str) -> int:
+        return self._code_and_actuals(password)[0]
+
+    def _code_and_actuals(self, password: str) -> tuple:
+        """
+        check_code, and the password's actual values for the requirements
+        before the forbidden words and breached passwords (its character
+        counts, length and entropy), which are the password itself
+        """
+        password = _make_password(password, self.pool)
+        validity = self._requirements_and_actuals(password)
+        code = 0
+        for bit, (requirement, actual) in zip(REQUIREMENT_BITS, validity):
+            if not requirement.test(actual):
+                code |= bit
+        return code, tuple(actual for _, actual in validity[:CHEAP_REQUIREMENTS])
+
+    def _validity(self, password: str, actuals: tuple = None) -> list:
+        """
+        _requirements_and_actuals of a password, made from the actual values
+        from _code_and_actuals if they are given, rather than looking at the
+        password and working out its entropy again
+        """
+        if actuals is None:
+            return self._requirements_and_actuals(_make_password(password, self.pool))
+        if isinstance(password, Password):
+            password = password.password
+        rv = list(zip(self._requirements()[:CHEAP_REQUIREMENTS], actuals))
+        rv.append((self.forbidden_words_requirements, password))
+        if self.breached_passwords is not None:
+            rv.append((self.breached_passwords_requirement, password))
+        return rv
+
+    def decode_code(self, code: int, password: str) -> list:
+        """
+        The unfulfilled requirements of a code from check_code, the same as
+        test_password would return for the password
+
+        :param code: the code
+        :type: int
+
+        :param password: the password the code is for
+        :type: str or Password
+
+        :return: the unfulfilled requirements
+        :type: list
+        """
+        return self._failures_from_code(code, password)
+
+    def _failures_from_code(
+        self, code: int, password: str, actuals: tuple = None
+    ) -> list:
+        """decode_code, from the actual values of _code_and_actuals if given"""
+        return [
+            requirement.result(actual, False)
+            for bit, (requirement, actual) in zip(
+                REQUIREMENT_BITS, self._validity(password, actuals)
+            )
+            if code & bit
         ]
-        return [i for i in validity if not i] if failures_only else validity
+
+    def _results_from_code(
+        self, code: int, password: str, actuals: tuple = None
+    ) -> list:
+        """
+        every requirement, as test_password(failures_only=False), from a code
+        and the actual values of _code_and_actuals if given
+        """
+        return [
+            requirement.result(actual, not code & bit)
+            for bit, (requirement, actual) in zip(
+                REQUIREMENT_BITS, self._validity(password, actuals)
+            )
+        ]
+
+    def _first_failure_from_code(
+        self, code: int, password: str, actuals: tuple = None
+    ):
+        """
+        the first unfulfilled requirement, as _first_failure, from a code and
+        the actual values of _code_and_actuals if given
+        """
+        if not code:
+            return None
+        validity = dict(zip(REQUIREMENT_BITS, self._validity(password, actuals)))
+        for bit in FAIL_FAST_BITS:
+            if code & bit:
+                requirement, actual = validity[bit]
+                return requirement.result(actual, False)
+
+    def _requirements_and_actuals(
+        self, password: Password, entropy: float = None
+    ) -> list:
+        """
+        every requirement with the password's actual value for it, in order,
+        the password's entropy is worked out if it isn't given
+        """
+        if entropy is None:
+            entropy = self.entropy(password)
+        rv = [
+            (self.lowercase_requirement, password.lowercase),
+            (self.uppercase_requirement, password.uppercase),
+            (self.numbers_requirement, password.numbers),
+            (self.symbols_requirement, password.symbols),
+            (self.whitespace_requirement, password.whitespace),
+            (self.other_requirement, password.other),
+            (self.min_length_requirement, password.length),
+            (self.max_length_requirement, password.length),
+            (self.entropy_requirement, entropy),
+            (self.forbidden_words_requirements, password.password),
+        ]
+        # only checked when there is a breach file
+        if self.breached_passwords is not None:
+            rv.append((self.breached_passwords_requirement, password.password))
+        return rv
+
+    def _first_failure(self, password):
+        """
+        The first unfulfilled requirement, or None
+
+        The length requirements are checked before the password's characters
+        are even looked at, then the character counts, then the entropy, then
+        the forbidden words, then the breached passwords.
+        """
+        failure, password = self._first_cheap_failure(password)
+        if failure is not None:
+            return failure
+        return self._first_heavy_failure(password)
+
+    def _first_cheap_failure(self, password):
+        """
+        The first unfulfilled requirement that doesn't need the forbidden words
+        or breached passwords, or None, and the password as a Password (None if
+        it wasn't made)
+        """
+        if isinstance(password, str):
+            length = len(password)
+        elif isinstance(password, Password):
+            length = password.length
+        else:
+            raise ValueError("password must be str or Password")
+
+        if not self.min_length_requirement.test(length):
+            return self.min_length_requirement.result(length, False), None
+        if not self.max_length_requirement.test(length):
+            return self.max_length_requirement.result(length, False), None
+
+        password = _make_password(password, self.pool)
+        for requirement, actual in (
+            (self.lowercase_requirement, password.lowercase),
+            (self.uppercase_requirement, password.uppercase),
+            (self.numbers_requirement, password.numbers),
+            (self.symbols_requirement, password.symbols),
+            (self.whitespace_requirement, password.whitespace),
+            (self.other_requirement, password.other),
+            (self.entropy_requirement, self.entropy(password)),
+        ):
+            if not requirement.test(actual):
+                return requirement.result(actual, False), password
+        return None, password
+
+    def _first_heavy_failure(self, password: Password):
+        """the forbidden words or breached passwords requirement if unfulfilled"""
+        if not self.forbidden_words_requirements.test(password.password):
+            return self.forbidden_words_requirements.result(password.password, False)
+        if self.breached_passwords is not None:
+            if not self.breached_passwords_requirement.test(password.password):
+                return self.breached_passwords_requirement.result(
+                    password.password, False
+                )
+        return None
+
+    def _length_fulfilled(self, length: int) -> bool:
+        return self.min_length_requirement.test(
+            length
+        ) and self.max_length_requirement.test(length)
+
+    def _heavy_checks_inline(self) -> bool:
+        """
+        Whether the forbidden words and breached passwords are cheap enough to
+        check without an executor, i.e. there is no breach file and the
+        forbidden words are a short list
+        """
+        return (
+            self.breached_passwords is None
+            and isinstance(self.forbidden_words, (list, tuple))
+            and len(self.forbidden_words) <= INLINE_FORBIDDEN_WORDS
+        )
 
     def validate(self, password):
-        return not bool(self.test_password(password))
+        if self.result_cache is not None and isinstance(password, str):
+            return self.result_cache.validate(password)
+        if self.instrumentation is not None:
+            started = time.perf_counter()
+            rv = self._first_failure(password) is None
+            self.instrumentation.record({"validate": time.perf_counter() - started})
+            return rv
+        return self._first_failure(password) is None
+
+    async def _run_heavy(self, executor, func, *args):
+        if self._heavy_checks_inline():
+            return func(*args)
+        # asyncio is imported when it's needed, as it is slow to import
+        import asyncio
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, func, *args)
+
+    async def avalidate(
+        self,
+        password: str,
+        executor: "concurrent.futures.Executor" = None,
+        timeout: float = None,
+    ) -> bool:
+        """
+        Validate a password without blocking the event loop, see validate
+
+        The cheap requirements are checked in the event loop, the forbidden
+        words and breached passwords (unless they are cheap, see
+        _heavy_checks_inline) are checked in the executor, and only if the
+        cheap requirements are fulfilled.
+
+        If cancelled or timed out, the check already in the executor still
+        runs to the end, but its result is thrown away.
+
+        :param password: the password
+        :type: str or Password
+
+        :param executor: the executor for the heavy checks, the event loop's
+                         default executor by default
+        :type: concurrent.futures.Executor
+
+        :param timeout: the seconds to wait, raising asyncio.TimeoutError after
+        :type: float
+
+        :return: whether the password is valid
+        :type: bool
+        """
+        if timeout is not None:
+            import asyncio
+
+            return await asyncio.wait_for(self.avalidate(password, executor), timeout)
+
+        failure, password = self._first_cheap_failure(password)
+        if failure is not None:
+            return False
+        failure = await self._run_heavy(executor, self._first_heavy_failure, password)
+        return failure is None
+
+    async def atest_password(
+        self,
+        password: str,
+        failures_only: bool = True,
+        fail_fast: bool = False,
+        executor: "concurrent.futures.Executor" = None,
+        timeout: float = None,
+    ) -> list:
+        """
+        Test a password without blocking the event loop, returning the same as
+        test_password, see avalidate for how the requirements are checked
+
+        :param password: the password
+        :type: str or Password
+
+        :param failures_only: only return the unfulfilled requirements
+        :type: bool
+
+        :param fail_fast: stop at the first unfulfilled requirement
+        :type: bool
+
+        :param executor: the executor for the heavy checks, the event loop's
+                         default executor by default
+        :type: concurrent.futures.Executor
+
+        :param timeout: the seconds to wait, raising asyncio.TimeoutError after
+        :type: float
+
+        :return: the requirements
+        :type: list
+        """
+        if timeout is not None:
+            import asyncio
+
+            return await asyncio.wait_for(
+                self.atest_password(password, failures_only, fail_fast, executor),
+                timeout,
+            )
+
+        if fail_fast:
+            failure, password = self._first_cheap_failure(password)
+            if failure is None:
+                failure = await self._run_heavy(
+                    executor, self._first_heavy_failure, password
+                )
+            return [] if failure is None else [failure]
+
+        password = _make_password(password, self.pool)
+        validity = self._requirements_and_actuals(password)
+        # the forbidden words and breached passwords are at the end
+        cheap, heavy = validity[:CHEAP_REQUIREMENTS], validity[CHEAP_REQUIREMENTS:]
+        fulfilled = [requirement.test(actual) for requirement, actual in cheap]
+        fulfilled += await self._run_heavy(executor, _test_requirements, heavy)
+        # made from what was tested, so nothing is looked up again here
+        return [
+            requirement.result(actual, test)
+            for (requirement, actual), test in zip(validity, fulfilled)
+            if not (failures_only and test)
+        ]
+
+    async def avalidate_many(
+        self,
+        passwords: typing.Iterable,
+        executor: "concurrent.futures.Executor" = None,
+        timeout: float = None,
+    ) -> list:
+        """
+        Validate many passwords without blocking the event loop, returning the
+        same as validate_many
+
+        The cheap requirements of every password are checked in the event
+        loop, then the heavy checks of the passwords that are left are all
+        done in a single call in the executor.
+
+        :param passwords: the passwords
+        :type: iterable of str or Password
+
+        :param executor: the executor for the heavy checks, the event loop's
+                         default executor by default
+        :type: concurrent.futures.Executor
+
+        :param timeout: the seconds to wait, raising asyncio.TimeoutError after
+        :type: float
+
+        :return: whether each password is valid, in the same order as passwords
+        :type: list(bool)
+        """
+        if timeout is not None:
+            import asyncio
+
+            return await asyncio.wait_for(
+                self.avalidate_many(passwords, executor), timeout
+            )
+
+        passwords = list(passwords)
+        results = {}
+        heavy = []
+        for password in passwords:
+            if password in results:
+                continue
+            # the same checks as validate_many, split into cheap and heavy
+            if (
+                isinstance(password, str)
+                and self.requirement_cls is PasswordRequirement
+            ):
+                passes = self._passes_cheap(password)
+                check = (self._passes_heavy, password)
+            else:
+                failure, made = self._first_cheap_failure(password)
+                passes = failure is None
+                check = (self._fulfils_heavy, made)
+            results[password] = passes
+            if passes:
+                heavy.append((password, check))
+
+        if heavy:
+            passed = await self._run_heavy(
+                executor, _run_checks, [check for _, check in heavy]
+            )
+            for (password, _), passes in zip(heavy, passed):
+                results[password] = passes
+        return [results[password] for password in passwords]
+
+    def compile(self):
+        """
+        Compile the policy into a function that tests a password.
+
+        The function returns the same as test_password (the unfulfilled
+        requirements), but it leaves out requirements that can never fail, e.g.
+        a minimum of 0 lowercase characters, compares against the thresholds
+        directly, and counts only the classes of character it needs in the same
+        pass that classifies the characters.
+
+        Changes made to the policy after it is compiled aren't seen by the
+        function, compile it again.
+
+        :return: function of a password to a list of unfulfilled requirements
+        :type: callable
+        """
+        generic = self.test_password
+
+        # class index in the pool and requirement, for each character count
+        count_requirements = (
+            (0, self.lowercase_requirement),
+            (1, self.uppercase_requirement),
+            (2, self.numbers_requirement),
+            (3, self.symbols_requirement),
+            (4, self.whitespace_requirement),
+            (5, self.other_requirement),
+        )
+        min_length_requirement = self.min_length_requirement
+        max_length_requirement = self.max_length_requirement
+        entropy_requirement = self.entropy_requirement
+        forbidden_words_requirement = self.forbidden_words_requirements
+        breached_passwords_requirement = self.breached_passwords_requirement
+        breached_passwords = self.breached_passwords
+
+        # a custom requirement class or function may not be a plain comparison
+        # against the threshold, so there is nothing to specialise
+        expected_functions = [
+            (requirement, greater_than_or_equal_to)
+            for _, requirement in count_requirements
+        ] + [
+            (min_length_requirement, greater_than_or_equal_to),
+            (max_length_requirement, less_than_or_equal_to),
+            (entropy_requirement, greater_than_or_equal_to),
+            (forbidden_words_requirement, not_in),
+            (breached_passwords_requirement, not_in),
+        ]
+        # nor for an entropy that isn't from the classes and length alone
+        if self.estimator is not None or any(
+            requirement.cls is not PasswordRequirement or requirement.func is not func
+            for requirement, func in expected_functions
+        ):
+            return lambda password: generic(password)
+
+        # only count the classes of character with a minimum above 0
+        counted = tuple(
+            (index, requirement)
+            for index, requirement in count_requirements
+            if requirement.requirement > 0
+        )
+        number_counted = len(counted)
+        thresholds = tuple(requirement.requirement for _, requirement in counted)
+        requirements = tuple(requirement for _, requirement in counted)
+        slots = {index: slot for slot, (index, _) in enumerate(counted)}
+        # the count slots to add to for every class mask
+        mask_slots = tuple(
+            tuple(slots[i] for i in MASK_INDICES[mask] if i in slots)
+            for mask in range(NUMBER_OF_MASKS)
+        )
+
+        # ranges have to be searched, otherwise a dict lookup is enough
+        if self.pool.range_classes:
+            get_mask = self.pool.character_mask
+        else:
+            get_mask = self.pool.lookup.get
+        mask_sizes = self.pool.mask_sizes
+        min_length = min_length_requirement.requirement
+        max_length = max_length_requirement.requirement
+        entropy_table = self.entropy_table
+        table_length = len(entropy_table[0]) - 1
+        min_length_for_mask = self.min_length_for_mask
+        forbidden_words = forbidden_words_requirement.requirement
+        if isinstance(forbidden_words, list):
+            forbidden_words = frozenset(forbidden_words)
+        unknown_message = (
+            "A password can only use characters from the character_pool provided"
+        )
+
+        def test_password(password):
+            if not isinstance(password, str):
+                return generic(password)
+
+            counts = [0] * number_counted
+            mask = 0
+            if number_counted:
+                for character, number in Counter(password).items():
+                    character_mask = get_mask(character)
+                    if character_mask is None:
+                        raise AssertionError(unknown_message)
+                    mask |= character_mask
+                    for slot in mask_slots[character_mask]:
+                        counts[slot] += number
+            else:
+                for character in set(password):
+                    character_mask = get_mask(character)
+                    if character_mask is None:
+                        raise AssertionError(unknown_message)
+                    mask |= character_mask
+
+            failures = []
+            for slot in range(number_counted):
+                if counts[slot] < thresholds[slot]:
+                    failures.append(requirements[slot](counts[slot]))
+
+            length = len(password)
+            if length < min_length:
+                failures.append(min_length_requirement(length))
+            if length > max_length:
+                failures.append(max_length_requirement(length))
+
+            # the entropy is only worked out when the requirement fails
+            minimum = min_length_for_mask[mask]
+            if minimum is None or length < minimum:
+                if length <= table_length:
+                    entropy = entropy_table[mask][length]
+                else:
+                    entropy = log2_power(mask_sizes[mask], length)
+                failures.append(entropy_requirement(entropy))
+
+            if forbidden_words and password in forbidden_words:
+                failures.append(forbidden_words_requirement(password))
+            if breached_passwords is not None and password in breached_passwords:
+                failures.append(breached_passwords_requirement(password))
+            return failures
+
+        return test_password
+
+    def _passes(self, password: str) -> bool:
+        """
+        Whether a password meets every requirement, without building a
+        Password or any requirements
+        """
+        return self._passes_cheap(password) and self._passes_heavy(password)
+
+    def _passes_cheap(self, password: str) -> bool:
+        """whether a password meets every requirement but the heavy ones"""
+        # as validate, a password of the wrong length fails before its
+        # characters are looked at
+        length = len(password)
+        if not self.min_length <= length <= self.max_length:
+            return False
+        analysis = self.pool.analyse(password)
+        assert (
+            not analysis.unknown
+        ), "A password can only use characters from the character_pool provided"
+        if self.estimator is not None:
+            # the estimate is the slowest part, so it is worked out last
+            return (
+                analysis.lowercase >= self.lowercase
+                and analysis.uppercase >= self.uppercase
+                and analysis.numbers >= self.numbers
+                and analysis.symbols >= self.symbols
+                and analysis.whitespace >= self.whitespace
+                and analysis.other >= self.other
+                and self.entropy_requirement.test(
+                    self.estimator.entropy(password, self.pool)
+                )
+            )
+        min_length_for_mask = self.min_length_for_mask[analysis.mask]
+        return (
+            min_length_for_mask is not None
+            and length >= min_length_for_mask
+            and analysis.lowercase >= self.lowercase
+            and analysis.uppercase >= self.uppercase
+            and analysis.numbers >= self.numbers
+            and analysis.symbols >= self.symbols
+            and analysis.whitespace >= self.whitespace
+            and analysis.other >= self.other
+        )
+
+    def _passes_heavy(self, password: str) -> bool:
+        """whether a password isn't a forbidden word or breached password"""
+        return password not in self.forbidden_words_requirements.requirement and (
+            self.breached_passwords is None or password not in self.breached_passwords
+        )
+
+    def _fulfils_heavy(self, password: Password) -> bool:
+        return self._first_heavy_failure(password) is None
+
+    def test_passwords(self, passwords: typing.Iterable, failures_only: bool = True):
+        """
+        Test many passwords, see test_password
+
+        Each distinct password is only tested once, identical passwords get
+        copies of its result.
+
+        :param passwords: the passwords
+        :type: iterable of str or Password
+
+        :param failures_only: only return the unfulfilled requirements
+        :type: bool
+
+        :return: the results, in the same order as the passwords
+        :type: list
+        """
+        results = {}
+        rv = []
+        for password in passwords:
+            result = results.get(password)
+            if result is None:
+                result = results[password] = self.test_password(
+                    password, failures_only=failures_only
+                )
+            else:
+                # a list of its own, so changing one doesn't change the others
+                result = list(result)
+            rv.append(result)
+        return rv
+
+    def validate_many(self, passwords: typing.Iterable):
+        """
+        Validate many passwords, see validate
+
+        Each distinct password is only validated once. Passwords as str are
+        checked against the policy directly, without building a Password or
+        any requirements.
+
+        :param passwords: the passwords
+        :type: iterable of str or Password
+
+        :return: whether each password is valid, in the same order as passwords
+        :type: list(bool)
+        """
+        # a custom requirement class may decide differently to the thresholds
+        if self.requirement_cls is PasswordRequirement:
+            passes = self._passes
+        else:
+            passes = self.validate
+
+        results = {}
+        rv = []
+        for password in passwords:
+            result = results.get(password)
+            if result is None:
+                if isinstance(password, str):
+                    result = passes(password)
+                else:
+                    result = self.validate(password)
+                results[password] = result
+            rv.append(result)
+        return rv
@@ -0,0 +1,297 @@
+"""
+Share a policy's large, immutable indexes between processes.
+
+Pickling a policy for every task, or every preforked worker keeping its own
+copy of a long list of forbidden words, is expensive. A SharedPolicy writes
+the large parts of a policy (the forbidden words, sorted, and the automaton
+for substring matching, or a Bloom filter and breached passwords held in
+memory) to one file, on /dev/shm when there is one, and makes a handle of a
+few kilobytes. Any process can attach the handle, which memory maps the file,
+so every process shares the same pages.
+    e.g.
+    > shared = SharedPolicy(policy)
+    > handle = shared.handle  # pickle this, e.g. as an argument of a task
+    ...
+    > policy = handle.attach()  # in a worker
+    > policy.validate("password")
+    False
+
+A Bloom filter or breach file that was opened from a path is shared by
+mapping the same path again, rather than copying it.
+"""
+import mmap
+import os
+import pickle
+import struct
+import tempfile
+import uuid
+import weakref
+
+from password_validation.automaton import FrozenAhoCorasick
+from password_validation.bloom import BloomFilter
+from password_validation.breach import BreachedPasswords
+from password_validation.policy import PasswordPolicy
+
+# the number of words, then an offset for each word and the end
+OFFSET = struct.Struct("<Q")
+
+
+class SortedWords:
+    """
+    Words sorted in a buffer, UTF-8 encoded, which are binary searched.
+
+    The buffer isn't copied, so it can be a mmap or shared memory.
+        e.g.
+        > words = SortedWords.build(["qwerty", "password"])
+        > "password" in words
+        True
+        > list(words)
+        ['password', 'qwerty']
+
+    :param buffer: the number of words, their offsets, then the words
+    :type: bytes-like
+    """
+
+    def __init__(self, buffer):
+        (number_of_words,) = OFFSET.unpack_from(buffer)
+        self.buffer = buffer
+        self.number_of_words = number_of_words
+        view = memoryview(buffer)
+        end = OFFSET.size * (number_of_words + 2)
+        self.offsets = view[OFFSET.size:end].cast("Q")
+        self.words = view[end:]
+
+    @classmethod
+    def build(cls, words):
+        """
+        Sort words into a buffer
+
+        :param words: the words, duplicates are removed
+        :type: iterable of str
+
+        :return: the sorted words
+        :type: SortedWords
+        """
+        encoded = sorted({word.encode("utf-8") for word in words})
+        buffer = bytearray(OFFSET.pack(len(encoded)))
+        offset = 0
+        for word in encoded:
+            buffer += OFFSET.pack(offset)
+            offset += len(word)
+        buffer += OFFSET.pack(offset)
+        for word in encoded:
+            buffer += word
+        return cls(buffer)
+
+    def word(self, index: int) -> bytes:
+        return bytes(self.words[self.offsets[index]:self.offsets[index + 1]])
+
+    def __contains__(self, word: str) -> bool:
+        # a lone surrogate can't be UTF-8, so it won't match any word
+        key = word.encode("utf-8", "surrogatepass")
+        low, high = 0, self.number_of_words
+        while low < high:
+            middle = (low + high) // 2
+            found = self.word(middle)
+            if found == key:
+                return True
+            elif found < key:
+                low = middle + 1
+            else:
+                high = middle
+        return False
+
+    def __reduce__(self):
+        return SortedWords, (bytes(self.buffer),)
+
+    def __iter__(self):
+        for i in range(self.number_of_words):
+            yield self.word(i).decode("utf-8")
+
+    def __len__(self):
+        return self.number_of_words
+
+    def __repr__(self):
+        return f"SortedWords({self.number_of_words} words)"
+
+
+# the policies attached in this process, by the token of their handle
+_attached = {}
+
+
+class PolicyHandle:
+    """
+    A small, picklable handle of a SharedPolicy, see PolicyHandle.attach
+
+    :param token: identifies the shared policy
+    :param path: the file of the large parts, None if there are none
+    :param parts: the offset and size of each part in the file
+    :param state: the pickled policy, without its large parts
+    """
+
+    def __init__(self, token: str, path: str, parts: dict, state: bytes):
+        self.token = token
+        self.path = path
+        self.parts = parts
+        self.state = state
+
+    def attach(self) -> PasswordPolicy:
+        """
+        The policy, with its large parts memory mapped from the shared file
+
+        A process only attaches a handle once, after that the same policy is
+        returned.
+
+        :return: the policy
+        :type: PasswordPolicy
+        """
+        policy = _attached.get(self.token)
+        if policy is None:
+            policy = _attached[self.token] = self._attach()
+        return policy
+
+    def _attach(self) -> PasswordPolicy:
+        state = pickle.loads(self.state)
+        if self.path is not None:
+            with open(self.path, "rb") as f:
+                view = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+
+        def part(name):
+            offset, size = self.parts[name]
+            return view[offset:offset + size]
+
+        if "forbidden_words" in self.parts:
+            state["forbidden_words"] = SortedWords(part("forbidden_words"))
+            if "automaton" in self.parts:
+                forbidden = FrozenAhoCorasick(part("automaton"))
+            else:
+                forbidden = state["forbidden_words"]
+            state["forbidden_words_requirements"].requirement = forbidden
+        elif "bloom" in self.parts:
+            state["forbidden_words"] = BloomFilter(part("bloom"))
+            state["forbidden_words_requirements"].requirement = state["forbidden_words"]
+
+        if "breached_passwords" in self.parts:
+            state["breached_passwords"] = BreachedPasswords(part("breached_passwords"))
+            state["breached_passwords_requirement"].requirement = state[
+                "breached_passwords"
+            ]
+
+        policy = PasswordPolicy.__new__(PasswordPolicy)
+        policy.__setstate__(state)
+        return policy
+
+    def __repr__(self):
+        return f"PolicyHandle('{self.token}')"
+
+
+class SharedPolicy:
+    """
+    A policy whose large parts are in a file to memory map, shared by every
+    process that attaches its handle, see the module docstring
+
+    The file is removed when the shared policy is closed, processes that have
+    already attached it keep their mapping.
+
+    :param policy: the policy to share
+    :type: PasswordPolicy
+
+    :param path: where to write the file, a temporary file (on /dev/shm when
+                 there is one) by default
+    :type: str
+    """
+
+    def __init__(self, policy: PasswordPolicy, path: str = None):
+        state = policy.__getstate__()
+        parts = {}
+        buffer = bytearray()
+
+        def add(name, data):
+            # keep each part aligned for its arrays
+            buffer.extend(b"\0" * (-len(buffer) % 8))
+            parts[name] = (len(buffer), len(data))
+            buffer.extend(data)
+
+        forbidden_words = policy.forbidden_words
+        forbidden_words_requirements = policy.forbidden_words_requirements
+        if isinstance(forbidden_words, BloomFilter):
+            # a filter from a file is pickled as its path
+            if forbidden_words.path is None:
+                add("bloom", forbidden_words.buffer)
+        elif len(forbidden_words):
+            if not isinstance(forbidden_words, SortedWords):
+                forbidden_words = SortedWords.build(forbidden_words)
+            add("forbidden_words", forbidden_words.buffer)
+            if policy.forbidden_words_match == "substring":
+                automaton = forbidden_words_requirements.requirement
+                if not isinstance(automaton, FrozenAhoCorasick):
+                    automaton = automaton.freeze()
+                add("automaton", automaton.buffer)
+        if "forbidden_words" in parts or "bloom" in parts:
+            state["forbidden_words"] = None
+            state["forbidden_words_requirements"] = _without_requirement(
+                forbidden_words_requirements
+            )
+
+        breached_passwords = policy.breached_passwords
+        if breached_passwords is not None and breached_passwords.path is None:
+            add("breached_passwords", breached_passwords.buffer)
+            state["breached_passwords"] = None
+            state["breached_passwords_requirement"] = _without_requirement(
+                policy.breached_passwords_requirement
+            )
+
+        self.path = None
+        self.temporary = False
+        # removes a temporary file if the shared policy is never closed, e.g.
+        # it is garbage collected or the process exits
+        self._finalizer = None
+        if buffer:
+            if path is None:
+                directory = "/dev/shm" if os.path.isdir("/dev/shm") else None
+                fd, path = tempfile.mkstemp(
+                    prefix="password-policy-", suffix=".shared", dir=directory
+                )
+                os.close(fd)
+                self.temporary = True
+                self._finalizer = weakref.finalize(self, _remove, path)
+            with open(path, "wb") as f:
+                f.write(buffer)
+            self.path = path
+
+        self.policy = policy
+        self.handle = PolicyHandle(
+            uuid.uuid4().hex, self.path, parts, pickle.dumps(state)
+        )
+
+    def close(self):
+        """remove the file, if it is temporary"""
+        if self._finalizer is not None:
+            self._finalizer.detach()
+        if self.temporary and os.path.exists(self.path):
+            os.remove(self.path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __repr__(self):
+        return f"SharedPolicy({self.handle.token!r}, path={self.path!r})"
+
+
+def _remove(path: str):
+    # the file may have been removed already
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+def _without_requirement(requirement):
+    # a copy of a requirement, without its (large) requirement to pickle
+    copy = object.__new__(type(requirement))
+    copy.__dict__.update(requirement.__dict__)
+    copy.requirement = None
+    return copy
@@ -0,0 +1,196 @@
+import os
+import random
+import string
+import subprocess
+import sys
+
+import pytest
+
+from password_validation.audit import AuditSummary
+from password_validation.audit import audit
+from password_validation.audit import audit_chunk
+from password_validation.audit import iter_audit
+from password_validation.audit import plan_chunks
+from password_validation.policy import PasswordPolicy
+from password_validation.shared import SharedPolicy
+
+
+def random_passwords(number, seed):
+    random.seed(seed)
+    characters = string.ascii_letters + string.digits + "!@# "
+    rv = [
+        "".join(random.choice(characters) for _ in range(random.randint(0, 20)))
+        for _ in range(number)
+    ]
+    # some repeats, some forbidden words and some unacceptable characters
+    return rv + ["password", "password", "héllo", "x" * 200]
+
+
+@pytest.fixture
+def source(tmp_path):
+    path = tmp_path / "passwords.txt"
+    path.write_text("\n".join(random_passwords(500, 0)) + "\n", encoding="utf-8")
+    yield str(path)
+
+
+@pytest.fixture
+def policy():
+    yield PasswordPolicy(numbers=1, forbidden_words=["password"])
+
+
+def test_plan_chunks():
+    buffer = b"ab\ncd\nef\ngh"
+    assert plan_chunks(buffer, 1) == [(0, 3, 1), (3, 6, 2), (6, 9, 3), (9, 11, 4)]
+    assert plan_chunks(buffer, 4) == [(0, 6, 1), (6, 11, 3)]
+    assert plan_chunks(buffer, 100) == [(0, 11, 1)]
+    assert plan_chunks(b"", 10) == []
+    with pytest.raises(AssertionError):
+        plan_chunks(buffer, 0)
+
+
+def test_audit_chunk(policy):
+    passwords = random_passwords(100, 1)
+    codes, summary = audit_chunk(policy, passwords)
+    assert len(codes) == summary.total == len(passwords)
+    assert summary.errors == 1
+    assert summary.valid + summary.invalid + summary.errors == summary.total
+    for password, code in zip(passwords, codes):
+        if password == "héllo":
+            continue
+        assert code == policy.check_code(password)
+    assert summary.failures["forbidden_words"] == 2
+    assert sum(summary.entropy_histogram) == summary.total - summary.errors
+    assert sum(summary.classifications.values()) == summary.total - summary.errors
+
+    # each password's entropy is only estimated once
+    estimated = []
+    entropy = policy.entropy
+    policy.entropy = lambda password: estimated.append(password) or entropy(password)
+    audit_chunk(policy, ["hello", "hello-this-is-quite-a-good-password"])
+    assert len(estimated) == 2
+
+
+def test_audit(source, policy):
+    expected = audit(source, policy, workers=1, chunk_size=1 << 20)
+    assert expected.total == 504
+    assert expected.errors == 1
+
+    for workers in (1, 2):
+        summary = audit(source, policy, workers=workers, chunk_size=100)
+        assert summary.to_dict() == expected.to_dict()
+
+
+def test_audit_windows_line_breaks(source, policy, tmp_path):
+    path = tmp_path / "windows.txt"
+    path.write_bytes(open(source, "rb").read().replace(b"\n", b"\r\n"))
+    summary = audit(str(path), policy, workers=1, chunk_size=100)
+    assert summary.total == 504
+    assert summary.errors == 1
+    assert summary.to_dict() == audit(source, policy, workers=1).to_dict()
+
+
+def test_iter_audit(source, policy):
+    passwords = random_passwords(500, 0)
+    ordered = list(iter_audit(source, policy, workers=2, chunk_size=100))
+    assert [chunk.index for chunk in ordered] == list(range(len(ordered)))
+
+    results = [result for chunk in ordered for result in chunk.results()]
+    assert [line for line, _ in results] == list(range(1, len(passwords) + 1))
+    for (line, code), password in zip(results, passwords):
+        if password == "héllo":
+            assert code is None
+        else:
+            assert code == policy.check_code(password)
+
+    unordered = iter_audit(source, policy, workers=2, chunk_size=100, ordered=False)
+    assert sorted(
+        result for chunk in unordered for result in chunk.results()
+    ) == sorted(results, key=lambda result: result[0])
+
+
+def test_checkpoint(source, policy, tmp_path):
+    expected = audit(source, policy, workers=1, chunk_size=100)
+    checkpoint = str(tmp_path / "audit.checkpoint")
+
+    # interrupt the audit after 3 chunks
+    chunks = iter_audit(source, policy, workers=1, chunk_size=100, checkpoint=checkpoint)
+    done = [next(chunks).index for _ in range(3)]
+    chunks.close()
+
+    # resuming only audits the chunks that weren't done
+    resumed = list(
+        iter_audit(source, policy, workers=2, chunk_size=100, checkpoint=checkpoint)
+    )
+    assert not set(done) & {chunk.index for chunk in resumed}
+
+    summary = audit(source, policy, workers=2, chunk_size=100, checkpoint=checkpoint)
+    assert summary.to_dict() == expected.to_dict()
+
+    # the checkpoint is for another audit
+    with pytest.raises(AssertionError):
+        audit(source, policy, workers=1, chunk_size=200, checkpoint=checkpoint)
+    with pytest.raises(AssertionError):
+        audit(source, PasswordPolicy(), workers=1, chunk_size=100, checkpoint=checkpoint)
+
+
+# interrupts an audit after a chunk, or resumes it, in a new process
+AUDIT_SCRIPT = """
+import sys
+from password_validation.audit import iter_audit
+from password_validation.policy import PasswordPolicy
+
+source, checkpoint, action = sys.argv[1:]
+policy = PasswordPolicy(numbers=1, forbidden_words=["password", "hello", "qwerty"])
+chunks = iter_audit(source, policy, workers=1, chunk_size=100, checkpoint=checkpoint)
+if action == "interrupt":
+    next(chunks)
+    chunks.close()
+else:
+    print(len(list(chunks)))
+"""
+
+
+def test_checkpoint_resumes_with_another_hash_seed(source, tmp_path):
+    checkpoint = str(tmp_path / "audit.checkpoint")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    for seed, action in (("1", "interrupt"), ("2", "resume")):
+        environment = dict(os.environ, PYTHONHASHSEED=seed, PYTHONPATH=root)
+        completed = subprocess.run(
+            [sys.executable, "-c", AUDIT_SCRIPT, source, checkpoint, action],
+            env=environment,
+            capture_output=True,
+            text=True,
+        )
+        assert completed.returncode == 0, completed.stderr
+    # every chunk but the one done before the interruption
+    number_of_chunks = len(plan_chunks(open(source, "rb").read(), 100))
+    assert int(completed.stdout) == number_of_chunks - 1
+
+
+def test_summary_merge():
+    first, second = AuditSummary(), AuditSummary()
+    first.total, first.valid = 2, 2
+    first.entropy_histogram = [1, 1]
+    first.classifications = {"Weak": 2}
+    second.total, second.invalid = 3, 3
+    second.failures["entropy"] = 3
+    second.entropy_histogram = [3]
+    second.classifications = {"Weak": 1, "Ok": 2}
+
+    merged = AuditSummary.from_dict(first.to_dict()).merge(second)
+    assert merged.total == 5
+    assert merged.valid == 2
+    assert merged.invalid == 3
+    assert merged.failures["entropy"] == 3
+    assert merged.entropy_histogram == [4, 1]
+    assert merged.classifications == {"Weak": 3, "Ok": 2}
+
+    with pytest.raises(AssertionError):
+        merged.merge(AuditSummary(histogram_width=4))
+
+
+def test_audit_shared_policy(source, policy):
+    expected = audit(source, policy, workers=1, chunk_size=100)
+    with SharedPolicy(policy) as shared:
+        summary = audit(source, shared.handle, workers=2, chunk_size=100)
+    assert summary.to_dict() == expected.to_dict()
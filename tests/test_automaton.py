@@ -0,0 +1,77 @@
+from password_validation.automaton import AhoCorasick
+
+
+def test_aho_corasick():
+    automaton = AhoCorasick(["password", "summer", "word", "pass"])
+    assert len(automaton) == 4
+    assert repr(automaton) == "AhoCorasick(4 words)"
+
+    assert automaton.findall("Summer2024password!") == [
+        "summer",
+        "pass",
+        "password",
+        "word",
+    ]
+    assert "Summer2024password!" in automaton
+    assert "Winter2024passw0rd!" in automaton
+    assert automaton.findall("Winter2024passw0rd!") == ["pass"]
+    assert "Winter2024p4ssw0rd!" not in automaton
+    assert automaton.findall("") == []
+    assert "" not in automaton
+
+
+def test_aho_corasick_case_insensitive():
+    automaton = AhoCorasick(["PassWord", "straße"])
+    assert automaton.findall("my PASSWORD") == ["PassWord"]
+    assert "STRASSE" in automaton
+    assert "password" in automaton
+
+
+def test_aho_corasick_overlapping_and_repeated():
+    automaton = AhoCorasick(["aa", "aa", "aaa"])
+    assert len(automaton) == 2
+    assert automaton.findall("aaaa") == ["aa", "aaa", "aa", "aaa", "aa"]
+
+
+def test_aho_corasick_fail_links():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    assert automaton.findall("ushers") == ["she", "he", "hers"]
+    assert automaton.findall("ahishers") == ["his", "she", "he", "hers"]
+
+
+def test_aho_corasick_no_words():
+    automaton = AhoCorasick([])
+    assert len(automaton) == 0
+    assert "anything" not in automaton
+    assert automaton.findall("anything") == []
+
+
+def test_frozen_aho_corasick():
+    words = ["password", "summer", "word", "pass", "straße", "he", "she", "hers"]
+    automaton = AhoCorasick(words)
+    frozen = automaton.freeze()
+    assert len(frozen) == len(words)
+    assert repr(frozen) == f"FrozenAhoCorasick({len(words)} words)"
+    for text in (
+        "Summer2024password!",
+        "Winter2024p4ssw0rd!",
+        "STRASSE",
+        "ushers",
+        "xyz",
+        "",
+    ):
+        assert (text in frozen) == (text in automaton)
+
+    assert "" in AhoCorasick([""]).freeze()
+    assert "anything" not in AhoCorasick([]).freeze()
+
+
+def test_frozen_aho_corasick_step():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    frozen = automaton.freeze()
+    node = frozen_node = 0
+    for character in "ahishersx":
+        node = automaton.step(node, character)
+        frozen_node = frozen.step(frozen_node, character)
+        assert frozen_node == node
+        assert frozen.matches(frozen_node) == automaton.matches(node)
@@ -0,0 +1,78 @@
+import random
+import string
+
+import pytest
+
+from password_validation.bloom import BloomFilter
+from password_validation.bloom import build_bloom_filter
+from password_validation.bloom import optimal_parameters
+
+
+def random_words(number, seed):
+    random.seed(seed)
+    return [
+        "".join(random.choice(string.ascii_letters) for _ in range(12))
+        for _ in range(number)
+    ]
+
+
+def test_optimal_parameters():
+    number_of_bits, number_of_hashes = optimal_parameters(1000, 0.01)
+    assert number_of_bits == 9586
+    assert number_of_hashes == 7
+
+    with pytest.raises(AssertionError):
+        optimal_parameters(1000, 0)
+    with pytest.raises(AssertionError):
+        optimal_parameters(1000, 1)
+
+
+def test_bloom_filter():
+    words = random_words(5000, seed=3)
+    bloom_filter = BloomFilter.build(words, false_positive_rate=0.01)
+    assert len(bloom_filter) == 5000
+    assert repr(bloom_filter) == "BloomFilter(5000 words)"
+    assert bloom_filter.false_positive_rate == pytest.approx(0.01, rel=0.1)
+
+    # no false negatives
+    for word in words:
+        assert word in bloom_filter
+
+    # false positives at about the configured rate
+    others = set(random_words(20000, seed=4)) - set(words)
+    false_positives = sum(word in bloom_filter for word in others)
+    assert false_positives / len(others) < 0.02
+
+
+def test_bloom_filter_from_iterator():
+    words = ["password", "qwerty", "letmein"]
+    bloom_filter = BloomFilter.build(iter(words), number_of_words=len(words))
+    assert all(word in bloom_filter for word in words)
+    assert "correct horse battery staple" not in bloom_filter
+
+
+def test_bloom_filter_file(tmp_path):
+    source = tmp_path / "words.txt"
+    source.write_text("password\nqwerty\n\nletmein\r\npässwörd\n", encoding="utf-8")
+    destination = str(tmp_path / "words.bloom")
+
+    built = build_bloom_filter(str(source), destination, false_positive_rate=0.001)
+    assert len(built) == 4
+
+    with BloomFilter.open(destination) as bloom_filter:
+        assert repr(bloom_filter) == f"BloomFilter('{destination}', 4 words)"
+        assert bloom_filter.number_of_bits == built.number_of_bits
+        assert bloom_filter.number_of_hashes == built.number_of_hashes
+        for word in ("password", "qwerty", "letmein", "pässwörd"):
+            assert word in bloom_filter
+        assert "" not in bloom_filter
+
+
+def test_bloom_filter_breaks():
+    with pytest.raises(AssertionError):
+        BloomFilter(b"NOTBLOOM" + b"\x00" * 24)
+
+    bloom_filter = BloomFilter.build(["password"])
+    with pytest.raises(AssertionError):
+        BloomFilter(bytes(bloom_filter.buffer)[:-1])
+
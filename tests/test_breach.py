@@ -0,0 +1,109 @@
+import hashlib
+import random
+
+import pytest
+
+from password_validation.breach import BreachedPasswords
+from password_validation.breach import build_breach_file
+from password_validation.breach import sha1_digest
+
+BREACHED = ["password", "123456", "qwerty", "letmein", "Summer2024!", "pässwörd"]
+
+
+@pytest.fixture
+def plaintext_dump(tmp_path):
+    path = tmp_path / "dump.txt"
+    path.write_text("\n".join(BREACHED + ["password", ""]) + "\n", encoding="utf-8")
+    yield str(path)
+
+
+@pytest.fixture
+def sha1_dump(tmp_path):
+    path = tmp_path / "dump.txt"
+    lines = [
+        f"{hashlib.sha1(p.encode('utf-8')).hexdigest().upper()}:{c}"
+        for c, p in enumerate(BREACHED)
+    ]
+    path.write_text("\r\n".join(lines) + "\r\n")
+    yield str(path)
+
+
+def test_build_breach_file_from_plaintext(plaintext_dump, tmp_path):
+    destination = str(tmp_path / "breached.sha1")
+    assert build_breach_file(plaintext_dump, destination, plaintext=True) == 6
+
+    with BreachedPasswords.open(destination) as breached_passwords:
+        assert len(breached_passwords) == 6
+        for password in BREACHED:
+            assert password in breached_passwords
+        assert "correct horse battery staple" not in breached_passwords
+        assert "Password" not in breached_passwords
+
+
+def test_build_breach_file_keeps_whitespace_passwords(tmp_path):
+    source = tmp_path / "dump.txt"
+    source.write_bytes(b"password\n\n   \r\n\t\n")
+    destination = str(tmp_path / "breached.sha1")
+    # the empty line is skipped, but whitespace is a password
+    assert build_breach_file(str(source), destination, plaintext=True) == 3
+    with BreachedPasswords.open(destination) as breached_passwords:
+        assert "   " in breached_passwords
+        assert "\t" in breached_passwords
+        assert "" not in breached_passwords
+
+
+def test_build_breach_file_from_sha1(sha1_dump, tmp_path):
+    destination = str(tmp_path / "breached.sha1")
+    # a small chunk size, so the chunks have to be merged
+    assert build_breach_file(sha1_dump, destination, chunk_size=2) == 6
+
+    with open(destination, "rb") as f:
+        data = f.read()
+    digests = [data[i:i + 20] for i in range(0, len(data), 20)]
+    assert digests == sorted(sha1_digest(p) for p in BREACHED)
+
+    breached_passwords = BreachedPasswords.open(destination)
+    assert repr(breached_passwords) == f"BreachedPasswords('{destination}', 6 digests)"
+    for password in BREACHED:
+        assert password in breached_passwords
+    breached_passwords.close()
+
+
+@pytest.mark.parametrize("line", ["ABCD:3", "ABCD", "ZZ" * 20, "AB" * 21 + ":1"])
+def test_build_breach_file_with_malformed_lines(line, tmp_path):
+    source = tmp_path / "dump.txt"
+    lines = [sha1_digest(p).hex().upper() + ":1" for p in BREACHED]
+    source.write_text("\n".join(lines[:3] + [line] + lines[3:]) + "\n")
+    destination = str(tmp_path / "breached.sha1")
+    with pytest.raises(ValueError, match="line 4 "):
+        build_breach_file(str(source), destination)
+
+
+def test_breached_passwords_search():
+    random.seed(2)
+    digests = sorted({random.getrandbits(160).to_bytes(20, "big") for _ in range(5000)})
+    breached_passwords = BreachedPasswords(b"".join(digests))
+    assert len(breached_passwords) == len(digests)
+
+    for digest in digests:
+        assert breached_passwords.contains_digest(digest)
+    for _ in range(2000):
+        digest = random.getrandbits(160).to_bytes(20, "big")
+        assert breached_passwords.contains_digest(digest) == (digest in digests)
+
+    assert not breached_passwords.contains_digest(b"\x00" * 20)
+    assert not breached_passwords.contains_digest(b"\xff" * 20)
+
+
+def test_breached_passwords_empty(tmp_path):
+    path = tmp_path / "empty.sha1"
+    path.write_bytes(b"")
+    breached_passwords = BreachedPasswords.open(str(path))
+    assert len(breached_passwords) == 0
+    assert "password" not in breached_passwords
+
+
+def test_breached_passwords_breaks():
+    with pytest.raises(AssertionError):
+        BreachedPasswords(b"\x00" * 21)
+
@@ -0,0 +1,205 @@
+import pickle
+
+import pytest
+
+from password_validation import cache
+from password_validation.cache import ResultCache
+from password_validation.policy import PasswordPolicy
+
+PASSWORDS = [
+    "hello",
+    "HELLO",
+    "password123",
+    "Password123!",
+    "hello-this-is-quite-a-good-password",
+    "ab",
+    "a" * 200,
+]
+
+
+def test_results_are_the_same():
+    policy = PasswordPolicy(
+        uppercase=1, symbols=1, forbidden_words=["password123", "hello"]
+    )
+    expected = [
+        (
+            policy.test_password(password),
+            policy.test_password(password, failures_only=False),
+            policy.test_password(password, fail_fast=True),
+            policy.test_password(password, failures_only=False, fail_fast=True),
+            policy.check_code(password),
+            policy.validate(password),
+        )
+        for password in PASSWORDS
+    ]
+    policy.cache_results()
+    # twice, so the second is from the cache
+    for _ in range(2):
+        for password, (failures, every, first, first_every, code, valid) in zip(
+            PASSWORDS, expected
+        ):
+            assert repr(policy.test_password(password)) == repr(failures)
+            assert repr(policy.test_password(password, failures_only=False)) == repr(
+                every
+            )
+            assert repr(policy.test_password(password, fail_fast=True)) == repr(first)
+            assert repr(
+                policy.test_password(password, failures_only=False, fail_fast=True)
+            ) == repr(first_every)
+            assert policy.check_code(password) == code
+            assert policy.validate(password) is valid
+
+
+def test_hits_and_misses():
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results()
+    assert policy.result_cache is result_cache
+    policy.test_password("hello")
+    policy.test_password("hello")
+    policy.check_code("hello")
+    policy.validate("hello-this-is-quite-a-good-password")
+    stats = result_cache.stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 2
+    assert stats["size"] == len(result_cache) == 2
+
+
+def test_lru_eviction():
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results(maxsize=2)
+    policy.check_code("one")
+    policy.check_code("two")
+    policy.check_code("one")
+    policy.check_code("three")
+    assert result_cache.stats()["evictions"] == 1
+    # "two" was the least recently used
+    policy.check_code("one")
+    assert result_cache.stats()["hits"] == 2
+    policy.check_code("two")
+    assert result_cache.stats()["misses"] == 4
+
+
+def test_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(cache.time, "monotonic", lambda: now[0])
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results(ttl=10)
+    policy.check_code("hello")
+    now[0] += 5
+    policy.check_code("hello")
+    assert result_cache.stats()["hits"] == 1
+    now[0] += 10
+    policy.check_code("hello")
+    assert result_cache.stats()["misses"] == 2
+
+
+def test_invalidated_when_the_policy_changes():
+    forbidden_words = ["hello"]
+    policy = PasswordPolicy(min_length=5, forbidden_words=forbidden_words)
+    result_cache = policy.cache_results()
+    assert policy.validate("hellothere") is True
+
+    # the policy has its own copy of the words
+    forbidden_words.append("hellothere")
+    assert policy.validate("hellothere") is True
+    assert result_cache.stats()["invalidations"] == 0
+
+    policy.forbidden_words.append("hellothere")
+    assert policy.validate("hellothere") is False
+    assert result_cache.stats()["invalidations"] == 1
+
+    # the same number of words, but not the same words
+    policy.forbidden_words[1] = "goodbye"
+    assert policy.validate("hellothere") is True
+    assert result_cache.stats()["invalidations"] == 2
+
+    policy.min_length_requirement.requirement = 20
+    assert policy.test_password("hellothere")[0].name == "the minimum password length"
+    assert result_cache.stats()["invalidations"] == 3
+
+
+def test_another_policy_changing_does_not_invalidate():
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results()
+    policy.check_code("hello")
+    PasswordPolicy(forbidden_words=["hello"]).forbidden_words.append("goodbye")
+    policy.check_code("hello")
+    assert result_cache.stats()["hits"] == 1
+    assert result_cache.stats()["invalidations"] == 0
+
+
+def test_a_valid_password_is_not_looked_at_again(monkeypatch):
+    policy = PasswordPolicy()
+    policy.cache_results()
+    password = "hello-this-is-quite-a-good-password"
+    assert policy.test_password(password) == []
+
+    def entropy(password):
+        raise AssertionError("looked at again")
+
+    monkeypatch.setattr(policy, "entropy", entropy)
+    assert policy.test_password(password) == []
+    assert policy.test_password(password, fail_fast=True) == []
+
+
+def test_an_invalid_password_is_not_looked_at_again(monkeypatch):
+    policy = PasswordPolicy(uppercase=1, forbidden_words=["hello"])
+    policy.cache_results()
+    expected = [
+        repr(policy.test_password("hello", failures_only=False)),
+        repr(policy.test_password("hello")),
+        repr(policy.test_password("hello", fail_fast=True)),
+    ]
+
+    def entropy(password):
+        raise AssertionError("looked at again")
+
+    monkeypatch.setattr(policy, "entropy", entropy)
+    assert [
+        repr(policy.test_password("hello", failures_only=False)),
+        repr(policy.test_password("hello")),
+        repr(policy.test_password("hello", fail_fast=True)),
+    ] == expected
+
+
+def test_the_password_is_not_kept():
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results()
+    policy.test_password("hello")
+    (key,) = result_cache.codes
+    assert isinstance(key, bytes)
+    assert b"hello" not in key
+    assert "hello" not in repr(result_cache.codes)
+
+
+def test_a_new_key_is_invalidated(monkeypatch):
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results()
+    policy.check_code("hello")
+    # as in a forked process
+    monkeypatch.setattr(cache, "_key", b"another key")
+    policy.check_code("hello")
+    assert result_cache.stats()["hits"] == 0
+    assert result_cache.stats()["invalidations"] == 1
+
+
+def test_errors_are_not_cached():
+    policy = PasswordPolicy()
+    result_cache = policy.cache_results()
+    with pytest.raises(AssertionError):
+        policy.test_password("helloሴ")
+    assert len(result_cache) == 0
+
+
+def test_pickling_drops_the_cache():
+    policy = PasswordPolicy()
+    policy.cache_results()
+    policy.test_password("hello")
+    assert pickle.loads(pickle.dumps(policy)).result_cache is None
+
+
+def test_arguments():
+    with pytest.raises(AssertionError):
+        ResultCache(PasswordPolicy(), maxsize=0)
+    with pytest.raises(AssertionError):
+        ResultCache(PasswordPolicy(), ttl=0)
@@ -1,10 +1,15 @@
 import math
+from array import array
 
 import pytest
 
 from password_validation.calculate import Classifier
 from password_validation.calculate import EntropyRange
+from password_validation.calculate import Power
 from password_validation.calculate import calculate_entropy
+from password_validation.calculate import calculate_minimum_length
+from password_validation.calculate import log2_power
+from password_validation.calculate import calculate_number_of_possible_passwords
 from password_validation.exceptions import UnacceptableCharacters, ClassificationError
 
 
@@ -12,23 +17,79 @@ def test_calculate_entropy_strict():
     password = "hello world"
 
     entropy = calculate_entropy(password, method="strict")
-    assert entropy == math.log(len(set(password)) ** len(password), 2)
+    assert entropy == pytest.approx(math.log(len(set(password)) ** len(password), 2))
 
 
 def test_calculate_entropy_normal():
     password = "hello world"
 
     entropy = calculate_entropy(password)
-    assert entropy == math.log(27 ** len(password), 2)
+    assert entropy == pytest.approx(math.log(27 ** len(password), 2))
 
     entropy = calculate_entropy(password, method="normal")
-    assert entropy == math.log(27 ** len(password), 2)
+    assert entropy == pytest.approx(math.log(27 ** len(password), 2))
 
 
 def test_calculate_entropy_lenient():
     password = "hello world"
     entropy = calculate_entropy(password, method="lenient")
-    assert entropy == math.log(95 ** len(password), 2)
+    assert entropy == pytest.approx(math.log(95 ** len(password), 2))
+
+
+def test_calculate_entropy_long_password():
+    password = "correct horse battery staple " * 4 + "!!!!"
+    assert len(password) == 120
+
+    entropy = calculate_entropy(password)
+    assert entropy == pytest.approx(len(password) * math.log2(95 - 26 - 10))
+    assert entropy == pytest.approx(math.log(59 ** len(password), 2))
+
+
+def test_calculate_entropy_empty_password():
+    assert calculate_entropy("") == 0
+    assert calculate_entropy("", method="strict") == 0
+    assert calculate_entropy("", method="lenient") == 0
+
+
+def test_calculate_number_of_possible_passwords():
+    password = "hello world"
+    assert calculate_number_of_possible_passwords(password) == 27 ** 11
+    assert calculate_number_of_possible_passwords(password, method="strict") == 8 ** 11
+
+    power = calculate_number_of_possible_passwords(password, lazy=True)
+    assert isinstance(power, Power)
+    assert power.base == 27
+    assert power.exponent == 11
+    assert power == 27 ** 11
+
+    with pytest.raises(ValueError):
+        calculate_number_of_possible_passwords(password, method="loose")
+
+
+def test_calculate_minimum_length():
+    assert calculate_minimum_length(95, 32) == 5
+    assert log2_power(95, 4) < 32 <= log2_power(95, 5)
+    assert calculate_minimum_length(2, 32) == 32
+    assert calculate_minimum_length(26, 0) == 0
+    assert calculate_minimum_length(1, 32) is None
+    assert calculate_minimum_length(0, 32) is None
+
+    for pool_of_characters in range(2, 100):
+        length = calculate_minimum_length(pool_of_characters, 32)
+        assert log2_power(pool_of_characters, length) >= 32
+        assert log2_power(pool_of_characters, length - 1) < 32
+
+
+def test_power():
+    power = Power(95, 128)
+    assert repr(power) == "Power(95, 128)"
+    assert power.log2() == pytest.approx(math.log(95 ** 128, 2))
+    assert int(power) == 95 ** 128
+    assert power == Power(95, 128)
+    assert power != Power(95, 127)
+
+    assert Power(10, 0).log2() == 0
+    assert int(Power(10, 0)) == 1
 
 
 def test_calculate_entropy_with_unacceptable_characters():
@@ -70,10 +131,66 @@ def test_classifier_classify():
 
 def test_custom_classifier():
     ranges = {
-        "Bad": EntropyRange(0, 500),
+        "Bad": EntropyRange(0, 50),
         "OK": EntropyRange(50, 100),
         "Good": EntropyRange(100, 150),
     }
     classifier = Classifier(ranges)
+    assert classifier.boundaries == [0, 50, 100, 150]
+    assert classifier.classifications == ["Bad", "OK", "Good"]
+    assert classifier.classify(50) == "Bad"
+    assert classifier.classify(50.1) == "OK"
+    assert classifier.classify(150) == "Good"
+
+    with pytest.raises(ClassificationError):
+        classifier.classify(150.1)
+    with pytest.raises(ClassificationError):
+        classifier.classify(0)
+    with pytest.raises(ClassificationError):
+        classifier.classify(-1)
+
+
+def test_custom_classifier_unordered():
+    classifier = Classifier(
+        {"Good": EntropyRange(10, None), "Bad": EntropyRange(0, 10)}
+    )
+    assert classifier.classify(10) == "Bad"
+    assert classifier.classify(10 ** 6) == "Good"
+
+
+def test_custom_classifier_breaks():
+    # overlap
+    with pytest.raises(AssertionError):
+        Classifier(
+            {
+                "Bad": EntropyRange(0, 500),
+                "OK": EntropyRange(50, 100),
+                "Good": EntropyRange(100, 150),
+            }
+        )
+    # gap
+    with pytest.raises(AssertionError):
+        Classifier({"Bad": EntropyRange(0, 50), "Good": EntropyRange(60, None)})
+    # doesn't start at 0
+    with pytest.raises(AssertionError):
+        Classifier({"Bad": EntropyRange(10, 50), "Good": EntropyRange(50, None)})
+    # not a range
+    with pytest.raises(AssertionError):
+        Classifier({"Bad": (0, 50)})
+
+
+def test_classifier_classify_many():
+    classifier = Classifier()
+    values = [1, 28, 30, 35, 50, 59, 100, 127, 128, 10000]
+    assert classifier.classify_many(values) == [
+        classifier.classify(value) for value in values
+    ]
+    assert classifier.classify_many(array("d", values)) == classifier.classify_many(
+        values
+    )
+    assert classifier.classify_many([]) == []
+
+    with pytest.raises(ClassificationError):
+        classifier.classify_many([1, 0])
 
 
@@ -1,4 +1,17 @@
+import copy
+import pickle
+
+import pytest
+
 from password_validation.character_pool import CharacterPool
+from password_validation.character_pool import CharacterRanges
+from password_validation.character_pool import DEFAULT_CHARACTER_POOL
+from password_validation.character_pool import LOWERCASE
+from password_validation.character_pool import NUMBERS
+from password_validation.character_pool import OTHER
+from password_validation.character_pool import SYMBOLS
+from password_validation.character_pool import UPPERCASE
+from password_validation.character_pool import WHITESPACE
 
 from password_validation.character_pool import lenient_pool_of_unique_characters
 from password_validation.character_pool import normal_pool_of_unique_characters
@@ -224,3 +237,168 @@ def test_lenient_evaluation():
     pool = CharacterPool()
     assert lenient_pool_of_unique_characters() == len(pool.all)
     assert lenient_pool_of_unique_characters() == 95
+
+
+def test_analyse():
+    pool = CharacterPool()
+
+    analysis = pool.analyse("Hello World 1234$")
+    assert analysis.lowercase == 8
+    assert analysis.uppercase == 2
+    assert analysis.numbers == 4
+    assert analysis.symbols == 1
+    assert analysis.whitespace == 2
+    assert analysis.other == 0
+    assert analysis.length == 17
+    assert analysis.mask == LOWERCASE | UPPERCASE | NUMBERS | SYMBOLS | WHITESPACE
+    assert not analysis.unknown
+    assert pool.mask_sizes[analysis.mask] == 95
+
+    analysis = pool.analyse("")
+    assert analysis.length == 0
+    assert analysis.mask == 0
+    assert not analysis.unknown
+
+    analysis = pool.analyse("héllo")
+    assert analysis.lowercase == 4
+    assert analysis.unknown
+
+
+def test_analyse_character_in_more_than_one_class():
+    pool = CharacterPool(lowercase="abc", uppercase="ABC", symbols="a")
+
+    analysis = pool.analyse("aaB")
+    assert analysis.lowercase == 2
+    assert analysis.symbols == 2
+    assert analysis.uppercase == 1
+    assert analysis.mask == LOWERCASE | UPPERCASE | SYMBOLS
+    assert normal_pool_of_unique_characters("aaB", character_pool=pool) == 7
+
+
+def test_character_pool_is_interned():
+    assert CharacterPool() is CharacterPool()
+    assert CharacterPool() is DEFAULT_CHARACTER_POOL
+    assert CharacterPool(lowercase="abc") is CharacterPool(lowercase="cba")
+    assert CharacterPool(lowercase="abc") is CharacterPool(lowercase=["a", "b", "c"])
+    assert CharacterPool(lowercase="abc") is not CharacterPool(lowercase="abcd")
+
+    pool = CharacterPool(lowercase="abc")
+    assert pool.lowercase == set("abc")
+    assert pool.sizes == (3, 26, 10, 32, 1, 0)
+
+
+def test_character_pool_is_immutable():
+    pool = CharacterPool()
+    with pytest.raises(AttributeError):
+        pool.lowercase = set("abc")
+    with pytest.raises(AttributeError):
+        del pool.lowercase
+    with pytest.raises(AttributeError):
+        pool.lowercase.add("é")
+
+
+def test_character_pool_is_hashable():
+    pools = {CharacterPool(), CharacterPool(), CharacterPool(lowercase="abc")}
+    assert len(pools) == 2
+    assert CharacterPool() == CharacterPool()
+    assert CharacterPool() != CharacterPool(lowercase="abc")
+    assert CharacterPool() != "CharacterPool()"
+
+
+def test_character_pool_pickle():
+    pool = CharacterPool(lowercase="abc", other="é")
+    assert pickle.loads(pickle.dumps(pool)) is pool
+    assert copy.deepcopy(pool) is pool
+    assert repr(pool).startswith("CharacterPool(lowercase='abc', uppercase='ABC")
+
+
+def test_character_ranges():
+    ranges = CharacterRanges([(0x61, 0x7A), (0x41, 0x5A), (0x5B, 0x5B), (0x70, 0x72)])
+    assert ranges.ranges == ((0x41, 0x5B), (0x61, 0x7A))
+    assert len(ranges) == 27 + 26
+    assert "a" in ranges
+    assert "[" in ranges
+    assert "\\" not in ranges
+    assert "é" not in ranges
+    assert "ab" not in ranges
+    assert 97 not in ranges
+    assert set(ranges) == set("ABCDEFGHIJKLMNOPQRSTUVWXYZ[abcdefghijklmnopqrstuvwxyz")
+
+    assert CharacterRanges.from_characters("cab") == CharacterRanges([(0x61, 0x63)])
+    assert set(CharacterRanges.from_characters("cab")) == set("abc")
+    # only equal to other ranges, as it doesn't hash the same as a frozenset
+    assert CharacterRanges.from_characters("cab") != frozenset("abc")
+    assert hash(CharacterRanges([(1, 2)])) == hash(CharacterRanges([(1, 1), (2, 2)]))
+
+    union = frozenset("xyz") | CharacterRanges.from_characters("abc")
+    assert isinstance(union, CharacterRanges)
+    assert set(union) == set("abcxyz")
+
+    with pytest.raises(AssertionError):
+        CharacterRanges([(5, 4)])
+
+
+def test_character_ranges_from_categories():
+    uppercase = CharacterRanges.from_categories("Lu")
+    assert "A" in uppercase
+    assert "É" in uppercase
+    assert "Ж" in uppercase
+    assert "a" not in uppercase
+
+    letters = CharacterRanges.from_categories("L")
+    assert "字" in letters
+    assert "a" in letters
+    assert "1" not in letters
+
+
+def test_character_pool_with_ranges():
+    pool = CharacterPool(other=CharacterRanges([(0x4E00, 0x9FFF)]))
+    assert pool.other == CharacterRanges([(0x4E00, 0x9FFF)])
+    assert len(pool.other) == 20992
+    assert len(pool.all) == 95 + 20992
+    assert len(pool.lookup) == 95
+    assert CharacterPool(other=CharacterRanges([(0x4E00, 0x9FFF)])) is pool
+    assert pickle.loads(pickle.dumps(pool)) is pool
+
+    analysis = pool.analyse("hello 字字")
+    assert analysis.lowercase == 5
+    assert analysis.other == 2
+    assert not analysis.unknown
+    assert pool.analyse("hello 😀").unknown
+
+    assert pool.character_mask("字") == OTHER
+    assert pool.character_mask("a") == LOWERCASE
+    assert pool.character_mask("😀") is None
+
+    assert normal_pool_of_unique_characters("hello 字", character_pool=pool) == (
+        26 + 1 + 20992
+    )
+    assert lenient_pool_of_unique_characters(character_pool=pool) == 95 + 20992
+
+
+def test_character_pool_classes_are_the_same_however_given():
+    small = CharacterPool(other=CharacterRanges([(0x61, 0x63)]))
+    assert small is CharacterPool(other="abc")
+    assert small.other == frozenset("abc")
+    assert len({small, CharacterPool(other="cba")}) == 1
+
+    ideographs = CharacterRanges([(0x4E00, 0x9FFF)])
+    large = CharacterPool(other="".join(ideographs))
+    assert large is CharacterPool(other=ideographs)
+    assert large.other == ideographs
+
+
+def test_character_pool_from_unicode_categories():
+    pool = CharacterPool.from_unicode_categories(other=("Lo",))
+    assert pool is CharacterPool.from_unicode_categories(other=("Lo",))
+    # only the spaces are few enough to be a frozenset, the rest are ranges
+    assert set(pool.lookup) == pool.whitespace
+
+    analysis = pool.analyse("Héllo Wörld 字 ١٢!")
+    assert analysis.lowercase == 8
+    assert analysis.uppercase == 2
+    assert analysis.numbers == 2
+    assert analysis.symbols == 1
+    assert analysis.whitespace == 3
+    assert analysis.other == 1
+    assert not analysis.unknown
@@ -0,0 +1,149 @@
+import io
+import json
+
+import pytest
+
+from password_validation.bloom import BloomFilter
+from password_validation.breach import BreachedPasswords
+from password_validation.calculate import calculate_entropy
+from password_validation.cli import failure_names
+from password_validation.cli import load_policy
+from password_validation.cli import main
+from password_validation.markov import MarkovModel
+from password_validation.policy import RequirementCode
+
+PASSWORDS = "hello\nhello-this-is-quite-a-good-password\nhéllo\npassword\n"
+
+
+def run(argv, stdin=PASSWORDS):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    assert main(argv, stdin=io.StringIO(stdin), stdout=stdout, stderr=stderr) == 0
+    return stdout.getvalue().splitlines(), stderr.getvalue().splitlines()
+
+
+def test_failure_names():
+    assert failure_names(0) == []
+    code = RequirementCode.MIN_LENGTH | RequirementCode.ENTROPY
+    assert failure_names(code) == ["min_length", "entropy"]
+
+
+def test_jsonl():
+    out, err = run([])
+    rows = [json.loads(line) for line in out]
+    assert [row["line"] for row in rows] == [1, 2, 3, 4]
+    assert rows[0] == {
+        "line": 1,
+        "valid": False,
+        "code": 320,
+        "failures": ["min_length", "entropy"],
+    }
+    assert rows[1] == {"line": 2, "valid": True, "code": 0, "failures": []}
+    assert rows[2]["code"] is None
+    assert rows[2]["error"] == "unacceptable characters"
+    assert "password" not in rows[0]
+    assert err == []
+
+
+def test_failures_only_and_include_password():
+    out, err = run(["--failures-only", "--include-password"])
+    rows = [json.loads(line) for line in out]
+    assert [row["password"] for row in rows] == ["hello", "héllo", "password"]
+
+
+def test_csv():
+    out, err = run(["--format", "csv", "--failures-only"])
+    assert out[0] == "line,valid,code,failures,error"
+    assert out[1] == "1,False,320,min_length;entropy,"
+    assert out[2] == "3,False,,,unacceptable characters"
+
+
+def test_summary_and_stats():
+    out, err = run(["--summary", "--stats"])
+    summary = json.loads(err[0])["summary"]
+    assert summary["total"] == 4
+    assert summary["valid"] == 1
+    assert summary["invalid"] == 2
+    assert summary["errors"] == 1
+    assert summary["failures"]["min_length"] == 2
+    stats = json.loads(err[1])["stats"]
+    assert stats["passwords"] == 4
+
+
+def test_input_file(tmp_path):
+    path = tmp_path / "passwords.txt"
+    path.write_bytes(b"hello\n\xffhello\n")
+    out, err = run([str(path)], stdin="")
+    rows = [json.loads(line) for line in out]
+    assert rows[0]["failures"] == ["min_length", "entropy"]
+    # undecodable bytes are unacceptable characters, not a crash
+    assert rows[1]["error"] == "unacceptable characters"
+
+
+def test_policy_files(tmp_path):
+    json_path = tmp_path / "policy.json"
+    json_path.write_text(json.dumps({"min_length": 4, "forbidden_words": ["hello"]}))
+    toml_path = tmp_path / "policy.toml"
+    toml_path.write_text('min_length = 4\nforbidden_words = ["hello"]\n')
+
+    for path in (json_path, toml_path):
+        policy = load_policy(str(path))
+        assert policy.min_length == 4
+        assert policy.forbidden_words == ["hello"]
+
+        out, err = run(["-", "--policy", str(path)], stdin="hello\n")
+        assert json.loads(out[0])["failures"] == ["entropy", "forbidden_words"]
+
+
+def test_build_bloom(tmp_path):
+    source = tmp_path / "words.txt"
+    source.write_text("password\nqwerty\n")
+    destination = str(tmp_path / "words.bloom")
+    out, err = run(
+        ["build-bloom", str(source), destination, "--false-positive-rate", "0.01"]
+    )
+    assert out[0].startswith("wrote 2 words in ")
+    assert "qwerty" in BloomFilter.open(destination)
+
+
+def test_build_breach(tmp_path):
+    source = tmp_path / "dump.txt"
+    source.write_text("password\n123456\nqwerty\n", encoding="utf-8")
+    destination = str(tmp_path / "breached.sha1")
+    out, err = run(
+        ["build-breach", str(source), destination, "--plaintext", "--chunk-size", "2"]
+    )
+    assert out == [f"wrote 3 digests to {destination}"]
+    assert "qwerty" in BreachedPasswords.open(destination)
+
+
+def test_build_markov(tmp_path):
+    source = tmp_path / "passwords.txt"
+    source.write_text("password\nqwerty\n")
+    destination = str(tmp_path / "passwords.markov")
+    out, err = run(
+        ["build-markov", str(source), destination, "--order", "2", "--buckets", "1024"]
+    )
+    assert out[0].startswith("wrote a model of order 2 of 2 ")
+    assert MarkovModel.open(destination).entropy("qwerty") < calculate_entropy(
+        "qwerty"
+    )
+
+
+@pytest.mark.parametrize(
+    "argv, message",
+    [
+        (["build-bloom", "--false-positive-rate", "1"], "--false-positive-rate must"),
+        (["build-breach", "--chunk-size", "0"], "--chunk-size must be at least 1"),
+        (["build-breach"], "is not a SHA-1 hex digest"),
+        (["build-markov", "--order", "-1"], "--order must be at least 0"),
+        (["build-markov", "--buckets", "1000"], "--buckets must be a power of two"),
+    ],
+)
+def test_build_with_bad_arguments(tmp_path, capsys, argv, message):
+    source = tmp_path / "dump.txt"
+    source.write_text("not a digest\n")
+    destination = str(tmp_path / "built")
+    with pytest.raises(SystemExit) as exc_info:
+        main(argv[:1] + [str(source), destination] + argv[1:])
+    assert exc_info.value.code == 2
+    assert message in capsys.readouterr().err
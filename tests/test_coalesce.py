@@ -0,0 +1,131 @@
+import asyncio
+
+import pytest
+
+from password_validation.coalesce import ValidationCoalescer
+from password_validation.policy import PasswordPolicy
+
+PASSWORDS = [
+    "hello",
+    "password",
+    "hello-this-is-quite-a-good-password",
+    "Hello World 1234$",
+    "aaaaaaaaaaaa",
+    "",
+    "hello",
+]
+
+
+def test_coalescer_flushes_by_size():
+    policy = PasswordPolicy(forbidden_words=["aaaaaaaaaaaa"])
+
+    async def run():
+        coalescer = ValidationCoalescer(
+            policy, max_batch_size=len(PASSWORDS), max_delay=10
+        )
+        results = await asyncio.gather(
+            *(coalescer.validate(password) for password in PASSWORDS)
+        )
+        return coalescer, results
+
+    coalescer, results = asyncio.run(run())
+    assert results == [policy.validate(password) for password in PASSWORDS]
+    metrics = coalescer.metrics()
+    assert metrics["batches"] == 1
+    assert metrics["validations"] == len(PASSWORDS)
+    assert metrics["mean_batch_size"] == len(PASSWORDS)
+    assert metrics["largest_batch_size"] == len(PASSWORDS)
+    assert metrics["flushes_by_size"] == 1
+    assert metrics["flushes_by_time"] == 0
+    assert metrics["largest_queue_latency"] >= metrics["mean_queue_latency"] >= 0
+
+
+def test_coalescer_flushes_by_time():
+    policy = PasswordPolicy()
+
+    async def run():
+        coalescer = ValidationCoalescer(policy, max_batch_size=100, max_delay=0.01)
+        async with coalescer:
+            first = await asyncio.gather(*map(coalescer.validate, PASSWORDS[:3]))
+            second = await asyncio.gather(*map(coalescer.validate, PASSWORDS[3:]))
+        return coalescer, first + second
+
+    coalescer, results = asyncio.run(run())
+    assert results == [policy.validate(password) for password in PASSWORDS]
+    metrics = coalescer.metrics()
+    assert metrics["batches"] == 2
+    assert metrics["flushes_by_time"] == 2
+    assert metrics["largest_queue_latency"] >= 0.005
+
+
+def test_coalescer_errors_go_to_their_caller():
+    policy = PasswordPolicy(min_length=4)
+
+    async def run():
+        coalescer = ValidationCoalescer(policy, max_batch_size=3)
+        return await asyncio.gather(
+            coalescer.validate("hello-this-is-quite-a-good-password"),
+            coalescer.validate("héllo"),
+            coalescer.validate("hello"),
+            return_exceptions=True,
+        )
+
+    good, error, bad = asyncio.run(run())
+    assert good is True
+    assert isinstance(error, AssertionError)
+    assert bad is False
+
+
+def test_coalescer_cancelled_caller():
+    policy = PasswordPolicy()
+
+    async def run():
+        coalescer = ValidationCoalescer(policy, max_batch_size=10, max_delay=0.01)
+        cancelled = asyncio.ensure_future(coalescer.validate("hello"))
+        kept = asyncio.ensure_future(
+            coalescer.validate("hello-this-is-quite-a-good-password")
+        )
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        assert await kept is True
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        await coalescer.close()
+
+    asyncio.run(run())
+
+
+def test_coalescer_cancelled_batch():
+    policy = PasswordPolicy()
+
+    async def avalidate_many(passwords, executor=None):
+        await asyncio.sleep(3600)
+
+    policy.avalidate_many = avalidate_many
+
+    async def run():
+        coalescer = ValidationCoalescer(policy, max_batch_size=2)
+        callers = [
+            asyncio.ensure_future(coalescer.validate(password))
+            for password in ("hello", "password")
+        ]
+        await asyncio.sleep(0)
+        (batch,) = coalescer.tasks
+        await asyncio.sleep(0)
+        batch.cancel()
+        # the callers aren't left waiting for the batch
+        return await asyncio.wait_for(
+            asyncio.gather(*callers, return_exceptions=True), 1
+        )
+
+    results = asyncio.run(run())
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+def test_coalescer_breaks():
+    with pytest.raises(AssertionError):
+        ValidationCoalescer(PasswordPolicy(), max_batch_size=0)
+    with pytest.raises(AssertionError):
+        ValidationCoalescer(PasswordPolicy(), max_delay=-1)
+    with pytest.raises(AssertionError):
+        ValidationCoalescer(None)
@@ -0,0 +1,153 @@
+import hashlib
+import random
+
+import pytest
+
+from password_validation.automaton import AhoCorasick
+from password_validation.breach import BreachedPasswords
+from password_validation.character_pool import CharacterPool
+from password_validation.incremental import IncrementalPassword
+from password_validation.password import Password
+from password_validation.policy import PasswordPolicy
+
+CHARACTERS = "abcdeSTUVW0123!@# "
+
+
+def check_same(incremental, policy):
+    password = incremental.password
+    assert incremental.length == len(incremental) == len(password)
+    for failures_only in (True, False):
+        for fail_fast in (True, False):
+            assert repr(incremental.test_password(failures_only, fail_fast)) == repr(
+                policy.test_password(password, failures_only, fail_fast)
+            )
+    assert incremental.check_code() == policy.check_code(password)
+    assert incremental.validate() is policy.validate(password)
+
+
+def random_edits(incremental, policy, seed, number=300):
+    rng = random.Random(seed)
+    expected = ""
+    for _ in range(number):
+        edit = rng.random()
+        characters = "".join(rng.choices(CHARACTERS, k=rng.randint(1, 3)))
+        if edit < 0.5:
+            incremental.append(characters)
+            expected += characters
+        elif edit < 0.7:
+            incremental.backspace()
+            expected = expected[:-1]
+        else:
+            start = rng.randint(0, len(expected))
+            stop = rng.randint(start, len(expected))
+            incremental.replace(start, stop, characters)
+            expected = expected[:start] + characters + expected[stop:]
+        assert incremental.password == expected
+        check_same(incremental, policy)
+
+
+@pytest.mark.parametrize(
+    "policy",
+    [
+        PasswordPolicy(min_length=4, max_length=16, uppercase=1, numbers=2),
+        PasswordPolicy(min_length=4, forbidden_words=["abc", "ss", "0123"]),
+        PasswordPolicy(
+            min_length=4,
+            forbidden_words=["abc", "ss", "0123", "STU", "W0"],
+            forbidden_words_match="substring",
+        ),
+    ],
+)
+def test_the_same_as_the_policy(policy):
+    random_edits(IncrementalPassword(policy), policy, seed=1)
+
+
+def test_frozen_automaton():
+    policy = PasswordPolicy(
+        min_length=4, forbidden_words=["abc", "ss"], forbidden_words_match="substring"
+    )
+    policy.forbidden_words_requirements.requirement = AhoCorasick(
+        ["abc", "ss"]
+    ).freeze()
+    incremental = IncrementalPassword(policy)
+    assert incremental.automaton is policy.forbidden_words_requirements.requirement
+    random_edits(incremental, policy, seed=2, number=100)
+
+
+def test_casefolded_characters():
+    policy = PasswordPolicy(
+        min_length=1,
+        character_pool=CharacterPool(other="ß"),
+        forbidden_words=["strasse"],
+        forbidden_words_match="substring",
+    )
+    incremental = IncrementalPassword(policy, "STRA")
+    incremental.append("ß")
+    assert not incremental.validate()
+    incremental.append("e")
+    assert not incremental.validate()
+    check_same(incremental, policy)
+    incremental.replace(4, 5, "s")
+    assert incremental.validate()
+    check_same(incremental, policy)
+
+
+def test_breached_passwords():
+    breached = ["abcdeS0!", "aaaaaaaa"]
+    digests = sorted(hashlib.sha1(p.encode("utf-8")).digest() for p in breached)
+    policy = PasswordPolicy(
+        min_length=7, breached_passwords=BreachedPasswords(b"".join(digests))
+    )
+    incremental = IncrementalPassword(policy, "abcdeS0")
+    assert incremental.validate()
+    incremental.append("!")
+    assert not incremental.validate()
+    assert incremental.test_password()[-1].name == "breached passwords"
+    check_same(incremental, policy)
+
+
+def test_counts():
+    incremental = IncrementalPassword(PasswordPolicy(), "Hello World 1!")
+    assert (
+        incremental.lowercase,
+        incremental.uppercase,
+        incremental.numbers,
+        incremental.symbols,
+        incremental.whitespace,
+        incremental.other,
+    ) == (8, 2, 1, 1, 2, 0)
+    assert incremental.entropy == PasswordPolicy().entropy(Password("Hello World 1!"))
+    incremental.delete(0)
+    incremental.delete(-1)
+    incremental.insert(0, "h")
+    assert incremental.password == "hello World 1"
+    assert incremental.uppercase == 1
+    assert incremental.symbols == 0
+    incremental.update("hello Word 12")
+    assert incremental.password == "hello Word 12"
+    incremental.clear()
+    assert incremental.password == ""
+    assert incremental.mask == 0
+    assert repr(incremental) == "IncrementalPassword(length=0)"
+
+
+def test_only_changed_requirements_are_tested():
+    policy = PasswordPolicy(uppercase=1, numbers=1)
+    incremental = IncrementalPassword(policy, "Helloworld12")
+    incremental.test_password()
+    assert len(incremental.fulfilled) == 10
+
+    incremental.replace(1, 2, "a")
+    # the same length and classes, only the forbidden words are tested again
+    assert sorted(incremental.fulfilled) == [0, 1, 2, 3, 4, 5, 6, 7, 8]
+    incremental.test_password()
+    incremental.append("x")
+    assert sorted(incremental.fulfilled) == [1, 2, 3, 4, 5]
+
+
+def test_unknown_characters():
+    incremental = IncrementalPassword(PasswordPolicy(), "hello")
+    with pytest.raises(AssertionError):
+        incremental.append("wörld")
+    assert incremental.password == "hello"
+    assert incremental.lowercase == 5
@@ -0,0 +1,114 @@
+import pickle
+import threading
+
+import pytest
+
+from password_validation.instrumentation import Histogram
+from password_validation.instrumentation import Instrumentation
+from password_validation.policy import PasswordPolicy
+
+
+def test_histogram():
+    histogram = Histogram((1, 2, 5))
+    for value in (0.5, 1, 1.5, 2, 10):
+        histogram.observe(value)
+    assert histogram.to_dict() == {
+        "buckets": [1, 2, 5],
+        "counts": [2, 2, 0, 1],
+        "sum": 15.0,
+        "count": 5,
+    }
+
+
+def test_policy_instrumentation():
+    policy = PasswordPolicy(forbidden_words=["hello-this-is-quite-a-good-password"])
+    assert policy.instrumentation is None
+    instrumentation = policy.instrument()
+    assert policy.instrumentation is instrumentation
+
+    failures = policy.test_password("hello")
+    assert [requirement.name for requirement in failures] == [
+        "the minimum password length",
+        "entropy",
+    ]
+    assert len(policy.test_password("hello", failures_only=False)) == 10
+    assert len(policy.test_password("hello", fail_fast=True)) == 1
+    assert policy.test_password("hello-this-is-quite-a-good-password")
+    assert policy.validate("hello") is False
+
+    snapshot = instrumentation.snapshot()
+    requirements = snapshot["requirements"]
+    assert requirements["min_length"] == {"evaluations": 3, "failures": 2}
+    assert requirements["lowercase"] == {"evaluations": 3, "failures": 0}
+    assert requirements["forbidden_words"] == {"evaluations": 3, "failures": 1}
+    assert "breached_passwords" not in requirements
+
+    latency = snapshot["latency"]
+    assert latency["test_password"]["count"] == 4
+    assert latency["analysis"]["count"] == 3
+    assert latency["entropy"]["count"] == 3
+    assert latency["forbidden_words"]["count"] == 3
+    assert latency["validate"]["count"] == 1
+    assert sum(latency["analysis"]["counts"]) == 3
+
+    # stop recording
+    policy.instrumentation = None
+    policy.test_password("hello")
+    assert instrumentation.snapshot() == snapshot
+
+    instrumentation.reset()
+    assert instrumentation.snapshot() == {"requirements": {}, "latency": {}}
+
+
+def test_instrumentation_isnt_pickled():
+    policy = PasswordPolicy()
+    policy.instrument()
+    assert pickle.loads(pickle.dumps(policy)).instrumentation is None
+
+
+def test_instrumentation_threads():
+    policy = PasswordPolicy()
+    instrumentation = policy.instrument()
+
+    def run():
+        for _ in range(500):
+            policy.test_password("hello")
+
+    threads = [threading.Thread(target=run) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    snapshot = instrumentation.snapshot()
+    assert snapshot["requirements"]["min_length"]["failures"] == 2000
+    assert snapshot["latency"]["test_password"]["count"] == 2000
+
+
+def test_to_prometheus():
+    instrumentation = Instrumentation(buckets=(0.001, 0.01))
+    instrumentation.record(
+        {"test_password": 0.005}, [("min_length", False), ("entropy", True)]
+    )
+    assert instrumentation.to_prometheus().splitlines() == [
+        "# HELP password_validation_requirement_evaluations_total "
+        "Requirement evaluations",
+        "# TYPE password_validation_requirement_evaluations_total counter",
+        'password_validation_requirement_evaluations_total{requirement="entropy"} 1',
+        'password_validation_requirement_evaluations_total{requirement="min_length"} 1',
+        "# HELP password_validation_requirement_failures_total "
+        "Unfulfilled requirements",
+        "# TYPE password_validation_requirement_failures_total counter",
+        'password_validation_requirement_failures_total{requirement="entropy"} 0',
+        'password_validation_requirement_failures_total{requirement="min_length"} 1',
+        "# HELP password_validation_duration_seconds "
+        "Time taken by each phase of validation",
+        "# TYPE password_validation_duration_seconds histogram",
+        'password_validation_duration_seconds_bucket{phase="test_password",le="0.001"} 0',
+        'password_validation_duration_seconds_bucket{phase="test_password",le="0.01"} 1',
+        'password_validation_duration_seconds_bucket{phase="test_password",le="+Inf"} 1',
+        'password_validation_duration_seconds_sum{phase="test_password"} 0.005',
+        'password_validation_duration_seconds_count{phase="test_password"} 1',
+    ]
+
+    with pytest.raises(AssertionError):
+        Instrumentation(buckets=(1, 0.1))
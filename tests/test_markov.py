@@ -0,0 +1,130 @@
+import pickle
+import random
+import string
+
+import pytest
+
+from password_validation.calculate import calculate_entropy
+from password_validation.exceptions import UnacceptableCharacters
+from password_validation.incremental import IncrementalPassword
+from password_validation.markov import MarkovModel
+from password_validation.markov import _bucket
+from password_validation.markov import build_markov_model
+from password_validation.markov import default_model
+from password_validation.policy import PasswordPolicy
+
+CORPUS = ["password", "password1", "passw0rd", "dragon", "monkey", "sunshine"] * 5
+
+
+def random_passwords(number, seed):
+    rng = random.Random(seed)
+    characters = string.ascii_letters + string.digits + "!@#$%"
+    return [
+        "".join(rng.choices(characters, k=rng.randint(1, 30))) for _ in range(number)
+    ]
+
+
+def test_the_same_as_each_bucket():
+    # the rolling hash of entropy against the hash of each context and character
+    model = MarkovModel.build(CORPUS, order=2, number_of_buckets=2 ** 10)
+    shift = 64 - model.number_of_buckets.bit_length() + 1
+    for password in CORPUS + random_passwords(100, seed=1):
+        code_points = [ord(character) for character in password]
+        most = calculate_entropy(password) / len(password) * model.scale
+        expected = 0
+        for i in range(len(code_points)):
+            cost = model.costs[_bucket(code_points[max(i - 2, 0):i + 1], shift)]
+            expected += cost if 0 < cost < most else most
+        assert model.entropy(password) == pytest.approx(expected / model.scale)
+
+
+def test_corpus_passwords_take_fewer_guesses():
+    model = MarkovModel.build(CORPUS, order=3, number_of_buckets=2 ** 12)
+    assert model.number_of_passwords == len(CORPUS)
+    assert repr(model) == "MarkovModel(order=3)"
+    for password in ("password", "sunshine", "dragon"):
+        assert model.entropy(password) < calculate_entropy(password) / 2
+    # the same characters in an order the model hasn't seen
+    assert model.entropy("drowssap") > model.entropy("password") + 10
+
+
+def test_never_more_than_normal():
+    model = MarkovModel.build(CORPUS, order=3, number_of_buckets=2 ** 12)
+    for password in random_passwords(200, seed=2):
+        assert model.entropy(password) <= calculate_entropy(password) + 1e-9
+    # nothing seen is brute forced
+    assert MarkovModel.build([], number_of_buckets=2).entropy(
+        "x7#Kq9!mZ2"
+    ) == pytest.approx(calculate_entropy("x7#Kq9!mZ2"))
+
+
+def test_calculate_entropy():
+    assert calculate_entropy("", method="markov") == 0
+    assert calculate_entropy("password1", method="markov") < calculate_entropy(
+        "password1"
+    )
+    model = MarkovModel.build(CORPUS, number_of_buckets=2 ** 12)
+    assert calculate_entropy(
+        "password", method="markov", markov_model=model
+    ) == model.entropy("password")
+    with pytest.raises(UnacceptableCharacters):
+        calculate_entropy("pässword", method="markov")
+
+
+def test_markov_model_file(tmp_path):
+    source = tmp_path / "passwords.txt"
+    source.write_text("\n".join(CORPUS) + "\n\npässwörd\r\n", encoding="utf-8")
+    destination = str(tmp_path / "passwords.markov")
+
+    built = build_markov_model(str(source), destination, number_of_buckets=2 ** 12)
+    assert built.number_of_passwords == len(CORPUS) + 1
+
+    with MarkovModel.open(destination) as model:
+        assert repr(model) == f"MarkovModel('{destination}', order=3)"
+        assert bytes(model.buffer) == bytes(built.buffer)
+        assert model.entropy("password") == built.entropy("password")
+        assert pickle.loads(pickle.dumps(model)).path == destination
+
+
+def test_markov_model_breaks():
+    with pytest.raises(AssertionError):
+        MarkovModel(b"NOTMARKV" + b"\x00" * 24)
+    model = MarkovModel.build(CORPUS, number_of_buckets=2 ** 4)
+    with pytest.raises(AssertionError):
+        MarkovModel(bytes(model.buffer)[:-1])
+    with pytest.raises(AssertionError):
+        MarkovModel.build(CORPUS, number_of_buckets=3)
+    with pytest.raises(AssertionError):
+        MarkovModel.build([1])
+
+
+def test_pickling():
+    assert pickle.loads(pickle.dumps(default_model())) is default_model()
+    model = MarkovModel.build(iter(CORPUS), number_of_buckets=2 ** 8)
+    unpickled = pickle.loads(pickle.dumps(model))
+    assert unpickled.entropy("password") == model.entropy("password")
+
+
+def test_policy(tmp_path):
+    path = str(tmp_path / "passwords.markov")
+    MarkovModel.build(CORPUS, number_of_buckets=2 ** 12).save(path)
+    policy = PasswordPolicy(
+        min_length=6, min_entropy=30, entropy_method="markov", markov_model=path
+    )
+    assert policy.to_dict()["markov_model"] == path
+    assert PasswordPolicy.from_dict(policy.to_dict()).estimator.path == path
+
+    assert not policy.validate("password1")
+    assert PasswordPolicy(min_length=6, min_entropy=30).validate("password1")
+    assert policy.test_password("password1")[0].name == "entropy"
+    assert policy.validate_many(["password1", "x7#Kq9!mZ2"]) == [False, True]
+    assert policy.compile()("password1")[0].name == "entropy"
+
+    incremental = IncrementalPassword(policy, "passworm")
+    incremental.replace(7, 8, "d")
+    assert incremental.check_code() == policy.check_code("password")
+
+    assert PasswordPolicy(entropy_method="markov").estimator is default_model()
+    with pytest.raises(AssertionError):
+        PasswordPolicy(markov_model=path)
+
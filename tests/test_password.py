@@ -42,5 +42,7 @@ def test_another_password():
     assert password.uppercase == 2
     assert password.other == 0
     assert password.symbols == 1
+    assert password.numbers == 5
+    assert password.mask == 0b11111
 
     assert isinstance(password.entropy, (int, float))
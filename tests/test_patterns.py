@@ -0,0 +1,229 @@
+import math
+import pickle
+import random
+import string
+import time
+
+import pytest
+
+from password_validation.calculate import calculate_entropy
+from password_validation.character_pool import CharacterPool
+from password_validation.exceptions import UnacceptableCharacters
+from password_validation.incremental import IncrementalPassword
+from password_validation.password import Password
+from password_validation.patterns import KEYPAD
+from password_validation.patterns import KeyboardGraph
+from password_validation.patterns import MAX_ESTIMATED_LENGTH
+from password_validation.patterns import PatternEstimator
+from password_validation.patterns import QWERTY
+from password_validation.patterns import default_estimator
+from password_validation.policy import PasswordPolicy
+
+
+def patterns_of(password):
+    return [
+        (match.pattern, match.start, match.end)
+        for match in default_estimator().match_sequence(password)
+    ]
+
+
+@pytest.mark.parametrize(
+    "password, expected",
+    [
+        ("password", [("dictionary", 0, 8)]),
+        ("P4$$w0rd", [("dictionary", 0, 8)]),
+        ("abcdefgh", [("sequence", 0, 8)]),
+        ("97531", [("sequence", 0, 5)]),
+        ("wertyuio", [("keyboard", 0, 8)]),
+        ("zaq12wsx", [("keyboard", 0, 8)]),
+        ("13/05/1990", [("date", 0, 10)]),
+        ("13051990", [("date", 0, 8)]),
+        ("xyzxyzxyz", [("repeat", 0, 9)]),
+        ("qj2024", [("bruteforce", 0, 2), ("year", 2, 6)]),
+    ],
+)
+def test_patterns(password, expected):
+    assert patterns_of(password) == expected
+
+
+def test_the_decomposition_covers_the_password():
+    rng = random.Random(1)
+    for _ in range(50):
+        password = "".join(
+            rng.choice(["password", "2024", "qwerty", "abc", "!", "x", "Dragon"])
+            for _ in range(rng.randint(1, 8))
+        )
+        matches = default_estimator().match_sequence(password)
+        assert matches[0].start == 0
+        assert matches[-1].end == len(password)
+        for before, after in zip(matches, matches[1:]):
+            assert before.end == after.start
+
+
+def test_never_more_than_normal():
+    rng = random.Random(2)
+    characters = string.ascii_letters + string.digits + "!@#$%"
+    for _ in range(200):
+        password = "".join(rng.choices(characters, k=rng.randint(1, 40)))
+        assert default_estimator().entropy(password) <= calculate_entropy(
+            password
+        ) + 1e-9
+
+
+def test_random_passwords_are_normal():
+    password = "x7#Kq9!mZ2"
+    assert patterns_of(password) == [("bruteforce", 0, 10)]
+    assert default_estimator().entropy(password) == pytest.approx(
+        calculate_entropy(password)
+    )
+
+
+def test_patterns_take_fewer_guesses():
+    assert calculate_entropy("Password1!Password1!") > 128
+    assert calculate_entropy("Password1!Password1!", method="pattern") < 20
+    # the more times a base is repeated, the more guesses it takes, but not
+    # many more
+    assert (
+        calculate_entropy("abcxyz" * 2, method="pattern")
+        < calculate_entropy("abcxyz" * 3, method="pattern")
+        < calculate_entropy("abcxyz", method="pattern") + 2
+    )
+    # a common password is guessed before a rarer one
+    assert calculate_entropy("123456", method="pattern") < calculate_entropy(
+        "starwars", method="pattern"
+    )
+
+
+def test_empty_and_unknown_characters():
+    assert calculate_entropy("", method="pattern") == 0
+    with pytest.raises(UnacceptableCharacters):
+        calculate_entropy("hellóworld", method="pattern")
+    pool = CharacterPool(other="ó")
+    assert calculate_entropy("hellóworld", method="pattern", character_pool=pool)
+
+
+def test_dictionaries():
+    estimator = PatternEstimator({"names": ["jack", "ward"]})
+    assert [match.pattern for match in estimator.match_sequence("JackWard")] == [
+        "dictionary",
+        "dictionary",
+    ]
+    assert "dictionary" not in [
+        match.pattern for match in estimator.match_sequence("password")
+    ]
+    with pytest.raises(AssertionError):
+        PatternEstimator({"names": [1]})
+
+
+def test_keyboard_graph():
+    graph = KeyboardGraph.slanted(QWERTY)
+    assert "w" in graph.neighbours["q"]
+    assert "a" in graph.neighbours["q"]
+    # shifted keys are neighbours too
+    assert "@" in graph.neighbours["!"]
+    assert graph.entropy(6, 1, 0) < graph.entropy(6, 3, 0) < graph.entropy(6, 3, 2)
+
+
+def test_keyboard_graph_entropy_is_the_sum_of_its_walks():
+    for graph in (KeyboardGraph.slanted(QWERTY), KeyboardGraph.aligned(KEYPAD)):
+        for length in range(3, 30):
+            for turns in range(1, length):
+                # the walks of every length up to length with up to turns turns
+                guesses = sum(
+                    math.comb(i - 1, j - 1)
+                    * graph.starting_positions
+                    * graph.average_degree ** j
+                    for i in range(2, length + 1)
+                    for j in range(1, min(turns, i - 1) + 1)
+                )
+                assert graph.entropy(length, turns, 0) == pytest.approx(
+                    math.log2(guesses)
+                )
+
+
+def test_long_keyboard_walks_are_quick():
+    started = time.perf_counter()
+    for length in (64, 512, 4096):
+        assert calculate_entropy("12" * length, method="pattern") > 0
+    KeyboardGraph.aligned(KEYPAD).entropy(10 ** 6, 10 ** 6, 0)
+    # a quadratic sum of the walks took seconds
+    assert time.perf_counter() - started < 1
+
+
+def test_long_passwords_are_quick():
+    estimator = default_estimator()
+    digits = "".join(random.Random(0).choices(string.digits, k=64))
+    for password in ("12" * 32, "1990" * 16, digits):
+        took = []
+        for _ in range(50):
+            started = time.perf_counter()
+            estimator.entropy(password)
+            took.append(time.perf_counter() - started)
+        # the fastest, as the others are slowed by whatever else is running
+        assert min(took) < 0.001, password
+
+
+def test_long_passwords():
+    password = "password" * 100
+    # patterns are only looked for at the start
+    assert patterns_of(password) == [
+        ("repeat", 0, MAX_ESTIMATED_LENGTH),
+        ("bruteforce", MAX_ESTIMATED_LENGTH, len(password)),
+    ]
+    assert default_estimator().entropy(password) == pytest.approx(
+        default_estimator().entropy(password[:MAX_ESTIMATED_LENGTH])
+        + calculate_entropy(password) * (1 - MAX_ESTIMATED_LENGTH / len(password))
+    )
+
+
+def test_pickling():
+    assert pickle.loads(pickle.dumps(default_estimator())) is default_estimator()
+    estimator = PatternEstimator({"names": ["jack", "ward"]})
+    unpickled = pickle.loads(pickle.dumps(estimator))
+    assert unpickled.entropy("jackward") == estimator.entropy("jackward")
+
+
+def test_policy():
+    policy = PasswordPolicy(min_entropy=40, entropy_method="pattern")
+    assert policy.to_dict()["entropy_method"] == "pattern"
+    assert PasswordPolicy.from_dict(policy.to_dict()).estimator is policy.estimator
+
+    weak = "Password1!Password1!"
+    assert not policy.validate(weak)
+    assert PasswordPolicy(min_entropy=40).validate(weak)
+    (failure,) = policy.test_password(weak)
+    assert failure.name == "entropy"
+    assert failure.actual == pytest.approx(
+        calculate_entropy(weak, method="pattern")
+    )
+    assert policy.entropy(Password(weak)) == failure.actual
+    assert policy.compile()(weak)[0].name == "entropy"
+    assert policy.validate_many([weak, "x7#Kq9!mZ2vB"]) == [False, True]
+    assert pickle.loads(pickle.dumps(policy)).estimator is policy.estimator
+
+    with pytest.raises(AssertionError):
+        PasswordPolicy(entropy_method="lenient")
+
+
+def test_too_long_passwords_are_not_estimated():
+    policy = PasswordPolicy(max_length=64, min_entropy=40, entropy_method="pattern")
+    password = "12" * 100
+    # it fails the max_length, so its entropy is the "normal" entropy
+    assert [failure.name for failure in policy.test_password(password)] == [
+        "the maximum password length"
+    ]
+    assert policy.entropy(Password(password)) == calculate_entropy(password)
+    assert IncrementalPassword(policy, password).entropy == calculate_entropy(
+        password
+    )
+
+
+def test_incremental():
+    policy = PasswordPolicy(min_length=4, min_entropy=25, entropy_method="pattern")
+    incremental = IncrementalPassword(policy, "xjqkvz")
+    assert incremental.validate()
+    # the same length and classes, but now a keyboard walk
+    incremental.update("qwerty")
+    assert not incremental.validate()
+    assert incremental.entropy == policy.entropy(Password("qwerty"))
+    assert incremental.check_code() == policy.check_code("qwerty")
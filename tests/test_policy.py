@@ -1,6 +1,16 @@
+import asyncio
+import concurrent.futures
+import os
+import subprocess
+import sys
+import threading
+import time
+
 import pytest
 
+from password_validation.calculate import calculate_entropy
 from password_validation.character_pool import CharacterPool
+from password_validation.password import Password
 from password_validation.funcs import greater_than_or_equal_to
 from password_validation.funcs import less_than_or_equal_to
 from password_validation.funcs import not_in
@@ -165,6 +175,10 @@ def test_password_policy():
         entropy=32,
         classification="Weak",
         forbidden_words=[],
+        forbidden_words_match="exact",
+        entropy_method="normal",
+        markov_model=None,
+        breached_passwords=None,
         character_pool=CharacterPool().to_dict(),
     )
 
@@ -176,6 +190,65 @@ def test_policy_with_entropy():
     assert len(failures) == 1
 
 
+def test_policy_entropy_table():
+    policy = PasswordPolicy(max_length=64)
+
+    assert len(policy.entropy_table) == 64
+    assert all(len(row) == 65 for row in policy.entropy_table)
+
+    for password in ("hello", "Hello World 1234$", "x" * 64, ""):
+        entropy = policy.entropy(Password(password, character_pool=policy.pool))
+        assert entropy == pytest.approx(calculate_entropy(password))
+
+    # longer than the table, falls back to working it out
+    entropy = policy.entropy(Password("x" * 65, character_pool=policy.pool))
+    assert entropy == pytest.approx(calculate_entropy("x" * 65))
+
+
+def test_policy_shares_default_pool_and_tables():
+    first, second = PasswordPolicy(), PasswordPolicy()
+    assert first.pool is second.pool is Password("hello").pool
+    assert first.entropy_table is second.entropy_table
+    assert first.min_length_for_mask is second.min_length_for_mask
+
+
+def test_policy_min_length_for_mask():
+    policy = PasswordPolicy(min_entropy=32)
+    lowercase = Password("a", character_pool=policy.pool).mask
+
+    assert policy.min_length_for_mask[lowercase] == 7
+    assert not policy.test_password("abcdef", failures_only=False)[8]
+    assert policy.test_password("abcdefg", failures_only=False)[8]
+    assert policy.min_length_for_mask[0] is None
+
+
+def test_policy_uses_its_character_pool():
+    pool = CharacterPool(other="éü")
+    policy = PasswordPolicy(character_pool=pool, other=1)
+
+    assert policy.validate("hello world, it's me") is False
+    assert policy.validate("héllo world, it's me") is True
+
+
+def test_policy_with_unicode_categories():
+    from password_validation.character_pool import CharacterRanges
+
+    pool = CharacterPool.from_unicode_categories(other=("Lo",))
+    policy = PasswordPolicy(character_pool=pool, uppercase=1, other=1)
+    passwords = ["Héllo Wörld 字!", "héllo wörld 字!", "Hello World!!", "字" * 12]
+    assert policy.validate_many(passwords) == [
+        policy.validate(password) for password in passwords
+    ]
+    assert policy.validate("Héllo Wörld 字!") is True
+    compiled = policy.compile()
+    for password in passwords:
+        assert repr(compiled(password)) == repr(policy.test_password(password))
+
+    ideographs = CharacterRanges([(0x4E00, 0x9FFF)])
+    policy = PasswordPolicy(character_pool=CharacterPool(other=ideographs))
+    assert policy.validate("汉字汉字汉字汉字汉字汉字") is True
+
+
 def test_password_policy_other_kwargs():
     # check object
     policy = PasswordPolicy(
@@ -426,3 +499,505 @@ def test_password_policy_breaks_other_with_random_pool(random_pool):
         assert PasswordPolicy(other=i, character_pool=random_pool)
     with pytest.raises(AssertionError):
         PasswordPolicy(other=len(random_pool.other) + 1, character_pool=random_pool)
+
+
+PASSWORDS = [
+    "hello",
+    "password",
+    "hello-this-is-quite-a-good-password",
+    "Hello World 1234$",
+    "aaaaaaaaaaaa",
+    "abcdefghijkl",
+    "ABC123!@#abc 987",
+    "x" * 200,
+    "",
+    "hello",
+]
+
+
+def test_test_passwords():
+    policy = PasswordPolicy(uppercase=1, forbidden_words=["abcdefghijkl"])
+
+    results = policy.test_passwords(PASSWORDS)
+    assert len(results) == len(PASSWORDS)
+    for password, result in zip(PASSWORDS, results):
+        assert repr(result) == repr(policy.test_password(password))
+
+    results = policy.test_passwords(PASSWORDS, failures_only=False)
+    for password, result in zip(PASSWORDS, results):
+        assert repr(result) == repr(policy.test_password(password, failures_only=False))
+
+    # identical passwords are only tested once, but get lists of their own
+    assert repr(results[0]) == repr(results[-1])
+    assert results[0] is not results[-1]
+    results[0].clear()
+    assert results[-1]
+
+
+def test_validate_many():
+    policies = [
+        PasswordPolicy(),
+        PasswordPolicy(min_length=0, min_entropy=10),
+        PasswordPolicy(lowercase=2, uppercase=1, numbers=3, symbols=1, whitespace=1),
+        PasswordPolicy(forbidden_words=["password", "aaaaaaaaaaaa"], min_length=4),
+        PasswordPolicy(max_length=16, min_entropy=60),
+    ]
+    for policy in policies:
+        assert policy.validate_many(PASSWORDS) == [
+            policy.validate(password) for password in PASSWORDS
+        ]
+        assert policy.validate_many(iter(PASSWORDS)) == [
+            policy.validate(password) for password in PASSWORDS
+        ]
+
+    policy = PasswordPolicy()
+    assert policy.validate_many([]) == []
+    assert policy.validate_many([Password("hello-this-is-quite-a-good-password")]) == [True]
+
+    # too short, so it fails before its characters are looked at, as validate
+    assert policy.validate("héllo") is False
+    assert policy.validate_many(["héllo"]) == [False]
+    with pytest.raises(AssertionError):
+        policy.validate_many(["héllo wörld, it's me"])
+
+
+def test_make_password_requirement_test():
+    requirement = MakePasswordRequirement("name", 5)
+    assert requirement.test(5) is True
+    assert requirement.test(4) is False
+
+    forbidden_requirements = MakePasswordRequirement(
+        "forbidden words", ["hello"], func=not_in
+    )
+    assert forbidden_requirements.test("hello") is False
+    assert forbidden_requirements.test("bye") is True
+
+
+def test_test_password_fail_fast():
+    policy = PasswordPolicy(uppercase=1, forbidden_words=["Hello World 1234$"])
+
+    failures = policy.test_password("hello", fail_fast=True)
+    assert len(failures) == 1
+    assert failures[0].name == "the minimum password length"
+
+    failures = policy.test_password("x" * 200, fail_fast=True)
+    assert len(failures) == 1
+    assert failures[0].name == "the maximum password length"
+
+    failures = policy.test_password("hello world 1234$", fail_fast=True)
+    assert len(failures) == 1
+    assert failures[0].name == "the minimum number of uppercase characters"
+
+    failures = policy.test_password("Hello World 1234$", fail_fast=True)
+    assert len(failures) == 1
+    assert failures[0].name == "forbidden words"
+
+    assert policy.test_password("Hello World 12345$", fail_fast=True) == []
+
+    # the length is checked before the characters are looked at
+    failures = policy.test_password("héllo", fail_fast=True)
+    assert failures[0].name == "the minimum password length"
+    with pytest.raises(AssertionError):
+        policy.test_password("héllo world 1234$", fail_fast=True)
+
+
+def test_validate_matches_test_password():
+    policies = [
+        PasswordPolicy(),
+        PasswordPolicy(min_length=0, min_entropy=10),
+        PasswordPolicy(lowercase=2, uppercase=1, numbers=3, symbols=1, whitespace=1),
+        PasswordPolicy(forbidden_words=["password", "aaaaaaaaaaaa"], min_length=4),
+    ]
+    for policy in policies:
+        for password in PASSWORDS:
+            assert policy.validate(password) == (not policy.test_password(password))
+
+
+def test_compile():
+    import random
+
+    random.seed(1)
+    pool = CharacterPool()
+    characters = sorted(pool.all)
+    passwords = PASSWORDS + [
+        "".join(random.choice(characters) for _ in range(random.randint(0, 140)))
+        for _ in range(300)
+    ]
+    policies = [
+        PasswordPolicy(),
+        PasswordPolicy(min_length=0, min_entropy=10),
+        PasswordPolicy(lowercase=2, uppercase=1, numbers=3, symbols=1, whitespace=1),
+        PasswordPolicy(forbidden_words=["password", "aaaaaaaaaaaa"], min_length=4),
+        PasswordPolicy(max_length=16, min_entropy=60),
+        PasswordPolicy(character_pool=CharacterPool(other="éü"), other=1),
+    ]
+    for policy in policies:
+        compiled = policy.compile()
+        for password in passwords:
+            assert repr(compiled(password)) == repr(policy.test_password(password))
+
+    policy = PasswordPolicy()
+    compiled = policy.compile()
+    password = Password("hello-this-is-quite-a-good-password")
+    assert compiled(password) == []
+    with pytest.raises(AssertionError):
+        compiled("héllo")
+
+
+def test_compile_with_custom_requirement_cls():
+    class Requirement(PasswordRequirement):
+        def __bool__(self):
+            return True
+
+    policy = PasswordPolicy(requirement_cls=Requirement)
+    compiled = policy.compile()
+    assert compiled("hello") == policy.test_password("hello") == []
+
+
+def test_forbidden_words_substring_match():
+    policy = PasswordPolicy(forbidden_words=["password", "qwerty"])
+    assert policy.validate("Summer2024password!") is True
+
+    policy = PasswordPolicy(
+        forbidden_words=["password", "qwerty"], forbidden_words_match="substring"
+    )
+    assert policy.to_dict()["forbidden_words_match"] == "substring"
+    assert policy.validate("Summer2024password!") is False
+    assert policy.validate("Summer2024PASSWORD!") is False
+    assert policy.validate("Summer2024passw0rd!") is True
+    assert policy.validate_many(["Summer2024password!", "Summer2024passw0rd!"]) == [
+        False,
+        True,
+    ]
+    assert repr(policy.compile()("Summer2024password!")) == repr(
+        policy.test_password("Summer2024password!")
+    )
+
+    failures = policy.test_password("Summer2024password!")
+    assert len(failures) == 1
+    assert failures[0].name == "forbidden words"
+
+    # the automaton is only built once, so the words can't be changed
+    assert policy.forbidden_words == ("password", "qwerty")
+    with pytest.raises(AttributeError):
+        policy.forbidden_words.append("summer")
+
+    with pytest.raises(AssertionError):
+        PasswordPolicy(forbidden_words_match="fuzzy")
+
+
+def test_breached_passwords(tmp_path):
+    from password_validation.breach import build_breach_file
+
+    source = tmp_path / "dump.txt"
+    source.write_text("password123456\nSummer2024password!\n")
+    destination = str(tmp_path / "breached.sha1")
+    build_breach_file(str(source), destination, plaintext=True)
+
+    policy = PasswordPolicy(breached_passwords=destination)
+    assert policy.to_dict()["breached_passwords"] == destination
+
+    assert policy.validate("password123456") is False
+    assert policy.validate("password1234567") is True
+    assert policy.validate_many(["password123456", "password1234567"]) == [False, True]
+
+    failures = policy.test_password("Summer2024password!")
+    assert len(failures) == 1
+    assert failures[0].name == "breached passwords"
+    assert repr(policy.compile()("Summer2024password!")) == repr(failures)
+    assert len(policy.test_password("Summer2024password!", failures_only=False)) == 11
+    assert len(PasswordPolicy().test_password("hello", failures_only=False)) == 10
+
+    with pytest.raises(AssertionError):
+        PasswordPolicy(breached_passwords=["password123456"])
+
+
+def test_forbidden_words_bloom_filter(tmp_path):
+    from password_validation.bloom import BloomFilter
+
+    words = ["password123456", "Summer2024password!"]
+    bloom_filter = BloomFilter.build(words)
+    policy = PasswordPolicy(forbidden_words=bloom_filter)
+    assert policy.forbidden_words is bloom_filter
+    assert policy.validate("password123456") is False
+    assert policy.validate("password1234567") is True
+    assert policy.validate_many(words) == [False, False]
+
+    failures = policy.test_password("Summer2024password!")
+    assert len(failures) == 1
+    assert failures[0].name == "forbidden words"
+    assert repr(policy.compile()("Summer2024password!")) == repr(failures)
+
+    path = str(tmp_path / "words.bloom")
+    bloom_filter.save(path)
+    policy = PasswordPolicy(forbidden_words=path)
+    assert isinstance(policy.forbidden_words, BloomFilter)
+    assert policy.to_dict()["forbidden_words"] == path
+    assert policy.validate("password123456") is False
+
+    # an empty filter is falsy, but is still kept
+    empty = BloomFilter.build([])
+    policy = PasswordPolicy(forbidden_words=empty)
+    assert policy.forbidden_words is empty
+    with pytest.raises(AssertionError):
+        PasswordPolicy(forbidden_words=empty, forbidden_words_match="substring")
+
+    with pytest.raises(AssertionError):
+        PasswordPolicy(forbidden_words=bloom_filter, forbidden_words_match="substring")
+    with pytest.raises(AssertionError):
+        PasswordPolicy(forbidden_words=("password",))
+
+
+def test_password_requirement_is_evaluated_once():
+    calls = []
+
+    def func(x, y):
+        calls.append((x, y))
+        return x >= y
+
+    password_requirement = PasswordRequirement("hello", 0, 1, func)
+    assert calls == [(0, 1)]
+    assert not password_requirement
+    assert not bool(password_requirement)
+    assert password_requirement.fulfilled is False
+    assert calls == [(0, 1)]
+
+    assert not hasattr(password_requirement, "__dict__")
+
+
+def test_test_password_tests_each_requirement_once():
+    calls = []
+
+    def func(x, y):
+        calls.append((x, y))
+        return x >= y
+
+    policy = PasswordPolicy()
+    policy.min_length_requirement.func = func
+    for instrumented in (False, True):
+        if instrumented:
+            policy.instrument()
+        for failures_only in (True, False):
+            calls.clear()
+            (failure,) = [
+                result
+                for result in policy.test_password("hello", failures_only)
+                if result.name == "the minimum password length"
+            ]
+            assert not failure
+            assert calls == [(5, 12)]
+
+
+def test_password_requirement_statement_is_lazy():
+    calls = []
+
+    class Statement:
+        def __call__(self, x, y):
+            calls.append((x, y))
+            return f"{x} >= {y}"
+
+    def func(x, y):
+        return x >= y
+
+    func.format_statement = Statement()
+
+    password_requirement = PasswordRequirement("hello", 0, 1, func)
+    assert calls == []
+    assert password_requirement.statement == "0 >= 1"
+    assert repr(password_requirement) == (
+        "<RequirementUnfulfilled('hello', statement=(0 >= 1))>"
+    )
+    assert len(calls) == 2
+
+
+def test_password_requirement_message():
+    password_requirement = PasswordRequirement(
+        "the minimum password length", 5, 12, greater_than_or_equal_to
+    )
+    assert password_requirement.message == (
+        "the minimum password length not satisfied: expected: 12, got: 5"
+    )
+    password_requirement = PasswordRequirement(
+        "the minimum password length", 12, 12, greater_than_or_equal_to
+    )
+    assert password_requirement.message == (
+        "the minimum password length satisfied: expected: 12, got: 12"
+    )
+
+
+def test_requirement_code():
+    from password_validation import RequirementCode
+
+    assert [int(code) for code in RequirementCode] == [1 << i for i in range(11)]
+    assert RequirementCode.LOWERCASE == 1
+    assert RequirementCode.MIN_LENGTH == 64
+    assert RequirementCode.ENTROPY == 256
+    assert RequirementCode.FORBIDDEN_WORDS == 512
+
+
+def test_check_code():
+    from password_validation import RequirementCode
+
+    policy = PasswordPolicy()
+    assert policy.check_code("hello-this-is-quite-a-good-password") == 0
+    assert policy.check_code("hello") == RequirementCode.MIN_LENGTH | RequirementCode.ENTROPY
+
+    policies = [
+        PasswordPolicy(),
+        PasswordPolicy(lowercase=2, uppercase=1, numbers=3, symbols=1, whitespace=1),
+        PasswordPolicy(forbidden_words=["password", "aaaaaaaaaaaa"], min_length=4),
+        PasswordPolicy(max_length=16, min_entropy=60),
+    ]
+    for policy in policies:
+        for password in PASSWORDS:
+            code = policy.check_code(password)
+            failures = policy.test_password(password)
+            assert repr(policy.decode_code(code, password)) == repr(failures)
+            assert (code == 0) == policy.validate(password)
+            assert bin(code).count("1") == len(failures)
+
+
+def test_from_dict():
+    policy = PasswordPolicy(
+        uppercase=1,
+        min_length=8,
+        min_entropy=40,
+        forbidden_words=["password"],
+        forbidden_words_match="substring",
+        character_pool=CharacterPool(other="é"),
+    )
+    copy = PasswordPolicy.from_dict(policy.to_dict())
+    assert copy.to_dict() == policy.to_dict()
+    assert copy.pool is policy.pool
+
+    policy = PasswordPolicy.from_dict(
+        {"min_length": 8, "entropy": 20, "character_pool": {"other": ["é", "ü"]}}
+    )
+    assert policy.min_length == 8
+    assert policy.min_entropy == 20
+    assert policy.pool.other == set("éü")
+    assert policy.pool.lowercase == set("abcdefghijklmnopqrstuvwxyz")
+
+    assert PasswordPolicy.from_dict({}).to_dict() == PasswordPolicy().to_dict()
+    with pytest.raises(TypeError):
+        PasswordPolicy.from_dict({"colour": "blue"})
+
+
+def async_policies(tmp_path):
+    from password_validation.breach import build_breach_file
+
+    source = tmp_path / "dump.txt"
+    source.write_text("password123456\nhello-this-is-quite-a-good-password\n")
+    destination = str(tmp_path / "breached.sha1")
+    build_breach_file(str(source), destination, plaintext=True)
+
+    class Requirement(PasswordRequirement):
+        pass
+
+    return [
+        PasswordPolicy(),
+        PasswordPolicy(uppercase=1, forbidden_words=["abcdefghijkl"]),
+        PasswordPolicy(min_length=0, min_entropy=10, forbidden_words=["password"]),
+        PasswordPolicy(
+            forbidden_words=["good"] * 2000, forbidden_words_match="substring"
+        ),
+        PasswordPolicy(breached_passwords=destination),
+        PasswordPolicy(breached_passwords=destination, requirement_cls=Requirement),
+    ]
+
+
+def test_async_api_matches_sync_api(tmp_path):
+    passwords = PASSWORDS + ["password123456", Password("ABC123!@#abc 987")]
+
+    async def check(policy, executor):
+        for password in passwords:
+            assert await policy.avalidate(password, executor) == policy.validate(
+                password
+            )
+            for failures_only in (True, False):
+                assert repr(
+                    await policy.atest_password(password, failures_only, executor=executor)
+                ) == repr(policy.test_password(password, failures_only))
+            assert repr(
+                await policy.atest_password(password, fail_fast=True, executor=executor)
+            ) == repr(policy.test_password(password, fail_fast=True))
+        assert await policy.avalidate_many(
+            passwords, executor
+        ) == policy.validate_many(passwords)
+        assert await policy.avalidate_many([]) == []
+
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        for policy in async_policies(tmp_path):
+            asyncio.run(check(policy, None))
+            asyncio.run(check(policy, executor))
+
+
+def test_async_api_looks_up_in_the_executor_once(tmp_path):
+    policy = async_policies(tmp_path)[4]
+    lookups = []
+    contains_digest = policy.breached_passwords.contains_digest
+
+    def counted(digest):
+        lookups.append(threading.current_thread() is threading.main_thread())
+        return contains_digest(digest)
+
+    policy.breached_passwords.contains_digest = counted
+    password = "hello-this-is-quite-a-good-password"
+
+    async def check():
+        with concurrent.futures.ThreadPoolExecutor(1) as executor:
+            await policy.atest_password(
+                password, failures_only=False, executor=executor
+            )
+            await policy.atest_password(password, fail_fast=True, executor=executor)
+
+    asyncio.run(check())
+    # once for each call, and never on the event loop
+    assert lookups == [False, False]
+
+
+def test_async_api_timeout_and_cancel(tmp_path):
+    policy = async_policies(tmp_path)[4]
+    assert not policy._heavy_checks_inline()
+    assert PasswordPolicy(forbidden_words=["password"])._heavy_checks_inline()
+
+    def slow(password):
+        time.sleep(0.2)
+        return None
+
+    policy._first_heavy_failure = slow
+    password = "hello-this-is-quite-a-good-password!"
+
+    async def timeout():
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.avalidate(password, timeout=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await policy.atest_password(password, fail_fast=True, timeout=0.01)
+        # a failing cheap check doesn't wait for the executor
+        assert await policy.avalidate("hello", timeout=0.01) is False
+
+    async def cancel():
+        task = asyncio.ensure_future(policy.avalidate(password))
+        await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(timeout())
+    asyncio.run(cancel())
+
+
+def test_asyncio_is_imported_lazily():
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys, password_validation.coalesce; "
+            "print('asyncio' in sys.modules, 'concurrent.futures' in sys.modules)",
+        ],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert completed.stdout.split() == ["False", "False"]
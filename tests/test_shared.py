@@ -0,0 +1,129 @@
+import gc
+import multiprocessing
+import os
+import pickle
+
+from password_validation.bloom import BloomFilter
+from password_validation.breach import BreachedPasswords
+from password_validation.breach import sha1_digest
+from password_validation.policy import PasswordPolicy
+from password_validation.shared import SharedPolicy
+from password_validation.shared import SortedWords
+
+PASSWORDS = ["password", "hello", "my password is long", "Summer2024password!!", "x" * 20]
+
+
+def test_sorted_words():
+    words = SortedWords.build(["qwerty", "password", "straße", "qwerty"])
+    assert len(words) == 3
+    assert list(words) == ["password", "qwerty", "straße"]
+    assert repr(words) == "SortedWords(3 words)"
+    for word in ("password", "qwerty", "straße"):
+        assert word in words
+    for word in ("", "pass", "passwords", "zzz", "\udcff"):
+        assert word not in words
+    assert "password" in pickle.loads(pickle.dumps(words))
+
+    empty = SortedWords.build([])
+    assert len(empty) == 0
+    assert "" not in empty
+
+
+def check_shared(policy):
+    expected = [policy.check_code(password) for password in PASSWORDS]
+    with SharedPolicy(policy) as shared:
+        handle = shared.handle
+        # the handle is small, whatever the size of the forbidden words
+        assert len(pickle.dumps(handle)) < 8192
+        attached = pickle.loads(pickle.dumps(handle)).attach()
+        assert attached is handle.attach()
+        assert [attached.check_code(password) for password in PASSWORDS] == expected
+        compiled = attached.compile()
+        assert [
+            bool(compiled(password)) for password in PASSWORDS
+        ] == [bool(code) for code in expected]
+        assert attached.validate_many(PASSWORDS) == policy.validate_many(PASSWORDS)
+    # attached policies keep working once the file is removed
+    assert shared.path is None or not os.path.exists(shared.path)
+    assert [attached.check_code(password) for password in PASSWORDS] == expected
+    return attached
+
+
+def test_shared_policy():
+    words = ["password", "hello"] + [f"word{i}" for i in range(10000)]
+    attached = check_shared(PasswordPolicy(min_length=4, forbidden_words=words))
+    assert sorted(attached.to_dict()["forbidden_words"]) == sorted(words)
+
+    check_shared(
+        PasswordPolicy(
+            min_length=4, forbidden_words=words, forbidden_words_match="substring"
+        )
+    )
+    check_shared(
+        PasswordPolicy(min_length=4, forbidden_words=BloomFilter.build(words))
+    )
+    check_shared(PasswordPolicy())
+
+
+def test_shared_policy_from_files(tmp_path):
+    bloom_path = str(tmp_path / "words.bloom")
+    BloomFilter.build(["password"]).save(bloom_path)
+    breach_path = tmp_path / "breached.sha1"
+    breach_path.write_bytes(b"".join(sorted([sha1_digest("hello")])))
+
+    policy = PasswordPolicy(
+        min_length=4, forbidden_words=bloom_path, breached_passwords=str(breach_path)
+    )
+    with SharedPolicy(policy) as shared:
+        # files are mapped again from their paths, there is nothing to share
+        assert shared.path is None
+        attached = shared.handle.attach()
+        assert attached.forbidden_words.path == bloom_path
+        assert "hello" in attached.breached_passwords
+    check_shared(policy)
+
+
+def test_shared_breached_passwords():
+    digests = sorted(sha1_digest(password) for password in ("hello", "password"))
+    policy = PasswordPolicy(
+        min_length=4, breached_passwords=BreachedPasswords(b"".join(digests))
+    )
+    attached = check_shared(policy)
+    assert "hello" in attached.breached_passwords
+
+
+def check_in_process(handle):
+    return [handle.attach().check_code(password) for password in PASSWORDS]
+
+
+def test_shared_policy_across_processes():
+    policy = PasswordPolicy(min_length=4, forbidden_words=["password", "hello"])
+    expected = [policy.check_code(password) for password in PASSWORDS]
+    with SharedPolicy(policy) as shared:
+        with multiprocessing.Pool(2) as pool:
+            assert pool.map(check_in_process, [shared.handle] * 4) == [expected] * 4
+
+
+def test_temporary_file_is_removed():
+    policy = PasswordPolicy(min_length=4, forbidden_words=["password", "hello"])
+    shared = SharedPolicy(policy)
+    path = shared.path
+    assert os.path.exists(path)
+    # when the shared policy isn't closed, but is garbage collected
+    del shared
+    gc.collect()
+    assert not os.path.exists(path)
+
+    with SharedPolicy(policy) as shared:
+        path = shared.path
+    assert not os.path.exists(path)
+    assert not shared._finalizer.alive
+
+
+def test_pickled_policy_is_small():
+    policy = PasswordPolicy()
+    rv = pickle.loads(pickle.dumps(policy))
+    assert len(pickle.dumps(policy)) < 8192
+    assert rv.entropy_table == policy.entropy_table
+    assert rv.min_length_for_mask == policy.min_length_for_mask
+    assert rv.to_dict() == policy.to_dict()